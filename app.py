@@ -1,8 +1,26 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routes import outfit, travel, wardrobe, auth
+from services.upload_outbox import outbox
+from services.metrics_buffer import guest_predictions
+from services.ingest import UploadRejected
+from cores.instrumentation import RequestMetricsMiddleware
+from cores.profiling import ProfilingMiddleware, profiling_enabled
 
-app = FastAPI(title="AI Outfit & Weather Assistant")
+
+@asynccontextmanager
+async def lifespan(app):
+    # Background workers live as long as the server
+    outbox.start()
+    guest_predictions.start()
+    yield
+    await guest_predictions.stop()
+    await outbox.stop()
+
+
+app = FastAPI(title="AI Outfit & Weather Assistant", lifespan=lifespan)
  
 app.add_middleware(
     CORSMiddleware,
@@ -11,6 +29,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+@app.exception_handler(UploadRejected)
+async def upload_rejected_handler(request: Request, exc: UploadRejected):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 app.include_router(auth.router)
 app.include_router(outfit.router)
@@ -1,13 +1,33 @@
 """
 Authentication utilities - JWT and password hashing
+
+Tokens carry the user's email ("sub"), primary key ("uid") and token
+version ("ver"). Every password change bumps users.token_version, so tokens
+issued before it no longer validate. Verified tokens are cached as a
+lightweight Principal (id, email) for AUTH_CACHE_TTL_SECONDS, so most
+authenticated requests need no database round trip; routes that need the
+full User row depend on get_current_user. This process drops the cached
+principals of a user when the user is deleted or their password changes (ORM
+flushes; bulk query updates/deletes are not seen); other workers keep serving
+their cached entries for at most AUTH_CACHE_TTL_SECONDS.
+
+bcrypt hashing and verification are CPU-bound (tens to hundreds of ms), so
+request handlers use the *_async variants, which run them on a small
+dedicated thread pool instead of the event loop.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, namedtuple
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 from database import get_db
@@ -20,23 +40,35 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# bcrypt work factor for new hashes; older hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Max concurrent hash/verify operations (bcrypt releases the GIL)
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", str(os.cpu_count() or 2)))
+
+# Verified token -> principal cache
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
 # Security scheme (HTTPBearer for simple token pasting)
 security = HTTPBearer()
 
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="bcrypt")
+
+
+def hash_password(password: str, rounds: int = None) -> str:
+    """Hash a password using bcrypt (blocking; see hash_password_async)"""
     # Convert password to bytes
     password_bytes = password.encode('utf-8')
     # Generate salt and hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     # Return as string
     return hashed.decode('utf-8')
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
+    """Verify a password against a hash (blocking; see verify_password_async)"""
     try:
         # Convert to bytes
         password_bytes = plain_password.encode('utf-8')
@@ -47,6 +79,24 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when a stored hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_password_pool, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        _password_pool, verify_password, plain_password, hashed_password
+    )
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -60,32 +110,143 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     return encoded_jwt
 
 
-def get_current_user(
+Principal = namedtuple("Principal", "id email")
+
+
+class PrincipalCache:
+    """Verified token -> Principal, kept for at most `ttl` seconds"""
+
+    def __init__(self, ttl=AUTH_CACHE_TTL_SECONDS, max_entries=AUTH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # token -> (principal, expires at, monotonic)
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[token]
+                return None
+            return entry[0]
+
+    def put(self, token, principal, token_exp=None):
+        ttl = self.ttl
+        if token_exp is not None:
+            # Never outlive the token itself
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (principal, time.monotonic() + ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            stale = [token for token, (principal, _) in self._entries.items() if principal.id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def _invalidate_on_commit(target):
+    principal_cache.invalidate_user(target.id)
+    session = object_session(target)
+    if session is not None:
+        # Again after commit, in case a concurrent request cached the old row meanwhile
+        session.info.setdefault("auth_invalidate", set()).add(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    _invalidate_on_commit(target)
+
+
+@event.listens_for(User, "before_update")
+def _bump_token_version(mapper, connection, target):
+    # A login rehash counts too: other sessions sign in again once after a cost change
+    if inspect(target).attrs.password.history.has_changes():
+        target.token_version = (target.token_version or 0) + 1
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    if inspect(target).attrs.password.history.has_changes():
+        _invalidate_on_commit(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop("auth_invalidate", ()):
+        principal_cache.invalidate_user(user_id)
+
+
+def _credentials_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """
-    Get the current authenticated user from JWT token.
-    This is used as a dependency to protect routes.
+    Get the (id, email) of the authenticated user from the JWT token.
+    Served from the principal cache when possible, otherwise one primary
+    key lookup (email lookup for tokens issued without a "uid"). Tokens
+    issued before the user's last password change are rejected.
     """
     token = credentials.credentials
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
+        user_id = payload.get("uid")
+        version = payload.get("ver", 0)
         if email is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
+        raise _credentials_exception()
+
+    query = db.query(User.id, User.email, User.token_version)
+    if user_id is not None:
+        row = query.filter(User.id == user_id).first()
+    else:
+        row = query.filter(User.email == email).first()
+    if row is None or row.email != email or row.token_version != version:
+        raise _credentials_exception()
+
+    principal = Principal(row.id, row.email)
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+
+def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Get the full User row of the authenticated user.
+    Use get_current_principal instead when only the id is needed.
+    """
+    user = db.get(User, principal.id)
     if user is None:
-        raise credentials_exception
-    
+        principal_cache.invalidate_user(principal.id)
+        raise _credentials_exception()
     return user
-
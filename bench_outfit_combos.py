@@ -0,0 +1,69 @@
+"""
+Benchmark the outfit combination generator on synthetic wardrobes.
+
+Usage: python bench_outfit_combos.py
+"""
+import random
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from services.outfit_combos import SLOT_BY_CATEGORY, generate_combinations, slot_for_category
+
+CATEGORIES = sorted(SLOT_BY_CATEGORY)
+COLORS = ["black", "white", "red", "blue", "green", "beige", "navy", "pink", None]
+OCCASIONS = ["casual", "formal", "party", "office", None]
+
+WEATHER_CASES = {
+    "mild": {"temp": 22, "rain": 0, "min_temp": 18, "max_temp": 26, "rain_prob": 10},
+    "cold": {"temp": 8, "rain": 0, "min_temp": 4, "max_temp": 11, "rain_prob": 20},
+    "hot_rain": {"temp": 33, "rain": 4, "min_temp": 27, "max_temp": 35, "rain_prob": 70},
+}
+
+
+def make_wardrobe(size, seed=0):
+    rng = random.Random(seed)
+    today = date.today()
+    items = []
+    for i in range(size):
+        worn = rng.random() < 0.7
+        items.append(SimpleNamespace(
+            id=i + 1,
+            category=rng.choice(CATEGORIES),
+            color=rng.choice(COLORS),
+            occasion=rng.choice(OCCASIONS),
+            confidence=round(rng.random(), 2),
+            last_worn_date=today - timedelta(days=rng.randint(0, 120)) if worn else None
+        ))
+    return items
+
+
+def naive_combination_count(items):
+    """How many outfits an exhaustive search would have to score"""
+    counts = {}
+    for item in items:
+        slot = slot_for_category(item.category)
+        counts[slot] = counts.get(slot, 0) + 1
+    base = counts.get("top", 0) * counts.get("bottom", 0) + counts.get("one_piece", 0)
+    return base * counts.get("footwear", 0) * max(counts.get("outerwear", 0), 1) * max(counts.get("bag", 0), 1)
+
+
+def run(sizes=(50, 500, 5000), repeats=20):
+    avoid_before = date.today() - timedelta(days=7)
+    print(f"{'items':>6} {'weather':>9} {'naive combos':>14} {'mean ms':>9} {'max ms':>8} {'results':>8}")
+    for size in sizes:
+        items = make_wardrobe(size)
+        naive = naive_combination_count(items)
+        for name, weather in WEATHER_CASES.items():
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                combos = generate_combinations(items, weather=weather, occasion="casual",
+                                               avoid_before=avoid_before, top_k=5)
+                timings.append((time.perf_counter() - start) * 1000)
+            mean_ms = sum(timings) / len(timings)
+            print(f"{size:>6} {name:>9} {naive:>14,} {mean_ms:>9.2f} {max(timings):>8.2f} {len(combos):>8}")
+
+
+if __name__ == "__main__":
+    run()
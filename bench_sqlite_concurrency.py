@@ -0,0 +1,127 @@
+"""
+Benchmark SQLite lock contention: concurrent prediction inserts and
+wardrobe reads against the untuned ("default") and the tuned (WAL, pragmas,
+pool) engine profiles from database.py. Each profile gets a fresh database
+file seeded with one user's wardrobe.
+
+Usage: python bench_sqlite_concurrency.py [--seconds 5] [--writers 8] [--readers 16]
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import Outfit, Prediction, User
+from services.counters import count_predictions
+from services.wardrobe_listing import list_outfits
+
+CATEGORIES = ["shirt", "jeans", "dress", "sneakers", "jacket", "skirt"]
+
+
+def seed(session_factory, outfits=500):
+    db = session_factory()
+    user = User(email="bench@x.com", password="x")
+    db.add(user)
+    db.flush()
+    db.add_all(
+        Outfit(owner_id=user.id, image_url=f"https://img/{i}.jpg", category=random.choice(CATEGORIES))
+        for i in range(outfits)
+    )
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def write_once(session_factory, user_id):
+    """One authenticated prediction insert with its counters, as /predict/auth does"""
+    db = session_factory()
+    try:
+        category = random.choice(CATEGORIES)
+        db.add(Prediction(user_id=user_id, is_guest=False, predicted_category=category, confidence=0.9))
+        count_predictions(db, [(False, category, datetime.utcnow())])
+        db.commit()
+    finally:
+        db.close()
+
+
+def read_once(session_factory, user_id):
+    """One page of the wardrobe list, as /wardrobe/outfits does"""
+    db = session_factory()
+    try:
+        list_outfits(db, user_id, limit=100)
+    finally:
+        db.close()
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_profile(profile, seconds, writers, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", profile=profile)
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        user_id = seed(session_factory)
+
+        stop = time.perf_counter() + seconds
+        results = {"write": [], "read": [], "write_locked": 0, "read_locked": 0}
+        lock = threading.Lock()
+
+        def worker(kind, op):
+            timings, locked = [], 0
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    op(session_factory, user_id)
+                    timings.append((time.perf_counter() - start) * 1000)
+                except (OperationalError, sqlite3.OperationalError) as e:
+                    if "locked" not in str(e):
+                        raise
+                    locked += 1
+            with lock:
+                results[kind].extend(timings)
+                results[f"{kind}_locked"] += locked
+
+        threads = [threading.Thread(target=worker, args=("write", write_once)) for _ in range(writers)]
+        threads += [threading.Thread(target=worker, args=("read", read_once)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    for kind in ("write", "read"):
+        timings = results[kind]
+        print(f"{profile:>8} {kind:>6} {len(timings) / seconds:>9.0f} "
+              f"{_percentile(timings, 50):>8.1f} {_percentile(timings, 99):>8.1f} "
+              f"{max(timings, default=float('nan')):>9.1f} {results[f'{kind}_locked']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writer / {args.readers} reader threads, {args.seconds:g}s per profile")
+    print(f"{'profile':>8} {'op':>6} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>9} {'locked':>7}")
+    for profile in ("default", "tuned"):
+        run_profile(profile, args.seconds, args.writers, args.readers)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ import cloudinary.uploader
 import os
 from dotenv import load_dotenv
 from urllib.parse import urlparse
+from cores.instrumentation import timed
 
 load_dotenv()
 
@@ -49,6 +50,7 @@ cloudinary.config(
 )
 
 
+@timed("cloudinary")
 def upload_image_to_cloudinary(file_bytes, folder="wardrobe"):
     """
     Upload image to Cloudinary and return secure URL
@@ -92,3 +94,16 @@ def upload_image_to_cloudinary(file_bytes, folder="wardrobe"):
     except Exception as e:
         raise Exception(f"Cloudinary upload failed: {str(e)}")
 
+
+
+def delete_image_from_cloudinary(public_id):
+    """
+    Delete an image from Cloudinary (e.g. an upload orphaned by a failed request)
+
+    Args:
+        public_id: Cloudinary public_id returned by upload_image_to_cloudinary
+    """
+    try:
+        return cloudinary.uploader.destroy(public_id, resource_type="image")
+    except Exception as e:
+        raise Exception(f"Cloudinary delete failed: {str(e)}")
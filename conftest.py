@@ -0,0 +1,35 @@
+"""Shared test fixtures: a fresh SQLite database per test"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models import Base
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Engine over a database file in tmp_path with every table created"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(bind=db_engine)
+
+
+@pytest.fixture
+def db_session(session_factory):
+    db = session_factory()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def db_session_with_statements(db_engine, db_session):
+    """(db_session, statements): every SQL statement sent to the database, in order"""
+    statements = []
+    event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return db_session, statements
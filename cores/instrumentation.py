@@ -0,0 +1,216 @@
+# core/instrumentation.py
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (cumulative, Prometheus style).
+    Thread-safe and cheap enough to observe on every request.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """Return {"buckets": {le: cumulative_count}, "sum": ..., "count": ...}"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = {}
+        running = 0
+        for bound, c in zip(list(self.buckets) + ["+Inf"], counts):
+            running += c
+            cumulative[str(bound)] = running
+        return {"buckets": cumulative, "sum": total, "count": count}
+
+
+
+class Counter:
+    """Monotonic counter, thread-safe"""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+
+# Seconds; covers sub-millisecond stages up to slow upstream calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class MetricFamily:
+    """One named metric with a child per combination of label values"""
+
+    def __init__(self, name, kind, help, label_names, factory):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def children(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    """Metric families rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._families = {}
+
+    def _family(self, name, kind, help, label_names, factory):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families.setdefault(name, MetricFamily(name, kind, help, label_names, factory))
+        return family
+
+    def histogram(self, name, help, label_names=(), buckets=LATENCY_BUCKETS):
+        return self._family(name, "histogram", help, label_names, lambda: Histogram(buckets))
+
+    def counter(self, name, help, label_names=()):
+        return self._family(name, "counter", help, label_names, Counter)
+
+    def render(self):
+        lines = []
+        for family in list(self._families.values()):
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for values, child in sorted(family.children()):
+                pairs = list(zip(family.label_names, values))
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_labels(pairs)} {child.value}")
+                    continue
+                snap = child.snapshot()
+                for bound, count in snap["buckets"].items():
+                    lines.append(f"{family.name}_bucket{_labels(pairs + [('le', bound)])} {count}")
+                lines.append(f"{family.name}_sum{_labels(pairs)} {snap['sum']}")
+                lines.append(f"{family.name}_count{_labels(pairs)} {snap['count']}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route")
+)
+REQUESTS = registry.counter(
+    "http_requests_total", "Requests by route and status", ("method", "route", "status")
+)
+STAGE_LATENCY = registry.histogram(
+    "stage_duration_seconds", "Latency of instrumented stages by endpoint", ("endpoint", "stage")
+)
+STAGE_ERRORS = registry.counter(
+    "stage_errors_total", "Instrumented stages that raised, by endpoint", ("endpoint", "stage")
+)
+
+# ASGI scope of the request being served; work outside a request is "background"
+_request_scope = contextvars.ContextVar("request_scope", default=None)
+
+
+def current_endpoint():
+    """Route template of the current request (e.g. /predict/guest)"""
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+@contextmanager
+def stage(name, endpoint=None):
+    """Time a block into stage_duration_seconds{endpoint, stage}"""
+    start = time.perf_counter()
+    endpoint = endpoint or current_endpoint()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(endpoint, name).inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(endpoint, name).observe(time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of stage()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording latency and status per route template.
+    Streaming responses are timed until their last body chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_scope.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route).observe(time.perf_counter() - start)
+            REQUESTS.labels(scope["method"], route, str(status[0])).inc()
@@ -0,0 +1,106 @@
+# core/profiling.py
+"""
+Opt-in sampled request profiling.
+
+ProfilingMiddleware runs cProfile around a random PROFILE_SAMPLE_RATE share of
+requests to PROFILE_PATHS, and around any request carrying an
+X-Profile-Token header equal to PROFILE_TOKEN. Each profile is written as a
+pstats file to PROFILE_DIR, named after the route, status and duration, e.g.
+    20261019T120501_predict-guest_200_143ms_3f2a.prof
+(open with `python -m pstats` or snakeviz).
+
+The middleware is only installed when sampling or a token is configured, and
+non-sampled requests go straight through. cProfile sees the event loop
+thread only: work pushed to the thread pool shows up as time spent waiting,
+and one profile runs at a time (other requests are not sampled meanwhile).
+"""
+import cProfile
+import hmac
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from database import BASE_DIR
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Comma-separated request paths eligible for random sampling ("*" for all)
+PROFILE_PATHS = [p.strip() for p in os.getenv("PROFILE_PATHS", "/predict/guest").split(",") if p.strip()]
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles")))
+PROFILE_HEADER = b"x-profile-token"
+
+
+def profiling_enabled():
+    return PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_TOKEN)
+
+
+def _slug(route):
+    return route.strip("/").replace("/", "-").replace("{", "").replace("}", "") or "root"
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, sample_rate=None, token=None, paths=None, profile_dir=None):
+        self.app = app
+        self.sample_rate = PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.token = (PROFILE_TOKEN if token is None else token).encode()
+        self.paths = PROFILE_PATHS if paths is None else paths
+        self.profile_dir = Path(profile_dir or PROFILE_DIR)
+        self._active = threading.Lock()
+
+    def _wants_profile(self, scope):
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        if self.sample_rate <= 0:
+            return False
+        if "*" not in self.paths and scope["path"] not in self.paths:
+            return False
+        return random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+        finally:
+            self._active.release()
+            duration_ms = (time.perf_counter() - start) * 1000
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            name = "{}_{}_{}_{:.0f}ms_{}.prof".format(
+                datetime.utcnow().strftime("%Y%m%dT%H%M%S"), _slug(route), status[0],
+                duration_ms, uuid.uuid4().hex[:4]
+            )
+            try:
+                await run_in_threadpool(self._dump, profiler, name)
+            except Exception as e:
+                print(f"Failed to write profile {name}: {e}")
+
+    def _dump(self, profiler, name):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(self.profile_dir / name))
+        print(f"Wrote request profile {name}")
@@ -1,5 +1,8 @@
 # core/utils.py
+import base64
+import json
 import numpy as np
+from sqlalchemy import and_, or_, tuple_
 
 def to_native_types(obj):
     if isinstance(obj, np.ndarray):
@@ -27,3 +30,44 @@ def confidence_message(conf):
         return " Medium confidence – may vary"
     else:
         return " Low confidence – image unclear"
+
+
+def ndjson_line(obj):
+    """Serialize one object as a newline-delimited JSON record"""
+    return json.dumps(to_native_types(obj)) + "\n"
+
+
+def _iso(value):
+    return value.isoformat()
+
+
+def encode_cursor(*values):
+    """Opaque pagination cursor for a keyset position (datetimes as ISO text)"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=_iso).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_before(key, id_column, cursor):
+    """
+    Filter for the page after `cursor` when rows are ordered by (key DESC,
+    id DESC) with NULL keys last (database.desc_nulls_last). A NULL never
+    compares in a row value, so those rows get their own branch.
+    Raises ValueError on a malformed cursor.
+    """
+    last_key, last_id = decode_cursor(cursor, 2)
+    if not isinstance(last_id, int) or not (last_key is None or isinstance(last_key, str)):
+        raise ValueError("Invalid cursor")
+    if last_key is None:
+        return and_(key.is_(None), id_column < last_id)
+    return or_(tuple_(key, id_column) < tuple_(last_key, last_id), key.is_(None))
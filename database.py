@@ -1,7 +1,21 @@
 """
 Database configuration and setup
+
+DATABASE_URL selects the backend (default: the local SQLite file). SQLite
+connections are tuned on connect (WAL journal, synchronous=NORMAL, busy
+timeout, page cache and mmap sizes, all configurable below) so readers and
+writers do not block each other; set SQLITE_PROFILE=default to get the
+untuned engine. Other backends get a plain engine with default pool
+settings.
+
+Backend-specific pieces: the usage counters upsert and hourly rollup
+(services/counters.py) support SQLite, PostgreSQL and MySQL; created_at
+cursors and date filters use datetime_key() and desc_nulls_last() below.
+Not portable: the migrate_*.py scripts (SQLite only) and the change feed,
+which relies on SQLite's single writer to commit seq values in order.
 """
-from sqlalchemy import create_engine
+from sqlalchemy import String, create_engine, event, type_coerce
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from pathlib import Path
@@ -11,12 +25,70 @@ BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "wardrobe.db"
 # Ensure path uses forward slashes for the sqlite URL on all platforms
 DB_URL_PATH = str(DB_PATH).replace("\\", "/")
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_URL_PATH}"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_URL_PATH}")
+
+# SQLite engine profile: "tuned" (pragmas below) or "default" (driver defaults)
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned")
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Connection pool (SQLite only). SQLite connections are cheap and there is one writer at a
+# time anyway, so the pool only needs to cover the request threads.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def sqlite_pragmas():
+    """PRAGMA statements run on every new SQLite connection of the tuned profile"""
+    return [
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+    ]
+
+
+def make_engine(url=SQLALCHEMY_DATABASE_URL, profile=None):
+    """Create the engine for `url`; `profile` overrides SQLITE_PROFILE"""
+    profile = profile or SQLITE_PROFILE
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return create_engine(url)
+
+    connect_args = {"check_same_thread": False}  # Needed for SQLite
+    if profile == "default":
+        return create_engine(url, connect_args=connect_args)
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+    kwargs = {}
+    if parsed.database and parsed.database != ":memory:":
+        # In-memory databases keep SQLAlchemy's single-connection pool
+        kwargs = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    new_engine = create_engine(
+        url,
+        connect_args={**connect_args, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        **kwargs
+    )
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(new_engine, "connect")
+    def _tune(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return new_engine
+
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -40,3 +112,22 @@ def init_db():
     """
     Base.metadata.create_all(bind=engine)
 
+
+def datetime_key(column):
+    """
+    Sort and compare key for a DateTime column in keyset cursors and date
+    filters. SQLite compares the stored text: rows written by the server
+    default and by the app use different formats, and a datetime read back
+    and re-bound would not compare equal to its own row. Other backends
+    compare the datetime itself.
+    """
+    if engine.dialect.name == "sqlite":
+        return type_coerce(column, String)
+    return column
+
+
+def desc_nulls_last(column):
+    """column DESC with NULLs last, as keyset_before expects (the SQLite and MySQL default)"""
+    if engine.dialect.name in ("sqlite", "mysql"):
+        return column.desc()
+    return column.desc().nulls_last()
@@ -0,0 +1,21 @@
+"""
+Migration: add the (created_at, id) index used to keyset-paginate
+/debug/verified-uploads.
+"""
+from sqlalchemy import text
+from database import engine
+
+
+def migrate():
+    with engine.connect() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_feedback_created_at_id ON feedback (created_at, id)"
+        ))
+        conn.commit()
+    print("[OK] Created/verified index ix_feedback_created_at_id")
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,37 @@
+"""
+Migration: add the perceptual hash columns used for duplicate detection
+(outfits.phash, predictions.phash) and let pending_features rows carry a hash
+without features. Existing images have no hash and are never matched as
+duplicates; pending_features rows are short-lived, so that table is recreated.
+"""
+from sqlalchemy import text
+from database import engine, Base
+import models  # noqa: F401 - registers all tables
+
+
+def migrate():
+    with engine.connect() as conn:
+        for table in ("outfits", "predictions"):
+            result = conn.execute(text(f"PRAGMA table_info({table})"))
+            columns = [row[1] for row in result.fetchall()]
+            if "phash" in columns:
+                print(f"[OK] {table}.phash already exists")
+            else:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN phash INTEGER"))
+                print(f"[OK] Added {table}.phash")
+
+        result = conn.execute(text("PRAGMA table_info(pending_features)"))
+        columns = [row[1] for row in result.fetchall()]
+        if columns and "phash" not in columns:
+            conn.execute(text("DROP TABLE pending_features"))
+            print("[OK] Dropped pending_features (recreated below)")
+        conn.commit()
+
+    Base.metadata.create_all(bind=engine)
+    print("[OK] Created/verified all tables (including pending_features)")
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,26 @@
+"""
+Migration: create the metric_counters table and backfill it from the
+existing predictions and users rows.
+"""
+from database import engine, Base, SessionLocal
+import models  # noqa: F401 - registers all tables
+from services.counters import rebuild_counters
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine)
+    print("[OK] Created/verified all tables (including metric_counters)")
+
+    db = SessionLocal()
+    try:
+        rows = rebuild_counters(db)
+        db.commit()
+        print(f"[OK] Backfilled {rows} counter rows")
+    finally:
+        db.close()
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,58 @@
+"""
+Migration: create the outfit_changes table (change feed for
+/wardrobe/changes) and seed it with one entry per existing outfit, so a
+client's first sync returns the whole wardrobe.
+
+Tables created before the feed was keyed per user (UNIQUE(outfit_id)) are
+rebuilt with their rows and seq values kept.
+"""
+from datetime import datetime
+
+from sqlalchemy import text
+from database import engine, Base
+import models  # noqa: F401 - registers all tables
+
+CHANGE_COLUMNS = "seq, outfit_id, user_id, deleted, changed_at"
+
+
+def _has_outfit_unique(conn):
+    """True if outfit_changes still has the old column-level UNIQUE(outfit_id)"""
+    for row in conn.execute(text("PRAGMA index_list(outfit_changes)")).fetchall():
+        if row[3] == "u":  # origin "u": created by a UNIQUE constraint
+            return True
+    return False
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine)
+    print("[OK] Created/verified all tables (including outfit_changes)")
+
+    with engine.connect() as conn:
+        if _has_outfit_unique(conn):
+            print("Rebuilding outfit_changes table...")
+            conn.execute(text("ALTER TABLE outfit_changes RENAME TO outfit_changes_old"))
+            conn.execute(text("DROP INDEX IF EXISTS ix_outfit_changes_user_seq"))
+            models.OutfitChange.__table__.create(bind=conn)
+            # Explicit seq values also carry the AUTOINCREMENT high-water mark over
+            conn.execute(text(
+                f"INSERT INTO outfit_changes ({CHANGE_COLUMNS}) SELECT {CHANGE_COLUMNS} FROM outfit_changes_old"
+            ))
+            conn.execute(text("DROP TABLE outfit_changes_old"))
+            print("[OK] outfit_changes is now keyed by (user_id, outfit_id)")
+
+        result = conn.execute(text("""
+            INSERT INTO outfit_changes (outfit_id, user_id, deleted, changed_at)
+            SELECT o.id, o.owner_id, 0, :now FROM outfits o
+            WHERE NOT EXISTS (
+                SELECT 1 FROM outfit_changes c WHERE c.user_id = o.owner_id AND c.outfit_id = o.id
+            )
+            ORDER BY o.id
+        """), {"now": datetime.utcnow()})
+        conn.commit()
+        print(f"[OK] Seeded {result.rowcount} outfit changes")
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,30 @@
+"""
+Migration: add outfits.features (float16 feature vector) and create the
+pending_features table. Existing outfits have no stored features and are
+skipped by similarity search until they are uploaded again.
+"""
+from sqlalchemy import text
+from database import engine, Base
+import models  # noqa: F401 - registers all tables
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine)
+    print("[OK] Created/verified all tables (including pending_features)")
+
+    with engine.connect() as conn:
+        result = conn.execute(text("PRAGMA table_info(outfits)"))
+        columns = [row[1] for row in result.fetchall()]
+
+        if "features" in columns:
+            print("[OK] outfits.features already exists")
+        else:
+            conn.execute(text("ALTER TABLE outfits ADD COLUMN features BLOB"))
+            print("[OK] Added outfits.features")
+        conn.commit()
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,30 @@
+"""
+Migration: add composite indexes matching the wardrobe query patterns
+(owner_id + category / occasion / last_worn_date, ordered by created_at).
+Indexes that already exist are left alone.
+"""
+from sqlalchemy import text
+from database import engine
+from models import Outfit
+
+
+def migrate():
+    with engine.connect() as conn:
+        existing = {row[1] for row in conn.execute(text("PRAGMA index_list(outfits)"))}
+
+        for index in Outfit.__table__.indexes:
+            if index.name in existing:
+                print(f"[OK] {index.name} already exists")
+                continue
+            index.create(bind=conn)
+            print(f"[OK] Created {index.name} ({', '.join(c.name for c in index.columns)})")
+
+        # Refresh planner statistics so the new indexes are picked up
+        conn.execute(text("ANALYZE outfits"))
+        conn.commit()
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,37 @@
+"""
+Migration: add saved location / wardrobe change columns to users
+and create the outfit_plans table.
+"""
+from sqlalchemy import text
+from database import engine, Base
+import models  # noqa: F401 - registers all tables
+
+NEW_USER_COLUMNS = {
+    "home_city": "VARCHAR",
+    "home_lat": "FLOAT",
+    "home_lon": "FLOAT",
+    "wardrobe_changed_at": "DATETIME",
+}
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine)
+    print("[OK] Created/verified all tables (including outfit_plans)")
+
+    with engine.connect() as conn:
+        result = conn.execute(text("PRAGMA table_info(users)"))
+        columns = [row[1] for row in result.fetchall()]
+
+        for name, col_type in NEW_USER_COLUMNS.items():
+            if name in columns:
+                print(f"[OK] users.{name} already exists")
+                continue
+            conn.execute(text(f"ALTER TABLE users ADD COLUMN {name} {col_type}"))
+            print(f"[OK] Added users.{name}")
+        conn.commit()
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,26 @@
+"""
+Migration: add users.token_version. Every password change bumps it and
+access tokens issued before the change stop validating. Existing users start
+at 0, which is also what tokens without a "ver" claim count as, so tokens
+issued before this migration keep working until the next password change.
+"""
+from sqlalchemy import text
+from database import engine
+
+
+def migrate():
+    with engine.connect() as conn:
+        result = conn.execute(text("PRAGMA table_info(users)"))
+        columns = [row[1] for row in result.fetchall()]
+        if "token_version" in columns:
+            print("[OK] users.token_version already exists")
+        else:
+            conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+            conn.commit()
+            print("[OK] Added users.token_version")
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,86 @@
+"""
+Migration: deferred upload support.
+- Creates the upload_jobs table
+- Adds image_status / upload_id to predictions and outfits
+- Makes outfits.image_url nullable (pending uploads have no URL yet)
+"""
+from sqlalchemy import text
+from sqlalchemy.schema import CreateTable
+from database import engine, Base
+import models  # noqa: F401 - registers all tables
+
+
+def _columns(conn, table):
+    return {row[1]: row for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()}
+
+
+def _rebuild_outfits(conn, columns):
+    """
+    Recreate outfits from the model and copy the rows over.
+
+    The new table is built as outfits_new and renamed into place: renaming
+    outfits itself would make SQLite rewrite every foreign key pointing at
+    it (predictions, wear_events, ...) to the renamed table.
+    """
+    # Keep every column the old table shares with the model, including
+    # ones added by other migrations (features, phash)
+    copy_cols = ",".join(c.name for c in models.Outfit.__table__.columns if c.name in columns)
+    ddl = str(CreateTable(models.Outfit.__table__).compile(conn))
+
+    # foreign_keys can only be changed outside a transaction; without this
+    # DROP TABLE outfits would delete through the foreign keys
+    foreign_keys = conn.execute(text("PRAGMA foreign_keys")).scalar()
+    conn.execute(text("PRAGMA foreign_keys=OFF"))
+    try:
+        violations_before = set(conn.execute(text("PRAGMA foreign_key_check")).fetchall())
+        conn.exec_driver_sql("BEGIN")
+        try:
+            conn.execute(text(ddl.replace("CREATE TABLE outfits ", "CREATE TABLE outfits_new ", 1)))
+            conn.execute(text(f"INSERT INTO outfits_new ({copy_cols}) SELECT {copy_cols} FROM outfits"))
+            conn.execute(text("DROP TABLE outfits"))
+            conn.execute(text("ALTER TABLE outfits_new RENAME TO outfits"))
+            # Every models.Outfit index, including the migrate_add_outfit_indexes.py ones
+            for index in models.Outfit.__table__.indexes:
+                index.create(bind=conn)
+
+            violations = set(conn.execute(text("PRAGMA foreign_key_check")).fetchall()) - violations_before
+            if violations:
+                raise RuntimeError(f"Rebuilding outfits broke foreign keys: {sorted(violations)[:10]}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.execute(text(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}"))
+        conn.commit()
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine)
+    print("[OK] Created/verified all tables (including upload_jobs)")
+
+    with engine.connect() as conn:
+        columns = _columns(conn, "predictions")
+        if "image_status" not in columns:
+            conn.execute(text("ALTER TABLE predictions ADD COLUMN image_status VARCHAR NOT NULL DEFAULT 'ready'"))
+            print("[OK] Added predictions.image_status")
+        if "upload_id" not in columns:
+            conn.execute(text("ALTER TABLE predictions ADD COLUMN upload_id INTEGER REFERENCES upload_jobs(id)"))
+            print("[OK] Added predictions.upload_id")
+        conn.commit()
+
+        columns = _columns(conn, "outfits")
+        image_url_not_null = columns["image_url"][3] == 1
+        if image_url_not_null or "image_status" not in columns:
+            # SQLite cannot drop NOT NULL in place: rebuild the table
+            print("Rebuilding outfits table...")
+            _rebuild_outfits(conn, columns)
+            print("[OK] outfits.image_url is now nullable; image_status/upload_id added")
+        else:
+            print("[OK] outfits table already up to date")
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,40 @@
+"""
+Migration: create the wear_events and outfit_wear_stats tables.
+
+Only the most recent wear of each outfit is known (outfits.last_worn_date),
+so each worn outfit is seeded with one event and a matching rollup.
+"""
+from datetime import date
+
+from database import engine, Base, SessionLocal
+from models import Outfit, OutfitWearStats
+from services.wear_log import record_wear, roll_forward
+
+
+def migrate():
+    Base.metadata.create_all(bind=engine)
+    print("[OK] Created/verified all tables (including wear_events, outfit_wear_stats)")
+
+    db = SessionLocal()
+    try:
+        seeded = 0
+        worn = db.query(Outfit).filter(Outfit.last_worn_date.isnot(None)).order_by(Outfit.last_worn_date)
+        for outfit in worn:
+            if db.get(OutfitWearStats, outfit.id) is not None:
+                continue
+            record_wear(db, outfit, outfit.last_worn_date)
+            db.flush()
+            seeded += 1
+        # Seeded rollups were rolled on their wear day; bring them to today
+        for (user_id,) in db.query(OutfitWearStats.user_id).distinct():
+            roll_forward(db, user_id, date.today())
+        db.commit()
+        print(f"[OK] Seeded wear history for {seeded} outfits")
+    finally:
+        db.close()
+
+    print("\nMigration complete!")
+
+
+if __name__ == "__main__":
+    migrate()
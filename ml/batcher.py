@@ -0,0 +1,120 @@
+"""
+Micro-batching inference engine.
+
+Concurrent prediction requests are queued and processed together: a worker
+collects requests for up to `max_wait_ms` (or until `max_batch_size` images
+are waiting), runs extract_features_batch and a single classifier matmul in
+a thread, and resolves every caller's future. When a request arrives alone it
+is dispatched immediately, so low-traffic latency is unchanged.
+"""
+import asyncio
+import os
+import time
+
+from ml.extract_features import extract_features_batch
+from ml.classifier import predict_outfit_types
+from cores.instrumentation import Histogram, stage
+
+BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "5"))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(WAIT_MS_BUCKETS)
+        self._queue = None
+        self._worker = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, image):
+        """Classify one PIL image; returns (label, confidence)"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+
+        # Let requests that arrived in the same tick join; a lone request
+        # goes out immediately instead of waiting for the window.
+        await asyncio.sleep(0)
+        if self._queue.empty():
+            return batch
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            dispatched = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for _, _, enqueued in batch:
+                self.wait_ms.observe((dispatched - enqueued) * 1000)
+
+            images = [image for image, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, _classify, images)
+            except Exception:
+                # Retry one by one so a single bad image only fails its own request
+                results = []
+                for image in images:
+                    try:
+                        results.append(await loop.run_in_executor(None, _classify, [image]))
+                    except Exception as e:
+                        results.append(e)
+                results = [r if isinstance(r, Exception) else r[0] for r in results]
+
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot()
+        }
+
+
+# Batches mix requests from several endpoints, so stages get their own label
+BATCHER_ENDPOINT = "inference_batcher"
+
+
+def _classify(images):
+    with stage("decode", endpoint=BATCHER_ENDPOINT):
+        for image in images:
+            image.load()
+    with stage("extract_features", endpoint=BATCHER_ENDPOINT):
+        features = extract_features_batch(images)
+    with stage("classifier", endpoint=BATCHER_ENDPOINT):
+        return predict_outfit_types(features)
+
+
+batcher = MicroBatcher()
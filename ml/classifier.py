@@ -70,13 +70,8 @@ def load_reference_prototypes():
 load_reference_prototypes()
 
 
-def predict_outfit_type(query_features):
-    if class_vectors.size == 0:
-        return "unknown", 0.0
-
-    similarities = cosine_similarity([query_features], class_vectors)[0]
+def _label_from_similarities(similarities):
     best_idx = int(np.argmax(similarities))
-    best_label = class_labels[best_idx]
     best_score = float(similarities[best_idx])
 
     top3_idx = similarities.argsort()[-3:][::-1]
@@ -86,6 +81,26 @@ def predict_outfit_type(query_features):
     return final_label, confidence
 
 
+def predict_outfit_type(query_features):
+    if class_vectors.size == 0:
+        return "unknown", 0.0
+
+    similarities = cosine_similarity([query_features], class_vectors)[0]
+    return _label_from_similarities(similarities)
+
+
+def predict_outfit_types(features_matrix):
+    """
+    Classify a batch of feature vectors with a single similarity matmul.
+    Returns a list of (label, confidence) tuples, one per row.
+    """
+    if class_vectors.size == 0:
+        return [("unknown", 0.0)] * len(features_matrix)
+
+    similarities = cosine_similarity(features_matrix, class_vectors)
+    return [_label_from_similarities(row) for row in similarities]
+
+
 def get_available_categories():
     """
     Get all available outfit categories for manual selection.
@@ -60,3 +60,63 @@ def extract_features(image: Image.Image):
     features.append(height / max(width, height))
     
     return np.array(features, dtype=np.float32)
+
+
+def extract_features_batch(images):
+    """
+    Vectorized version of extract_features for a list of PIL images.
+
+    Produces the same feature vectors as calling extract_features on each
+    image, as an (N, D) float32 matrix. Only the resize and grayscale
+    conversion run per image; histograms and statistics are computed for the
+    whole batch at once.
+    """
+    rgb = np.stack([np.asarray(img.convert("RGB").resize((224, 224))) for img in images])
+    gray = np.stack([np.asarray(Image.fromarray(arr).convert("L")) for arr in rgb])
+
+    n = rgb.shape[0]
+    pixels = rgb.reshape(n, -1, 3)
+    num_pixels = pixels.shape[1]
+    offsets = (np.arange(n) * 32)[:, None]
+
+    columns = []
+
+    # 1. Color Histogram Features (RGB channels), 32 bins of width 8
+    for channel in range(3):
+        idx = (pixels[:, :, channel] >> 3) + offsets
+        hist = np.bincount(idx.ravel(), minlength=n * 32).reshape(n, 32)
+        columns.append(hist / num_pixels)
+
+    # 2. Image Statistics (mean, std for each channel), same formula as ImageStat
+    sums = pixels.sum(axis=1, dtype=np.int64).astype(np.float64)
+    sums2 = (pixels.astype(np.int64) ** 2).sum(axis=1).astype(np.float64)
+    means = sums / num_pixels
+    variances = (sums2 - sums ** 2.0 / num_pixels) / num_pixels
+    columns.append(means)
+    columns.append(np.sqrt(variances))
+
+    # 3. Dominant Colors, 8 bins of width 32
+    offsets = (np.arange(n) * 8)[:, None]
+    for channel in range(3):
+        idx = (pixels[:, :, channel] >> 5) + offsets
+        hist = np.bincount(idx.ravel(), minlength=n * 8).reshape(n, 8)
+        columns.append(hist / num_pixels)
+
+    # 4. Texture Features (uint8 differences wrap around, as in extract_features)
+    h_gradient = np.diff(gray, axis=2).reshape(n, -1)
+    v_gradient = np.diff(gray, axis=1).reshape(n, -1)
+    columns.append(np.stack([
+        np.abs(h_gradient).mean(axis=1),
+        np.abs(v_gradient).mean(axis=1),
+        h_gradient.std(axis=1),
+        v_gradient.std(axis=1),
+    ], axis=1))
+
+    # 5. Brightness and Contrast
+    flat_gray = gray.reshape(n, -1)
+    columns.append(np.stack([flat_gray.mean(axis=1), flat_gray.std(axis=1)], axis=1))
+
+    # 6. Aspect ratio and size (always square after the resize)
+    columns.append(np.ones((n, 2)))
+
+    return np.concatenate(columns, axis=1).astype(np.float32)
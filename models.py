@@ -1,7 +1,7 @@
 """
 Database models for wardrobe system
 """
-from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, ForeignKey, Boolean, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -14,7 +14,15 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Bumped on every password change; tokens carry it as "ver"
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
+    # Saved location used for nightly outfit plans
+    home_city = Column(String, nullable=True)
+    home_lat = Column(Float, nullable=True)
+    home_lon = Column(Float, nullable=True)
+    # Bumped by every wardrobe mutation so cached plans can be rebuilt
+    wardrobe_changed_at = Column(DateTime, nullable=True)
 
     outfits = relationship("Outfit", back_populates="owner", cascade="all, delete-orphan")
     predictions = relationship("Prediction", back_populates="owner", cascade="all, delete-orphan")
@@ -24,6 +32,9 @@ class User(Base):
         return {
             "id": self.id,
             "email": self.email,
+            "home_city": self.home_city,
+            "home_lat": self.home_lat,
+            "home_lon": self.home_lon,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
@@ -32,14 +43,18 @@ class Outfit(Base):
     __tablename__ = "outfits"
 
     id = Column(Integer, primary_key=True, index=True)
-    image_url = Column(String, nullable=False)
+    image_url = Column(String, nullable=True)  # Null while a deferred upload is pending
     public_id = Column(String, nullable=True)  # Cloudinary public_id
+    image_status = Column(String, default="ready", server_default="ready", nullable=False)  # ready / pending / failed
+    upload_id = Column(Integer, ForeignKey("upload_jobs.id"), nullable=True)
     category = Column(String, nullable=False)  # e.g., "dress", "shirt", "jeans"
     color = Column(String, nullable=True)
     occasion = Column(String, nullable=True)  # e.g., "casual", "formal", "party"
     last_worn_date = Column(Date, nullable=True)
     confidence = Column(Float, nullable=True)  # ML prediction confidence
     notes = Column(String, nullable=True)
+    features = Column(LargeBinary, nullable=True)  # float16 feature vector (similarity search)
+    phash = Column(Integer, nullable=True)  # 64-bit dHash, signed (duplicate detection)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -47,12 +62,22 @@ class Outfit(Base):
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     owner = relationship("User", back_populates="outfits")
 
+    # Every wardrobe query filters on owner_id; these cover its filter/sort
+    # combinations (see migrate_add_outfit_indexes.py)
+    __table_args__ = (
+        Index("ix_outfits_owner_created", "owner_id", "created_at", "id"),
+        Index("ix_outfits_owner_category_created", "owner_id", "category", "created_at"),
+        Index("ix_outfits_owner_occasion_created", "owner_id", "occasion", "created_at"),
+        Index("ix_outfits_owner_last_worn", "owner_id", "last_worn_date"),
+    )
+
     def to_dict(self):
         """Convert outfit to dictionary"""
         return {
             "id": self.id,
             "image_url": self.image_url,
             "public_id": self.public_id,
+            "image_status": self.image_status,
             "category": self.category,
             "color": self.color,
             "occasion": self.occasion,
@@ -81,10 +106,13 @@ class Prediction(Base):
     # For guest predictions we do not store images
     image_url = Column(String, nullable=True)
     public_id = Column(String, nullable=True)
+    image_status = Column(String, default="ready", server_default="ready", nullable=False)  # ready / pending / failed
+    upload_id = Column(Integer, ForeignKey("upload_jobs.id"), nullable=True)
     
     predicted_category = Column(String, nullable=True)
     confidence = Column(Float, nullable=True)
     weather_data = Column(String, nullable=True) # JSON string (min/max/rain prob)
+    phash = Column(Integer, nullable=True)  # 64-bit dHash, signed (duplicate detection)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -96,6 +124,7 @@ class Prediction(Base):
             "id": self.id,
             "user_id": self.user_id,
             "image_url": self.image_url,
+            "image_status": self.image_status,
             "predicted_category": self.predicted_category,
             "confidence": self.confidence,
             "created_at": self.created_at.isoformat() if self.created_at else None
@@ -122,6 +151,150 @@ class Feedback(Base):
     
     prediction = relationship("Prediction", back_populates="feedback")
 
+    # Keyset pagination of /debug/verified-uploads
+    __table_args__ = (Index("ix_feedback_created_at_id", "created_at", "id"),)
+
+
+class WearEvent(Base):
+    """
+    Append-only log of outfit wears, one row per /wardrobe/wear-outfit call.
+    """
+    __tablename__ = "wear_events"
+
+    id = Column(Integer, primary_key=True, index=True)
+    outfit_id = Column(Integer, ForeignKey("outfits.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    worn_on = Column(Date, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (Index("ix_wear_events_user_worn_on", "user_id", "worn_on"),)
+
+
+class OutfitWearStats(Base):
+    """
+    Per-outfit wear rollups, maintained incrementally from wear_events.
+    worn_30d / worn_90d count wears with worn_on > rolled_on - N days; they
+    are rolled forward (expired wears subtracted) when the day changes.
+    """
+    __tablename__ = "outfit_wear_stats"
+
+    outfit_id = Column(Integer, ForeignKey("outfits.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    wear_count = Column(Integer, nullable=False, default=0)
+    worn_30d = Column(Integer, nullable=False, default=0)
+    worn_90d = Column(Integer, nullable=False, default=0)
+    first_worn_on = Column(Date, nullable=True)
+    last_worn_on = Column(Date, nullable=True)
+    rolled_on = Column(Date, nullable=False)
+
+    def to_dict(self):
+        return {
+            "outfit_id": self.outfit_id,
+            "wear_count": self.wear_count,
+            "worn_30d": self.worn_30d,
+            "worn_90d": self.worn_90d,
+            "first_worn_on": self.first_worn_on.isoformat() if self.first_worn_on else None,
+            "last_worn_on": self.last_worn_on.isoformat() if self.last_worn_on else None
+        }
+
+
+class PendingFeatures(Base):
+    """
+    Feature vector and perceptual hash computed by /wardrobe/upload-outfit,
+    kept until the image is saved with /wardrobe/save-outfit. key is
+    "upload:<upload_id>" or "url:<image_url>".
+    """
+    __tablename__ = "pending_features"
+
+    key = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    features = Column(LargeBinary, nullable=True)  # float16
+    phash = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+
+class UploadJob(Base):
+    """
+    Outbox entry for a deferred Cloudinary upload.
+    The image bytes wait in the local spool directory until the background
+    worker uploads them and backfills the linked Prediction/Outfit rows.
+    """
+    __tablename__ = "upload_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    folder = Column(String, nullable=False)  # Cloudinary folder
+    spool_path = Column(String, nullable=True)  # Removed once uploaded
+    status = Column(String, default="pending", nullable=False)  # pending / uploading / done / failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, nullable=True)
+    image_url = Column(String, nullable=True)
+    public_id = Column(String, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "image_url": self.image_url,
+            "public_id": self.public_id,
+            "last_error": self.last_error
+        }
+
+
+class OutfitPlan(Base):
+    """
+    Precomputed outfit suggestions for one user and one day.
+    Built by the nightly precompute_plans.py job, one row per user.
+    """
+    __tablename__ = "outfit_plans"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    plan_date = Column(Date, nullable=False)
+    built_at = Column(DateTime, nullable=False)
+    weather_data = Column(String, nullable=True) # JSON string (temp/min/max/rain prob)
+    plan = Column(String, nullable=False) # JSON string, [{"score", "item_ids"}, ...]
+
+
+class MetricCounter(Base):
+    """
+    Incrementally maintained usage counters behind /metrics.
+    bucket is "all" for all-time totals, "d:YYYY-MM-DD" for days and
+    "h:YYYY-MM-DDTHH" for hours; it leads the primary key so totals and
+    trend ranges are index lookups. Updated in the same transaction as the
+    rows they count (see services/counters.py).
+    """
+    __tablename__ = "metric_counters"
+
+    bucket = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class OutfitChange(Base):
+    """
+    Change feed behind /wardrobe/changes: the latest change of every outfit,
+    tombstones (deleted=True) included. Each change replaces the outfit's
+    previous row with a new seq, so a client only needs the rows with
+    seq > its cursor. AUTOINCREMENT keeps seq from ever being reused.
+    Rows are keyed per user: SQLite can hand a deleted outfit's id to
+    another user's new outfit, and that must not overwrite the tombstone.
+    """
+    __tablename__ = "outfit_changes"
+    __table_args__ = (
+        Index("ix_outfit_changes_user_seq", "user_id", "seq"),
+        Index("ux_outfit_changes_user_outfit", "user_id", "outfit_id", unique=True),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    outfit_id = Column(Integer, nullable=False)  # No FK: outlives the outfit
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime, nullable=False)
+
 
 class UserUpload(Base):
     """
@@ -0,0 +1,26 @@
+"""
+Nightly job: precompute tomorrow's outfit plans for every active user.
+
+Run from cron shortly before midnight, e.g.:
+    30 23 * * * cd /path/to/backend && python precompute_plans.py
+"""
+from database import SessionLocal, init_db
+from services.plans import precompute_plans
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        print("Precomputing outfit plans...")
+        summary = precompute_plans(db)
+        print(
+            f"[OK] Built {summary['users']} plans for {summary['plan_date']} "
+            f"using {summary['forecasts_fetched']} forecast lookups"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,18 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from datetime import timedelta
+from typing import Optional
 
 from database import get_db
 from models import User
+from services.counters import count_user
+from services.plans import discard_plan
 from auth import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
+    needs_rehash,
     create_access_token,
+    get_current_user,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 
@@ -33,6 +38,12 @@ class TokenResponse(BaseModel):
     token_type: str
 
 
+class LocationUpdate(BaseModel):
+    city: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register(
     user_data: UserRegister,
@@ -50,13 +61,14 @@ async def register(
         )
     
     # Create new user
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await hash_password_async(user_data.password)
     new_user = User(
         email=user_data.email,
         password=hashed_password
     )
     
     db.add(new_user)
+    count_user(db)
     db.commit()
     db.refresh(new_user)
     
@@ -77,17 +89,22 @@ async def login(
     # Find user by email
     user = db.query(User).filter(User.email == user_data.email).first()
     
-    if not user or not verify_password(user_data.password, user.password):
+    if not user or not await verify_password_async(user_data.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Upgrade the stored hash to the configured cost while we know the password
+    if needs_rehash(user.password):
+        user.password = await hash_password_async(user_data.password)
+        db.commit()
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email},
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version},
         expires_delta=access_token_expires
     )
     
@@ -96,3 +113,33 @@ async def login(
         "token_type": "bearer"
     }
 
+
+@router.put("/location")
+async def update_location(
+    location: LocationUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Save the user's home location, used for nightly outfit plans.
+    Today's stored plan is dropped; suggestions are computed live until the
+    next nightly run.
+    """
+    if not location.city and (location.lat is None or location.lon is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a city or both lat and lon"
+        )
+
+    current_user.home_city = location.city.strip() if location.city else None
+    current_user.home_lat = location.lat
+    current_user.home_lon = location.lon
+    # The stored plan was built for the old location's forecast
+    discard_plan(db, current_user.id)
+    db.commit()
+    db.refresh(current_user)
+
+    return {
+        "message": "Location updated successfully",
+        "user": current_user.to_dict()
+    }
@@ -1,31 +1,44 @@
 from fastapi import APIRouter, UploadFile, File, Form, Body, Depends, HTTPException
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from sqlalchemy.orm import Session
-from database import get_db
-from models import UserUpload, User, Prediction, Feedback
+from database import get_db, SessionLocal, datetime_key, desc_nulls_last
+from models import User, Prediction, Feedback
 from pydantic import BaseModel
-from typing import Optional
-from PIL import Image
+from typing import Optional, List
 import os
 import json
-from datetime import datetime
-import io
+from datetime import date, datetime, timedelta
+import asyncio
+from starlette.concurrency import run_in_threadpool
 
-from ml.extract_features import extract_features
-from ml.classifier import predict_outfit_type, get_available_categories
+from ml.classifier import get_available_categories
+from ml.batcher import batcher
 from services import weather as weather_svc
 from services import material as material_svc
 from services import alternatives as alt_svc
 from services import accessories as acc_svc
+from services import upload_outbox
+from services.metrics_buffer import guest_predictions
+from services import batch_predict
+from services.ingest import ingest_upload
+from services import counters
+from services import dedup
+from services import export
+from services.counters import count_predictions
 from rules.outfit_weather import outfit_weather_check, combine_verdicts
-from cores.utils import to_native_types, confidence_message
-from cloudinary_config import upload_image_to_cloudinary
-from auth import get_current_user
+from cores.utils import to_native_types, confidence_message, ndjson_line, encode_cursor, keyset_before
+from cores.instrumentation import registry, stage
+from cloudinary_config import upload_image_to_cloudinary, delete_image_from_cloudinary
+from auth import get_current_user, get_current_principal, Principal
 
 router = APIRouter()
 
 # Confidence threshold - if below this, ask user to confirm
 CONFIDENCE_THRESHOLD = 0.6
 
+# Shared deadline for the upload / inference / weather branches of /predict/auth
+PREDICT_AUTH_TIMEOUT = float(os.getenv("PREDICT_AUTH_TIMEOUT", "20"))
+
 @router.post("/predict/guest")
 async def predict_guest(
     file: UploadFile = File(...), 
@@ -44,20 +57,16 @@ async def predict_guest(
     - No database storage.
     - Returns prediction and weather advice.
     """
-    # 1. Read bytes
-    try:
-        image_bytes = await file.read()
-    except Exception as e:
-        print(f"Error reading upload file: {e}")
-        raise HTTPException(status_code=400, detail=f"Invalid file upload: {str(e)}")
+    # 1. Ingest (size, format and dimensions are checked before decoding)
+    upload = await ingest_upload(file)
     
     # 2. Predict (In-memory)
     try:
-        image = Image.open(io.BytesIO(image_bytes))
-        features = extract_features(image)
+        image = upload.decode()
+        # Batched with other concurrent guest requests (see ml/batcher.py)
         # Use manual type if provided and valid? For now we just predict.
         # Could use manual type to override or hint.
-        outfit, confidence = predict_outfit_type(features)
+        outfit, confidence = await batcher.submit(image)
         
         if manual_outfit_type and manual_outfit_type.strip():
             # Check if manual matches predicted or override? 
@@ -119,45 +128,190 @@ async def predict_guest(
         print(f"Error fetching accessories: {e}")
         response["accessories"] = []
 
-    # 4. Record prediction for metrics (guest or auth)
-    try:
-        from database import SessionLocal
-        from sqlalchemy import text
-        from datetime import datetime
-        # create a lightweight DB session to record the prediction
-        db = SessionLocal()
-        weather_snapshot = None
-        if response.get("weather"):
-            wd = response["weather"]
-            weather_snapshot = json.dumps({
-                "min_temp": wd.get("min_temp"),
-                "max_temp": wd.get("max_temp"),
-                "rain_prob": wd.get("rain_prob")
-            })
-
-        # Use raw SQL to insert guest prediction (bypasses NOT NULL constraints on user_id)
-        now_utc = datetime.utcnow().isoformat()
-        sql = text("""
-        INSERT INTO predictions (user_id, is_guest, image_url, public_id, predicted_category, confidence, weather_data, created_at)
-        VALUES (NULL, 1, NULL, NULL, :outfit, :confidence, :weather_data, :created_at)
-        """)
-        db.execute(sql, {
-            "outfit": outfit,
-            "confidence": float(confidence),
-            "weather_data": weather_snapshot,
-            "created_at": now_utc
+    # 4. Record prediction for metrics (written in bulk by the write-behind buffer)
+    weather_snapshot = None
+    if response.get("weather"):
+        wd = response["weather"]
+        weather_snapshot = json.dumps({
+            "min_temp": wd.get("min_temp"),
+            "max_temp": wd.get("max_temp"),
+            "rain_prob": wd.get("rain_prob")
         })
-        db.commit()
-        print(f"✓ Guest prediction recorded (outfit={outfit}, confidence={confidence})")
-        db.close()
-    except Exception as e:
-        print(f"✗ Failed to record guest prediction for metrics: {e}")
-        import traceback
-        traceback.print_exc()
+    guest_predictions.add({
+        "outfit": outfit,
+        "confidence": float(confidence),
+        "weather_data": weather_snapshot,
+        "created_at": datetime.utcnow().isoformat()
+    })
 
     return to_native_types(response)
 
 
+async def _predict_upload(upload):
+    return await batcher.submit(upload.decode())
+
+
+async def _store_upload(upload, store, **kwargs):
+    """Run store(bytes-or-path, ...) in a thread; holding `upload` keeps its temp file alive"""
+    return await run_in_threadpool(store, upload.source(), **kwargs)
+
+
+async def _delete_upload(public_id):
+    try:
+        await run_in_threadpool(delete_image_from_cloudinary, public_id)
+        print(f"Deleted orphaned upload {public_id}")
+    except Exception as e:
+        print(f"Failed to delete orphaned upload {public_id}: {e}")
+
+
+# Deletions scheduled from done callbacks; the event loop only keeps weak
+# references to tasks, so they are held here until they finish
+_cleanup_tasks = set()
+
+
+def _discard_upload(upload_task):
+    """Delete the Cloudinary asset of an abandoned upload, now or once it finishes"""
+    def _cleanup(task):
+        if task.cancelled() or task.exception() is not None:
+            return
+        delete_task = asyncio.ensure_future(_delete_upload(task.result()["public_id"]))
+        _cleanup_tasks.add(delete_task)
+        delete_task.add_done_callback(_cleanup_tasks.discard)
+
+    if upload_task.done():
+        _cleanup(upload_task)
+    else:
+        upload_task.add_done_callback(_cleanup)
+
+
+def _discard_spool(spool_task):
+    """Remove the spooled file of an abandoned deferred upload"""
+    def _cleanup(task):
+        if task.cancelled() or task.exception() is not None:
+            return
+        if os.path.exists(task.result()):
+            os.remove(task.result())
+
+    if spool_task.done():
+        _cleanup(spool_task)
+    else:
+        spool_task.add_done_callback(_cleanup)
+
+
+def _start_image_upload(upload):
+    """Start the upload (or outbox spool) branch; returns (deferred, task)"""
+    deferred = upload_outbox.DEFERRED_UPLOADS
+    if deferred:
+        task = asyncio.ensure_future(_store_upload(upload, upload_outbox.spool_image))
+    else:
+        task = asyncio.ensure_future(
+            _store_upload(upload, upload_image_to_cloudinary, folder="outfit_predictions")
+        )
+    return deferred, task
+
+
+def _abandon_image_upload(deferred, upload_task):
+    if upload_task is None:
+        return
+    if deferred:
+        _discard_spool(upload_task)
+    else:
+        _discard_upload(upload_task)
+
+
+async def _wait_for_branches(deferred, upload_task, branches, timeout):
+    """
+    Wait for the concurrent branches of an authenticated prediction.
+
+    `branches` maps each task to the error detail used if it fails ("{}" is
+    replaced by the exception). On a failure or timeout the other branches
+    are cancelled, the upload is abandoned and an HTTPException is raised.
+    """
+    done, pending = await asyncio.wait(
+        branches, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION
+    )
+    failed = [t for t in done if t.exception() is not None]
+    if not pending and not failed:
+        return
+
+    # The upload thread cannot be interrupted, so it is left to finish
+    # and its asset is deleted once it completes.
+    for task in pending:
+        if task is not upload_task:
+            task.cancel()
+    _abandon_image_upload(deferred, upload_task)
+    if not failed:
+        raise HTTPException(status_code=504, detail="Prediction timed out")
+    task = failed[0]
+    print(f"Error in /predict/auth branch: {task.exception()}")
+    raise HTTPException(status_code=500, detail=branches[task].format(str(task.exception())))
+
+
+def _weather_verdict(outfit, temp, rain_vol, details):
+    return outfit_weather_check(
+        outfit, 
+        temp, 
+        rain_vol, 
+        min_temp=details.get("min_temp"), 
+        max_temp=details.get("max_temp"), 
+        rain_prob=details.get("daily_rain_prob")
+    )
+
+
+def _save_auth_prediction(db, user_id, deferred, upload_task, outfit, confidence, city, temp, details,
+                          phash=None, duplicate=None):
+    """
+    Insert the Prediction row for an authenticated request.
+    If it fails the upload is abandoned (asset or spool file removed).
+    A `duplicate` (see services.dedup) supplies the image instead of an upload.
+    """
+    weather_snapshot = json.dumps({
+        "city": city,
+        "temp": temp,
+        "description": details.get("description"),
+        "min": details.get("min_temp"),
+        "max": details.get("max_temp")
+    })
+
+    try:
+        upload_id = None
+        if duplicate is not None:
+            image_url, public_id = duplicate.image_url, duplicate.public_id
+            upload_id = None if image_url else duplicate.upload_id
+            image_status = "ready" if image_url else "pending"
+        elif deferred:
+            job = upload_outbox.create_job(db, user_id, upload_task.result(), folder="outfit_predictions")
+            upload_id, image_url, public_id, image_status = job.id, None, None, "pending"
+        else:
+            upload_result = upload_task.result()
+            image_url, public_id, image_status = upload_result["secure_url"], upload_result["public_id"], "ready"
+
+        new_prediction = Prediction(
+            user_id=user_id,
+            is_guest=False,
+            image_url=image_url,
+            public_id=public_id,
+            image_status=image_status,
+            upload_id=upload_id,
+            predicted_category=outfit,
+            confidence=confidence,
+            weather_data=weather_snapshot,
+            phash=phash
+        )
+        with stage("sqlite_insert"):
+            db.add(new_prediction)
+            count_predictions(db, [(False, outfit, None)])
+            db.commit()
+        db.refresh(new_prediction)
+    except Exception:
+        db.rollback()
+        _abandon_image_upload(deferred, upload_task)
+        raise
+    if deferred and upload_task is not None:
+        upload_outbox.outbox.notify()
+    return new_prediction
+
+
 @router.post("/predict/auth")
 async def predict_auth(
     file: UploadFile = File(...), 
@@ -175,67 +329,57 @@ async def predict_auth(
     - Uploads to Cloudinary.
     - Saves to 'predictions' table.
     - Returns prediction_id for potential feedback/wardrobe saving.
+    Upload, inference and weather run concurrently under one deadline;
+    if any of them fails the uploaded image is deleted again.
+    With deferred uploads the image is spooled to the upload outbox instead
+    and the prediction is returned with image_status "pending".
+    A near-duplicate of one of the user's earlier images skips the upload and
+    inference and reuses that image and prediction (see "duplicate_of").
     """
     # 1. Read bytes
-    image_bytes = await file.read()
+    upload = await ingest_upload(file)
+    phash = await run_in_threadpool(dedup.image_hash, upload) if dedup.DEDUP_UPLOADS else None
+    duplicate = dedup.find_duplicate(db, current_user, phash)
     
-    # 2. Upload to Cloudinary
-    try:
-        upload_result = upload_image_to_cloudinary(image_bytes, folder="outfit_predictions")
-        image_url = upload_result["secure_url"]
-        public_id = upload_result["public_id"]
-    except Exception as e:
-        print(f"Cloudinary upload failed: {e}")
-        raise HTTPException(status_code=500, detail="Image upload failed")
+    # 2. Upload (or spool), predict and fetch weather concurrently
+    weather_task = asyncio.ensure_future(
+        run_in_threadpool(weather_svc.get_weather, city=city, lat=lat, lon=lon)
+    )
+    branches = {weather_task: "Weather lookup failed"}
+    deferred, upload_task, predict_task = False, None, None
+    if duplicate is None:
+        deferred, upload_task = _start_image_upload(upload)
+        predict_task = asyncio.ensure_future(_predict_upload(upload))
+        branches[upload_task] = "Image upload failed"
+        branches[predict_task] = "Prediction failed: {}"
+    await _wait_for_branches(deferred, upload_task, branches, PREDICT_AUTH_TIMEOUT)
 
-    # 3. Predict
-    image = Image.open(io.BytesIO(image_bytes))
-    features = extract_features(image)
-    outfit, confidence = predict_outfit_type(features)
-    
-    # 4. Get Weather
-    temp, rain_vol, details = weather_svc.get_weather(city=city, lat=lat, lon=lon)
-    
-    # 5. Save Prediction
-    weather_snapshot = json.dumps({
-        "city": city,
-        "temp": temp,
-        "description": details.get("description"),
-        "min": details.get("min_temp"),
-        "max": details.get("max_temp")
-    })
+    if duplicate is None:
+        outfit, confidence = predict_task.result()
+    else:
+        outfit, confidence = duplicate.category, duplicate.confidence or 0.0
+    temp, rain_vol, details = weather_task.result()
     
-    new_prediction = Prediction(
-        user_id=current_user.id,
-        is_guest=False,
-        image_url=image_url,
-        public_id=public_id,
-        predicted_category=outfit,
-        confidence=confidence,
-        weather_data=weather_snapshot
+    # 3. Save Prediction
+    new_prediction = _save_auth_prediction(
+        db, current_user.id, deferred, upload_task, outfit, confidence, city, temp, details,
+        phash=phash, duplicate=duplicate
     )
-    db.add(new_prediction)
-    db.commit()
-    db.refresh(new_prediction)
 
-    # 6. Run Rules (for response only)
-    outfit_verdict = outfit_weather_check(
-        outfit, 
-        temp, 
-        rain_vol, 
-        min_temp=details.get("min_temp"), 
-        max_temp=details.get("max_temp"), 
-        rain_prob=details.get("daily_rain_prob")
-    )
+    # 4. Run Rules (for response only)
+    outfit_verdict = _weather_verdict(outfit, temp, rain_vol, details)
     
-    # 7. Alternatives & Accessories
+    # 5. Alternatives & Accessories
     accessories = acc_svc.get_all_accessories(outfit, temp, rain_vol)
     
     return to_native_types({
         "prediction_id": new_prediction.id,
         "predicted_class": outfit,
         "confidence": confidence,
-        "image_url": image_url,
+        "image_url": new_prediction.image_url,
+        "image_status": new_prediction.image_status,
+        "upload_id": new_prediction.upload_id,
+        "duplicate_of": {"type": duplicate.kind, "id": duplicate.id} if duplicate else None,
         "weather_verdict": outfit_verdict,
         "accessories": accessories,
         "weather_summary": details
@@ -243,29 +387,294 @@ async def predict_auth(
 
 
 
+@router.post("/predict/guest/stream")
+async def predict_guest_stream(
+    file: UploadFile = File(...), 
+    city: Optional[str] = Form(None),
+    lat: Optional[float] = Form(None),
+    lon: Optional[float] = Form(None),
+    occasion: str = Form("Casual"),
+    match_weather: bool = Form(True)
+):
+    """
+    Streaming Guest Mode (NDJSON, one event per line):
+    - "classification" as soon as the model is done,
+    - then "weather", "accessories" and "alternatives" once the forecast
+      arrives, and finally "done".
+    """
+    upload = await ingest_upload(file)
+
+    # Weather is fetched once, while the image is being classified
+    weather_task = asyncio.ensure_future(
+        run_in_threadpool(weather_svc.get_weather, city=city, lat=lat, lon=lon)
+    )
+    try:
+        outfit, confidence = await _predict_upload(upload)
+    except Exception as e:
+        weather_task.cancel()
+        print(f"Error in ML prediction: {e}")
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
+
+    async def stream():
+        yield ndjson_line({
+            "event": "classification",
+            "predicted_class": outfit,
+            "confidence": confidence,
+            "confidence_message": confidence_message(confidence),
+            "is_guest": True,
+            "occasion": occasion
+        })
+
+        weather_snapshot = None
+        try:
+            temp, rain_vol, details = await weather_task
+        except Exception as e:
+            print(f"Error in weather service: {e}")
+            yield ndjson_line({"event": "weather_error", "detail": str(e)})
+        else:
+            if match_weather:
+                yield ndjson_line({
+                    "event": "weather",
+                    "weather": {
+                        "city": city,
+                        "temperature": temp,
+                        "min_temp": details.get("min_temp"),
+                        "max_temp": details.get("max_temp"),
+                        "rain_prob": details.get("daily_rain_prob"),
+                        "description": details.get("description"),
+                        "verdict": _weather_verdict(outfit, temp, rain_vol, details)
+                    }
+                })
+                weather_snapshot = json.dumps({
+                    "min_temp": details.get("min_temp"),
+                    "max_temp": details.get("max_temp"),
+                    "rain_prob": details.get("daily_rain_prob")
+                })
+            yield ndjson_line({
+                "event": "accessories",
+                "accessories": acc_svc.get_all_accessories(outfit, temp, rain_vol)
+            })
+            yield ndjson_line({
+                "event": "alternatives",
+                "alternatives": alt_svc.get_better_alternatives(outfit, temp)
+            })
+
+        guest_predictions.add({
+            "outfit": outfit,
+            "confidence": float(confidence),
+            "weather_data": weather_snapshot,
+            "created_at": datetime.utcnow().isoformat()
+        })
+        yield ndjson_line({"event": "done"})
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/predict/auth/stream")
+async def predict_auth_stream(
+    file: UploadFile = File(...), 
+    city: Optional[str] = Form(None),
+    lat: Optional[float] = Form(None),
+    lon: Optional[float] = Form(None),
+    occasion: str = Form("Casual"),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Streaming Authenticated Mode (NDJSON, one event per line):
+    - "classification" as soon as the model is done,
+    - "prediction" (prediction_id, image status) once the upload and the
+      weather lookup finish and the row is saved,
+    - then "weather", "accessories", "alternatives" and "done".
+    A failure after the first event is reported as an "error" event.
+    """
+    upload = await ingest_upload(file)
+    user_id = current_user.id
+    deadline = asyncio.get_running_loop().time() + PREDICT_AUTH_TIMEOUT
+
+    deferred, upload_task = _start_image_upload(upload)
+    predict_task = asyncio.ensure_future(_predict_upload(upload))
+    weather_task = asyncio.ensure_future(
+        run_in_threadpool(weather_svc.get_weather, city=city, lat=lat, lon=lon)
+    )
+    # Wait for the classification only; the other branches keep running
+    done, _ = await asyncio.wait([predict_task], timeout=PREDICT_AUTH_TIMEOUT)
+    if not done or predict_task.exception() is not None:
+        await _wait_for_branches(deferred, upload_task, {
+            predict_task: "Prediction failed: {}",
+            weather_task: "Weather lookup failed"
+        }, 0)
+    outfit, confidence = predict_task.result()
+
+    async def stream():
+        # True once the prediction row owns the image or it has been abandoned.
+        # A client disconnect closes the generator at a yield or await; if that
+        # happens before, the image is abandoned in the finally below.
+        settled = False
+        try:
+            yield ndjson_line({
+                "event": "classification",
+                "predicted_class": outfit,
+                "confidence": confidence,
+                "confidence_message": confidence_message(confidence)
+            })
+
+            db = SessionLocal()
+            try:
+                await _wait_for_branches(deferred, upload_task, {
+                    upload_task: "Image upload failed",
+                    weather_task: "Weather lookup failed"
+                }, max(deadline - asyncio.get_running_loop().time(), 0))
+                temp, rain_vol, details = weather_task.result()
+                new_prediction = _save_auth_prediction(
+                    db, user_id, deferred, upload_task, outfit, confidence, city, temp, details
+                )
+            except HTTPException as e:
+                settled = True  # Abandoned by _wait_for_branches
+                yield ndjson_line({"event": "error", "status_code": e.status_code, "detail": e.detail})
+                return
+            except Exception as e:
+                settled = True  # Abandoned by _save_auth_prediction
+                print(f"Error saving prediction: {e}")
+                yield ndjson_line({"event": "error", "status_code": 500, "detail": "Could not save prediction"})
+                return
+            finally:
+                db.close()
+            settled = True
+
+            yield ndjson_line({
+                "event": "prediction",
+                "prediction_id": new_prediction.id,
+                "image_url": new_prediction.image_url,
+                "image_status": new_prediction.image_status,
+                "upload_id": new_prediction.upload_id
+            })
+            yield ndjson_line({
+                "event": "weather",
+                "weather_verdict": _weather_verdict(outfit, temp, rain_vol, details),
+                "weather_summary": details
+            })
+            yield ndjson_line({
+                "event": "accessories",
+                "accessories": acc_svc.get_all_accessories(outfit, temp, rain_vol)
+            })
+            yield ndjson_line({
+                "event": "alternatives",
+                "alternatives": alt_svc.get_better_alternatives(outfit, temp)
+            })
+            yield ndjson_line({"event": "done"})
+        finally:
+            if not settled:
+                weather_task.cancel()
+                _abandon_image_upload(deferred, upload_task)
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/predict/batch")
+async def predict_batch(
+    files: List[UploadFile] = File(...),
+    upload: bool = Form(False),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Batch Mode (wardrobe onboarding):
+    - Accepts many images and/or zip archives of images.
+    - Classifies them in chunks (one vectorized extraction + matmul per chunk).
+    - Streams one NDJSON line per image ("status": "ok" or "error") as each
+      chunk completes, then a final {"done": true} summary line.
+    - upload=true also queues each image for upload and returns its upload_id.
+    """
+    user_id = current_user.id
+
+    async def stream():
+        entries = batch_predict.iter_entries(files)
+        count, errors = 0, 0
+        while count < batch_predict.MAX_ITEMS:
+            chunk_size = min(batch_predict.CHUNK_SIZE, batch_predict.MAX_ITEMS - count)
+            results = await run_in_threadpool(
+                batch_predict.process_chunk, entries, count, user_id, upload, chunk_size
+            )
+            if not results:
+                break
+            if upload:
+                upload_outbox.outbox.notify()
+            for result in results:
+                errors += "error" in result
+                yield ndjson_line(result)
+            count += len(results)
+
+        truncated = next(entries, None) is not None
+        yield ndjson_line({"done": True, "count": count, "errors": errors, "truncated": truncated})
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("/metrics")
 def get_metrics(db: Session = Depends(get_db)):
     """
-    Return simple usage metrics:
-    - total_users: distinct users count
-    - total_predictions: total rows in predictions table
+    Return simple usage metrics (read from incrementally maintained counters):
+    - total_users: registered users
+    - total_predictions: total predictions recorded
+    - predictions_by_mode: guest / auth split
+    - predictions_by_category: counts per predicted category
+    - guest_write_buffer: queued / flushed / dropped guest prediction rows
     """
     try:
-        from sqlalchemy import func
-        total_predictions = db.query(func.count(Prediction.id)).scalar() or 0
-        total_users = db.query(func.count(func.distinct(User.id))).scalar() or 0
+        summary = counters.get_summary(db)
         return to_native_types({
-            "total_users": int(total_users),
-            "total_predictions": int(total_predictions)
+            "total_users": summary["users"],
+            "total_predictions": summary["predictions"],
+            "predictions_by_mode": {"guest": summary["guest"], "auth": summary["auth"]},
+            "predictions_by_category": summary["by_category"],
+            "guest_write_buffer": guest_predictions.stats()
         })
     except Exception as e:
         print(f"Error computing metrics: {e}")
         return to_native_types({
             "total_users": 0,
-            "total_predictions": 0
+            "total_predictions": 0,
+            "guest_write_buffer": guest_predictions.stats()
         })
 
 
+@router.get("/metrics/trends")
+def get_metric_trends(
+    period: str = "day",
+    points: int = 7,
+    db: Session = Depends(get_db)
+):
+    """
+    Predictions and registrations per hour or day, oldest first.
+    - period: "day" or "hour"
+    - points: number of buckets (1-168)
+    """
+    if period not in counters.PERIOD_FORMATS:
+        raise HTTPException(status_code=400, detail="period must be 'day' or 'hour'")
+    if not 1 <= points <= 168:
+        raise HTTPException(status_code=400, detail="points must be between 1 and 168")
+    return {
+        "period": period,
+        "buckets": counters.get_trend(db, period=period, points=points)
+    }
+
+
+@router.get("/metrics/prometheus")
+def get_prometheus_metrics():
+    """
+    Request and per-stage latency histograms / counters in the Prometheus
+    text exposition format.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/inference")
+def get_inference_metrics():
+    """
+    Micro-batcher histograms: batch sizes and queue wait time (ms).
+    """
+    return to_native_types(batcher.stats())
+
+
 class FeedbackRequest(BaseModel):
     prediction_id: Optional[int] = None
     user_label: Optional[str] = None
@@ -277,7 +686,7 @@ class FeedbackRequest(BaseModel):
 @router.post("/feedback")
 async def submit_feedback(
     feedback_data: FeedbackRequest, 
-    current_user: Optional[User] = Depends(get_current_user), # Optional Auth
+    current_user: Optional[Principal] = Depends(get_current_principal), # Optional Auth
     db: Session = Depends(get_db)
 ):
     """
@@ -320,28 +729,119 @@ async def submit_feedback(
     return {"status": "success", "message": "Feedback received"}
 
 
+@router.get("/predictions/export")
+async def export_predictions(
+    format: str = "ndjson",
+    gzip: bool = False,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Download the user's prediction history (with any feedback given) as
+    NDJSON or CSV (format=ndjson|csv), optionally gzipped. Rows are
+    streamed, oldest first.
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    media_type, headers = export.response_headers("predictions", format, gzip)
+    return StreamingResponse(
+        export.stream(export.predictions_query(current_user.id), format, gzip),
+        media_type=media_type, headers=headers
+    )
+
+
+@router.get("/debug/export/feedback")
+async def export_feedback(
+    format: str = "ndjson",
+    gzip: bool = False,
+    since: Optional[date] = None,
+    until: Optional[date] = None
+):
+    """
+    Debug/analytics: stream all feedback with the rated prediction as NDJSON
+    or CSV, optionally gzipped and limited to an inclusive date range.
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    media_type, headers = export.response_headers("feedback", format, gzip)
+    return StreamingResponse(
+        export.stream(export.feedback_query(since, until), format, gzip),
+        media_type=media_type, headers=headers
+    )
+
+
 @router.get("/debug/verified-uploads")
-async def get_verified_uploads(db: Session = Depends(get_db)):
+async def get_verified_uploads(
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    helpful: Optional[bool] = None,
+    has_label: Optional[bool] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Debug: View qualitative feedback.
+    Debug: View qualitative feedback, newest first.
+    - cursor: next_cursor of the previous page
+    - limit: page size (1-500)
+    - helpful / has_label: optional filters
+    - since / until: inclusive created_at date range
+    One joined query per page, keyset-paginated on (created_at, id).
     """
-    feedbacks = db.query(Feedback).all()
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+
+    # See database.datetime_key: cursor positions round-trip exactly
+    created_key = datetime_key(Feedback.created_at)
+    query = (
+        db.query(
+            Feedback.id,
+            Feedback.user_label,
+            Feedback.is_helpful,
+            Feedback.created_at,
+            created_key.label("created_key"),
+            Prediction.id.label("prediction_id"),
+            Prediction.image_url,
+            Prediction.predicted_category
+        )
+        .outerjoin(Prediction, Feedback.prediction_id == Prediction.id)
+    )
+    if helpful is not None:
+        query = query.filter(Feedback.is_helpful == (1 if helpful else 0))
+    if has_label is not None:
+        labelled = (Feedback.user_label.isnot(None)) & (Feedback.user_label != "")
+        query = query.filter(labelled if has_label else ~labelled)
+    if since is not None:
+        query = query.filter(created_key >= since.isoformat())
+    if until is not None:
+        query = query.filter(created_key < (until + timedelta(days=1)).isoformat())
+    if cursor:
+        try:
+            query = query.filter(keyset_before(created_key, Feedback.id, cursor))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    rows = query.order_by(desc_nulls_last(created_key), Feedback.id.desc()).limit(limit + 1).all()
+
     results = []
-    
-    for f in feedbacks:
+    for row in rows[:limit]:
         item = {
-            "id": f.id,
-            "user_label": f.user_label,
-            "is_helpful": bool(f.is_helpful),
-            "created_at": f.created_at
+            "id": row.id,
+            "user_label": row.user_label,
+            "is_helpful": bool(row.is_helpful),
+            "created_at": row.created_at
         }
         
-        if f.prediction:
-            item["image_url"] = f.prediction.image_url
-            item["predicted"] = f.prediction.predicted_category
+        if row.prediction_id is not None:
+            item["image_url"] = row.image_url
+            item["predicted"] = row.predicted_category
         else:
             item["context"] = "Guest Feedback (No Image)"
             
         results.append(item)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last.created_key, last.id)
             
-    return results
+    return {"items": results, "next_cursor": next_cursor}
@@ -1,18 +1,35 @@
 """
 Wardrobe management routes
 """
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 from datetime import date, timedelta
 from pydantic import BaseModel
 
 from database import get_db, init_db
-from models import Outfit, User
-from auth import get_current_user
+from models import Outfit, User, UploadJob
+from auth import get_current_user, get_current_principal, Principal
 from cloudinary_config import upload_image_to_cloudinary
 from ml.extract_features import extract_features
 from ml.classifier import predict_outfit_type
+from services import weather as weather_svc
+from services.outfit_combos import generate_combinations
+from services.plans import get_plan, serialize_combination
+from services.wardrobe_state import mark_wardrobe_changed
+from services import wardrobe_stats as wardrobe_stats_svc
+from services.wardrobe_listing import list_outfits, DEFAULT_LIMIT
+from services import wear_log
+from services import change_feed
+from services import export
+from services import similarity
+from services import dedup
+from services import upload_outbox
+from services import bulk_import
+from services.ingest import ingest_upload
+from cores.instrumentation import stage
+from starlette.concurrency import run_in_threadpool
 from PIL import Image
 import io
 
@@ -23,7 +40,8 @@ init_db()
 
 
 class OutfitCreate(BaseModel):
-    image_url: str
+    image_url: Optional[str] = None
+    upload_id: Optional[int] = None  # From /upload-outfit when the upload is deferred
     category: str
     color: Optional[str] = None
     occasion: Optional[str] = None
@@ -47,15 +65,79 @@ async def upload_outfit(
     """
     Upload outfit image to Cloudinary and optionally run ML prediction.
     Returns image URL and prediction.
+    With deferred uploads the image is queued instead: the response carries
+    an upload_id (pass it to /save-outfit) and image_status "pending".
     """
-    # Read image bytes
-    image_bytes = await file.read()
+    # Ingest (size, format and dimensions are checked before decoding)
+    upload = await ingest_upload(file)
+
+    # Re-upload of a photo the user already has: reuse its image and prediction
+    phash = await run_in_threadpool(dedup.image_hash, upload) if dedup.DEDUP_UPLOADS else None
+    duplicate = dedup.find_duplicate(db, current_user, phash)
+    if duplicate is not None:
+        upload_id = None if duplicate.image_url else duplicate.upload_id
+        key = similarity.pending_key(upload_id=upload_id, image_url=duplicate.image_url)
+        similarity.remember_upload_features(db, current_user.id, key, duplicate.features, phash)
+        db.commit()
+        return {
+            "image_url": duplicate.image_url,
+            "public_id": duplicate.public_id,
+            "upload_id": upload_id,
+            "image_status": "ready" if duplicate.image_url else "pending",
+            "predicted_category": duplicate.category or "unknown",
+            "confidence": duplicate.confidence or 0.0,
+            "duplicate_of": {"type": duplicate.kind, "id": duplicate.id},
+            "message": "Image already uploaded"
+        }
+    
+    if upload_outbox.DEFERRED_UPLOADS:
+        # Spool locally; the outbox worker uploads in the background
+        spool_path = await run_in_threadpool(upload_outbox.spool_image, upload.source())
+        job = upload_outbox.create_job(db, current_user.id, spool_path)
+        db.commit()
+        upload_outbox.outbox.notify()
+        upload_id, image_url, public_id, image_status = job.id, None, None, "pending"
+    else:
+        upload_id, image_status = None, "ready"
+        image_url, public_id = _upload_inline(upload.source())
     
-    # Upload to Cloudinary
+    # Optional: Run ML prediction
+    features = None
+    try:
+        with stage("decode"):
+            image = upload.decode()
+            image.load()
+        with stage("extract_features"):
+            features = extract_features(image)
+        with stage("classifier"):
+            category, confidence = predict_outfit_type(features)
+    except Exception as e:
+        # If prediction fails, still return image URL
+        category = "unknown"
+        confidence = 0.0
+
+    # Keep the feature vector for similarity search once the outfit is saved
+    if features is not None or phash is not None:
+        key = similarity.pending_key(upload_id=upload_id, image_url=image_url)
+        similarity.remember_upload_features(db, current_user.id, key, features, phash)
+        db.commit()
+    
+    return {
+        "image_url": image_url,
+        "public_id": public_id,
+        "upload_id": upload_id,
+        "image_status": image_status,
+        "predicted_category": category,
+        "confidence": confidence,
+        "message": "Image uploaded successfully" if image_status == "ready" else "Image queued for upload"
+    }
+
+
+def _upload_inline(image):
+    """Upload to Cloudinary inside the request; returns (image_url, public_id)"""
     try:
-        upload_result = upload_image_to_cloudinary(image_bytes)
-        image_url = upload_result["secure_url"]
-        public_id = upload_result["public_id"]
+        upload_result = upload_image_to_cloudinary(image)
+        return upload_result["secure_url"], upload_result["public_id"]
     except ValueError as e:
         # Credential validation error
         raise HTTPException(
@@ -70,35 +152,50 @@ async def upload_outfit(
                 detail="Cloudinary authentication failed. Please verify your CLOUDINARY_API_SECRET in .env file. Make sure there are no extra spaces or quotes."
             )
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
-    
-    # Optional: Run ML prediction
-    try:
-        image = Image.open(io.BytesIO(image_bytes))
-        features = extract_features(image)
-        category, confidence = predict_outfit_type(features)
-    except Exception as e:
-        # If prediction fails, still return image URL
-        category = "unknown"
-        confidence = 0.0
-    
-    return {
-        "image_url": image_url,
-        "public_id": public_id,
-        "predicted_category": category,
-        "confidence": confidence,
-        "message": "Image uploaded successfully"
-    }
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_status(
+    upload_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Status of a deferred upload (pending / uploading / done / failed).
+    """
+    job = db.query(UploadJob).filter(
+        UploadJob.id == upload_id,
+        UploadJob.user_id == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return job.to_dict()
 
 
 @router.post("/save-outfit")
 async def save_outfit(
     outfit_data: OutfitCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Save outfit to wardrobe database.
+    Accepts either an image_url or the upload_id of a deferred upload.
     """
+    if not outfit_data.image_url and not outfit_data.upload_id:
+        raise HTTPException(status_code=400, detail="Must provide image_url or upload_id")
+
+    job = None
+    if outfit_data.upload_id:
+        job = db.query(UploadJob).filter(
+            UploadJob.id == outfit_data.upload_id,
+            UploadJob.user_id == current_user.id
+        ).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if job.status == "failed":
+            raise HTTPException(status_code=409, detail="Image upload failed, please upload the image again")
+
     outfit = Outfit(
         image_url=outfit_data.image_url,
         category=outfit_data.category,
@@ -108,9 +205,29 @@ async def save_outfit(
         confidence=outfit_data.confidence,
         owner_id=current_user.id
     )
+    if job:
+        outfit.upload_id = job.id
+        outfit.image_url, outfit.public_id = job.image_url, job.public_id
+        outfit.image_status = "ready" if job.status == "done" else "pending"
+    similarity.attach_upload_features(
+        db, outfit, similarity.pending_key(upload_id=outfit_data.upload_id, image_url=outfit_data.image_url)
+    )
     
     db.add(outfit)
+    db.flush()
+    change_feed.record(db, current_user.id, [outfit.id])
+    mark_wardrobe_changed(db, current_user.id)
     db.commit()
+
+    # The worker may have finished between our read and commit; its backfill
+    # would have missed this row, so copy the result over now.
+    if outfit.image_status == "pending":
+        db.refresh(job)
+        if job.status == "done":
+            outfit.image_url, outfit.public_id = job.image_url, job.public_id
+            outfit.image_status = "ready"
+            change_feed.record(db, current_user.id, [outfit.id])
+            db.commit()
     db.refresh(outfit)
     
     return {
@@ -119,36 +236,114 @@ async def save_outfit(
     }
 
 
+@router.post("/bulk-import")
+async def bulk_import_outfits(
+    files: List[UploadFile] = File(...),
+    metadata: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Import many outfit images at once.
+    `metadata` is an optional JSON list aligned with the files, e.g.
+    [{"category": "jeans", "color": "blue"}, null, {"occasion": "formal"}];
+    the predicted category is used when none is given. Uploads run
+    concurrently and every outfit is inserted in one transaction.
+    Returns a per-item status ("created" with the outfit, or "error").
+    """
+    if len(files) > bulk_import.MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {bulk_import.MAX_ITEMS} images per import")
+    try:
+        metadata = bulk_import.parse_metadata(metadata, len(files))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = await bulk_import.run_import(db, current_user.id, files, metadata)
+    created = sum(item["status"] == "created" for item in items)
+    return {
+        "created": created,
+        "failed": len(items) - created,
+        "items": items
+    }
+
+
+@router.get("/changes")
+async def wardrobe_changes(
+    since: Optional[str] = None,
+    limit: int = change_feed.DEFAULT_LIMIT,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Delta sync: outfits created, updated or deleted since a cursor.
+    - First sync: omit `since` to get every outfit.
+    - Later syncs: pass the `cursor` of the previous response as `since`.
+    Changes are {"op": "upsert", "outfit": {...}} or {"op": "delete", "id": ...};
+    keep fetching while `has_more` is true.
+    """
+    if not 1 <= limit <= change_feed.MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {change_feed.MAX_LIMIT}")
+    try:
+        return change_feed.changes_since(db, current_user.id, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/export")
+async def export_wardrobe(
+    format: str = "ndjson",
+    gzip: bool = False,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Download the whole wardrobe as NDJSON or CSV (format=ndjson|csv),
+    optionally gzipped. Rows are streamed, oldest first.
+    """
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    media_type, headers = export.response_headers("wardrobe", format, gzip)
+    return StreamingResponse(
+        export.stream(export.outfits_query(current_user.id), format, gzip),
+        media_type=media_type, headers=headers
+    )
+
+
+def _list_page(db, user_id, filters, fields, cursor, limit):
+    try:
+        return list_outfits(db, user_id, filters, fields=fields, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/outfits")
 async def get_wardrobe(
     category: Optional[str] = None,
     occasion: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
-    Get all outfits from wardrobe with optional filters (user-specific).
+    Get outfits from wardrobe with optional filters (user-specific), newest first.
+    - fields: comma-separated subset of outfit fields (default: all)
+    - cursor / limit: pass next_cursor back to get the following page
     """
-    query = db.query(Outfit).filter(Outfit.owner_id == current_user.id)
-    
+    filters = []
     if category:
-        query = query.filter(Outfit.category == category.lower())
+        filters.append(Outfit.category == category.lower())
     if occasion:
-        query = query.filter(Outfit.occasion == occasion.lower())
-    
-    outfits = query.order_by(Outfit.created_at.desc()).all()
+        filters.append(Outfit.occasion == occasion.lower())
     
-    return {
-        "count": len(outfits),
-        "outfits": [outfit.to_dict() for outfit in outfits]
-    }
+    return _list_page(db, current_user.id, filters, fields, cursor, limit)
 
 
 @router.get("/outfit/{outfit_id}")
 async def get_outfit(
     outfit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Get a specific outfit by ID (must belong to current user).
@@ -169,7 +364,7 @@ async def update_outfit(
     outfit_id: int,
     outfit_update: OutfitUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Update outfit details (must belong to current user).
@@ -191,6 +386,8 @@ async def update_outfit(
     if outfit_update.notes is not None:
         outfit.notes = outfit_update.notes
     
+    change_feed.record(db, current_user.id, [outfit.id])
+    mark_wardrobe_changed(db, current_user.id)
     db.commit()
     db.refresh(outfit)
     
@@ -204,7 +401,7 @@ async def update_outfit(
 async def delete_outfit(
     outfit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Delete outfit from wardrobe (must belong to current user).
@@ -217,7 +414,10 @@ async def delete_outfit(
     if not outfit:
         raise HTTPException(status_code=404, detail="Outfit not found")
     
+    wear_log.forget_outfit(db, outfit.id)
+    change_feed.record(db, current_user.id, [outfit.id], deleted=True)
     db.delete(outfit)
+    mark_wardrobe_changed(db, current_user.id)
     db.commit()
     
     return {"message": "Outfit deleted successfully"}
@@ -227,7 +427,7 @@ async def delete_outfit(
 async def wear_outfit(
     outfit_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Mark outfit as worn today (must belong to current user).
@@ -241,6 +441,9 @@ async def wear_outfit(
         raise HTTPException(status_code=404, detail="Outfit not found")
     
     outfit.last_worn_date = date.today()
+    wear_log.record_wear(db, outfit, outfit.last_worn_date)
+    change_feed.record(db, current_user.id, [outfit.id])
+    mark_wardrobe_changed(db, current_user.id)
     db.commit()
     db.refresh(outfit)
     
@@ -250,14 +453,122 @@ async def wear_outfit(
     }
 
 
+@router.get("/most-worn")
+async def most_worn(
+    window: str = "all",
+    limit: int = 10,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Most worn outfits (user-specific), from the wear rollups.
+    - window: "all", "30d" or "90d"
+    """
+    if window not in ("all", "30d", "90d"):
+        raise HTTPException(status_code=400, detail="window must be 'all', '30d' or '90d'")
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    
+    outfits = wear_log.most_worn(db, current_user.id, window=window, limit=limit)
+    db.commit()
+    
+    return {
+        "window": window,
+        "count": len(outfits),
+        "outfits": outfits
+    }
+
+
+@router.get("/rotation")
+async def wardrobe_rotation(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Wardrobe rotation (user-specific): wear counts per outfit, least worn
+    first, and the share of outfits worn in the last 30 / 90 days.
+    """
+    result = wear_log.rotation(db, current_user.id)
+    db.commit()
+    return result
+
+
+def _similar_results(db, matches):
+    outfits = {
+        o.id: o for o in db.query(
+            Outfit.id, Outfit.category, Outfit.color, Outfit.occasion, Outfit.image_url
+        ).filter(Outfit.id.in_([outfit_id for outfit_id, _ in matches]))
+    }
+    return [
+        {"score": score, "outfit": dict(outfits[outfit_id]._mapping)}
+        for outfit_id, score in matches if outfit_id in outfits
+    ]
+
+
+@router.get("/similar/{outfit_id}")
+async def similar_outfits(
+    outfit_id: int,
+    limit: int = 5,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Outfits in the wardrobe that look most like this one (cosine similarity
+    of image features), best first.
+    """
+    if not 1 <= limit <= 50:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+    outfit = db.query(Outfit.id, Outfit.features).filter(
+        Outfit.id == outfit_id,
+        Outfit.owner_id == current_user.id
+    ).first()
+    if not outfit:
+        raise HTTPException(status_code=404, detail="Outfit not found")
+    if outfit.features is None:
+        raise HTTPException(status_code=409, detail="No image features stored for this outfit")
+
+    matches = similarity.nearest(
+        db, current_user, similarity.unpack(outfit.features), limit=limit, exclude_id=outfit_id
+    )
+    results = _similar_results(db, matches)
+    return {"outfit_id": outfit_id, "count": len(results), "results": results}
+
+
+@router.post("/similar-to-photo")
+async def similar_to_photo(
+    file: UploadFile = File(...),
+    limit: int = 5,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Outfits in the wardrobe that look most like the uploaded photo
+    (e.g. to spot a duplicate before buying). Nothing is stored.
+    """
+    if not 1 <= limit <= 50:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+    upload = await ingest_upload(file)
+    try:
+        with stage("extract_features"):
+            features = await run_in_threadpool(extract_features, upload.decode())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read image: {str(e)}")
+
+    results = _similar_results(db, similarity.nearest(db, current_user, features, limit=limit))
+    return {"count": len(results), "results": results}
+
+
 @router.get("/outfits-by-date/{wear_date}")
 async def outfits_by_date(
     wear_date: str,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
-    Get all outfits worn on a specific date (user-specific).
+    Get outfits worn on a specific date (user-specific), paginated like /outfits.
     Date format: YYYY-MM-DD
     """
     try:
@@ -265,39 +576,32 @@ async def outfits_by_date(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
-    outfits = db.query(Outfit).filter(
-        Outfit.last_worn_date == target_date,
-        Outfit.owner_id == current_user.id
-    ).all()
-    
-    return {
-        "date": wear_date,
-        "count": len(outfits),
-        "outfits": [outfit.to_dict() for outfit in outfits]
-    }
+    page = _list_page(db, current_user.id, [Outfit.last_worn_date == target_date], fields, cursor, limit)
+    return {"date": wear_date, **page}
 
 
 @router.get("/not-worn-recently")
 async def not_worn_recently(
     days: int = 30,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
-    Get outfits not worn in the last N days (user-specific).
+    Get outfits not worn in the last N days (user-specific), paginated like /outfits.
     """
     cutoff_date = date.today() - timedelta(days=days)
     
-    outfits = db.query(Outfit).filter(
-        Outfit.owner_id == current_user.id,
+    page = _list_page(db, current_user.id, [
         (Outfit.last_worn_date < cutoff_date) | (Outfit.last_worn_date.is_(None))
-    ).all()
+    ], fields, cursor, limit)
     
     return {
         "days": days,
         "cutoff_date": cutoff_date.isoformat(),
-        "count": len(outfits),
-        "outfits": [outfit.to_dict() for outfit in outfits]
+        **page
     }
 
 
@@ -308,7 +612,7 @@ async def suggest_outfits(
     avoid_recent: bool = True,
     days: int = 7,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Smart outfit suggestions based on:
@@ -343,6 +647,75 @@ async def suggest_outfits(
     }
 
 
+@router.get("/suggest-combinations")
+async def suggest_combinations(
+    city: Optional[str] = None,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    occasion: Optional[str] = None,
+    avoid_recent: bool = True,
+    days: int = 7,
+    top_k: int = 5,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Suggest complete outfits (top + bottom or one-piece, footwear, outerwear
+    on cold days, bag) built from the user's wardrobe.
+    Weather filtering is applied when a city or coordinates are given.
+    Without overrides, today's precomputed plan is served when one exists.
+    """
+    top_k = max(1, min(top_k, 20))
+
+    uses_defaults = (
+        not city and lat is None and lon is None and not occasion
+        and avoid_recent and days == 7
+    )
+    if uses_defaults:
+        plan = get_plan(db, current_user)
+        if plan is not None:
+            combos = plan["combinations"][:top_k]
+            return {
+                "count": len(combos),
+                "weather": plan["weather"],
+                "combinations": combos,
+                "source": "plan",
+                "built_at": plan["built_at"]
+            }
+
+    if not city and lat is None and lon is None:
+        city, lat, lon = current_user.home_city, current_user.home_lat, current_user.home_lon
+
+    weather = None
+    if city or (lat is not None and lon is not None):
+        temp, rain_vol, details = weather_svc.get_weather(city=city, lat=lat, lon=lon)
+        weather = {
+            "temp": temp,
+            "rain": rain_vol,
+            "min_temp": details.get("min_temp"),
+            "max_temp": details.get("max_temp"),
+            "rain_prob": details.get("daily_rain_prob"),
+            "description": details.get("description")
+        }
+
+    items = db.query(Outfit).filter(Outfit.owner_id == current_user.id).all()
+    avoid_before = date.today() - timedelta(days=days) if avoid_recent else None
+    combos = generate_combinations(
+        items,
+        weather=weather,
+        occasion=occasion,
+        avoid_before=avoid_before,
+        top_k=top_k
+    )
+
+    return {
+        "count": len(combos),
+        "weather": weather,
+        "combinations": [serialize_combination(combo["score"], combo["items"]) for combo in combos],
+        "source": "live"
+    }
+
+
 @router.get("/stats")
 async def wardrobe_stats(
     db: Session = Depends(get_db),
@@ -350,38 +723,7 @@ async def wardrobe_stats(
 ):
     """
     Get wardrobe statistics (user-specific).
+    Computed with one grouped query and cached until the wardrobe changes.
     """
-    total_outfits = db.query(Outfit).filter(Outfit.owner_id == current_user.id).count()
-    
-    # Count by category
-    categories = db.query(Outfit.category).filter(
-        Outfit.owner_id == current_user.id
-    ).distinct().all()
-    category_counts = {}
-    for cat in categories:
-        count = db.query(Outfit).filter(
-            Outfit.category == cat[0],
-            Outfit.owner_id == current_user.id
-        ).count()
-        category_counts[cat[0]] = count
-    
-    # Count never worn
-    never_worn = db.query(Outfit).filter(
-        Outfit.owner_id == current_user.id,
-        Outfit.last_worn_date.is_(None)
-    ).count()
-    
-    # Count worn in last 7 days
-    week_ago = date.today() - timedelta(days=7)
-    recently_worn = db.query(Outfit).filter(
-        Outfit.owner_id == current_user.id,
-        Outfit.last_worn_date >= week_ago
-    ).count()
-    
-    return {
-        "total_outfits": total_outfits,
-        "categories": category_counts,
-        "never_worn": never_worn,
-        "recently_worn_7_days": recently_worn
-    }
+    return wardrobe_stats_svc.get_stats(db, current_user)
 
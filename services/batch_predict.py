@@ -0,0 +1,139 @@
+"""
+Chunked batch classification for /predict/batch.
+
+Uploaded images and zip archive entries are read lazily, one chunk at a
+time: a zip is never extracted as a whole, each entry is only read when its
+chunk is processed. Every file and entry goes through services.ingest, so it
+gets the same size, format and dimension limits as a single upload. Every
+chunk gets one vectorized feature extraction and one classifier matmul; if that fails, every image of the chunk gets an
+error result and the batch goes on with the next chunk.
+"""
+import os
+import zipfile
+
+from database import SessionLocal
+from ml.extract_features import extract_features_batch
+from ml.classifier import predict_outfit_types
+from services import upload_outbox
+from services.ingest import MAX_UPLOAD_BYTES, UploadRejected, ingest_file
+
+CHUNK_SIZE = int(os.getenv("PREDICT_BATCH_CHUNK", "32"))
+MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "500"))
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+
+def _is_zip(upload):
+    return (upload.filename or "").lower().endswith(".zip") or upload.content_type in ZIP_CONTENT_TYPES
+
+
+def _ingest_upload(upload):
+    upload.file.seek(0)
+    return ingest_file(upload.file)
+
+
+def _ingest_zip_entry(archive, info):
+    # The declared size is checked up front; ingest_file still caps what is read
+    if info.file_size > MAX_UPLOAD_BYTES:
+        raise UploadRejected(413, f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+    with archive.open(info) as entry:
+        return ingest_file(entry)
+
+
+def _raise(error):
+    raise error
+
+
+def iter_entries(files):
+    """
+    Yield (filename, loader) for every image, expanding zip archives.
+    loader() returns an IngestedImage and is only called when the entry's
+    chunk is processed.
+    """
+    for upload in files:
+        name = upload.filename or "upload"
+        if not _is_zip(upload):
+            yield name, (lambda u=upload: _ingest_upload(u))
+            continue
+        try:
+            archive = zipfile.ZipFile(upload.file)
+        except zipfile.BadZipFile as e:
+            yield name, (lambda e=e: _raise(ValueError(f"Invalid zip archive: {e}")))
+            continue
+        for info in archive.infolist():
+            if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                continue
+            yield f"{name}/{info.filename}", (lambda a=archive, i=info: _ingest_zip_entry(a, i))
+
+
+def process_chunk(entries, start_index, user_id=None, upload=False, chunk_size=CHUNK_SIZE):
+    """
+    Pull up to chunk_size entries from the iterator and classify them.
+
+    Returns a list of result dicts with a "status" of "ok" or "error" (empty
+    once the iterator is exhausted). With upload=True every image is also
+    queued in the upload outbox and its upload_id is returned, ready for
+    /wardrobe/save-outfit (the caller wakes the outbox worker).
+    """
+    results, images, ingested = [], [], []
+    for offset in range(chunk_size):
+        try:
+            filename, loader = next(entries)
+        except StopIteration:
+            break
+        result = {"index": start_index + offset, "filename": filename}
+        try:
+            upload_image = loader()
+            image = upload_image.decode()
+            image.load()
+            images.append((result, image))
+            ingested.append(upload_image)
+        except Exception as e:
+            result["error"] = str(e)
+        results.append(result)
+
+    if images:
+        try:
+            predictions = predict_outfit_types(extract_features_batch([img for _, img in images]))
+        except Exception as e:
+            print(f"Batch classification failed for the chunk at index {start_index}: {e}")
+            for result, _ in images:
+                result["error"] = f"Prediction failed: {e}"
+            images, ingested = [], []
+        else:
+            for (result, _), (label, confidence) in zip(images, predictions):
+                result["predicted_class"] = label
+                result["confidence"] = confidence
+
+    if upload and images:
+        _queue_uploads(images, ingested, user_id)
+
+    for result in results:
+        result["status"] = "error" if "error" in result else "ok"
+    return results
+
+
+def _queue_uploads(images, ingested, user_id):
+    """
+    Spool the chunk's images and create their outbox jobs in one transaction.
+    If that fails nothing is queued: spooled files are removed and every
+    image of the chunk gets an error result.
+    """
+    spooled = []
+    db = SessionLocal()
+    try:
+        for (result, _), upload_image in zip(images, ingested):
+            spooled.append(upload_outbox.spool_image(upload_image.source()))
+            result["upload_id"] = upload_outbox.create_job(db, user_id, spooled[-1]).id
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Queueing batch uploads failed: {e}")
+        for path in spooled:
+            if os.path.exists(path):
+                os.remove(path)
+        for result, _ in images:
+            result.pop("upload_id", None)
+            result["error"] = f"Upload could not be queued: {e}"
+    finally:
+        db.close()
@@ -0,0 +1,252 @@
+"""
+Bulk wardrobe import for /wardrobe/bulk-import.
+
+Every image is ingested with the usual upload limits, then:
+- uploads run concurrently (at most IMPORT_UPLOAD_CONCURRENCY at a time,
+  each retried with exponential backoff), or, with deferred uploads, the
+  images are spooled for the upload outbox;
+- meanwhile images are classified in chunks, one vectorized feature
+  extraction and one classifier matmul per chunk;
+- all Outfit rows (and outbox jobs) are inserted in a single transaction.
+
+Items fail individually: a bad image or a failed upload is reported in its
+own result and the rest of the import goes ahead.
+"""
+import asyncio
+import json
+import os
+
+from starlette.concurrency import run_in_threadpool
+
+from cores.instrumentation import stage
+from ml.extract_features import extract_features_batch
+from ml.classifier import predict_outfit_types
+from models import Outfit
+from services import change_feed, dedup, similarity, upload_outbox
+from services.ingest import UploadRejected, ingest_upload
+from services.wardrobe_state import mark_wardrobe_changed
+
+MAX_ITEMS = int(os.getenv("IMPORT_MAX_ITEMS", "500"))
+CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "32"))
+IMPORT_UPLOAD_CONCURRENCY = int(os.getenv("IMPORT_UPLOAD_CONCURRENCY", "8"))
+IMPORT_UPLOAD_ATTEMPTS = int(os.getenv("IMPORT_UPLOAD_ATTEMPTS", "3"))
+IMPORT_RETRY_BASE_SECONDS = float(os.getenv("IMPORT_RETRY_BASE_SECONDS", "0.5"))
+
+METADATA_FIELDS = ("category", "color", "occasion", "notes")
+
+
+def parse_metadata(raw, count):
+    """
+    Per-item metadata: a JSON list aligned with the files, each entry null or
+    an object with any of category / color / occasion / notes.
+    """
+    if not raw:
+        return [{} for _ in range(count)]
+    try:
+        entries = json.loads(raw)
+    except ValueError as e:
+        raise ValueError(f"metadata is not valid JSON: {e}")
+    if not isinstance(entries, list) or len(entries) > count:
+        raise ValueError("metadata must be a list with at most one entry per file")
+    parsed = []
+    for entry in entries + [None] * (count - len(entries)):
+        if entry is None:
+            entry = {}
+        if not isinstance(entry, dict):
+            raise ValueError("metadata entries must be objects")
+        unknown = set(entry) - set(METADATA_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown metadata fields: {', '.join(sorted(unknown))}")
+        parsed.append({k: v for k, v in entry.items() if v not in (None, "")})
+    return parsed
+
+
+def classify_chunk(uploads):
+    """
+    Classify ingested images in one batch (blocking).
+    Returns one (label, confidence, features, phash) tuple or exception per image.
+    """
+    results, images = [], []
+    for upload in uploads:
+        try:
+            with stage("decode"):
+                image = upload.decode()
+                image.load()
+            images.append(image)
+            results.append(None)
+        except Exception as e:
+            results.append(e)
+
+    if images:
+        with stage("extract_features"):
+            features = extract_features_batch(images)
+        with stage("classifier"):
+            predictions = predict_outfit_types(features)
+        rows = iter(zip(predictions, features))
+        for i, upload in enumerate(uploads):
+            if results[i] is None:
+                (label, confidence), vector = next(rows)
+                results[i] = (label, confidence, vector, dedup.image_hash(upload))
+    return results
+
+
+async def upload_with_retries(uploader, upload, attempts=None, retry_base_seconds=None):
+    """Upload one image in a thread, retrying transient failures with backoff"""
+    attempts = IMPORT_UPLOAD_ATTEMPTS if attempts is None else attempts
+    retry_base_seconds = IMPORT_RETRY_BASE_SECONDS if retry_base_seconds is None else retry_base_seconds
+    for attempt in range(1, attempts + 1):
+        try:
+            return await run_in_threadpool(uploader, upload.source(), folder="wardrobe")
+        except ValueError:
+            # Credential / configuration errors will not go away on retry
+            raise
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            print(f"Import upload failed (attempt {attempt}/{attempts}): {e}")
+            await asyncio.sleep(retry_base_seconds * (2 ** (attempt - 1)))
+
+
+async def _upload_all(uploads, uploader, concurrency):
+    """Upload every image with bounded concurrency; exceptions are returned, not raised"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(upload):
+        async with semaphore:
+            return await upload_with_retries(uploader, upload)
+
+    return await asyncio.gather(*(_one(u) for u in uploads), return_exceptions=True)
+
+
+def _spool_all(uploads):
+    """Spool every image for the outbox (blocking); exceptions are returned, not raised"""
+    paths = []
+    for upload in uploads:
+        try:
+            paths.append(upload_outbox.spool_image(upload.source()))
+        except Exception as e:
+            paths.append(e)
+    return paths
+
+
+def _discard_stored(stored, deferred):
+    """Best-effort cleanup of spooled / uploaded images that were not saved"""
+    stored = [s for s in stored if not isinstance(s, Exception)]
+    if deferred:
+        for path in stored:
+            if os.path.exists(path):
+                os.remove(path)
+        return
+    if not stored or upload_outbox.UPLOAD_BACKEND == "local":
+        return
+    from cloudinary_config import delete_image_from_cloudinary
+    for result in stored:
+        try:
+            delete_image_from_cloudinary(result["public_id"])
+        except Exception as e:
+            print(f"Failed to delete orphaned upload {result['public_id']}: {e}")
+
+
+def insert_outfits(db, user_id, items, deferred):
+    """
+    Insert the Outfit rows (and outbox jobs) of all successful items in one
+    transaction. Each item dict gets its "outfit" set.
+    """
+    jobs = []
+    if deferred:
+        jobs = upload_outbox.create_jobs(db, user_id, [item["stored"] for item in items])
+    outfits = []
+    for i, item in enumerate(items):
+        meta = item["metadata"]
+        outfit = Outfit(
+            owner_id=user_id,
+            category=meta.get("category") or item["predicted_category"],
+            color=meta.get("color"),
+            occasion=meta.get("occasion"),
+            notes=meta.get("notes"),
+            confidence=item["confidence"],
+            features=similarity.pack(item["features"]),
+            phash=item["phash"]
+        )
+        if deferred:
+            outfit.upload_id, outfit.image_status = jobs[i].id, "pending"
+        else:
+            outfit.image_url, outfit.public_id = item["stored"]["secure_url"], item["stored"]["public_id"]
+        outfits.append(outfit)
+        item["outfit"] = outfit
+
+    with stage("sqlite_insert"):
+        db.add_all(outfits)
+        db.flush()
+        ids = [outfit.id for outfit in outfits]
+        change_feed.record(db, user_id, ids)
+        mark_wardrobe_changed(db, user_id)
+        db.commit()
+    # Reload the committed rows (server defaults included) in one query
+    db.query(Outfit).filter(Outfit.id.in_(ids)).all()
+
+
+async def run_import(db, user_id, files, metadata):
+    """Import every file; returns one result dict per file, in order"""
+    deferred = upload_outbox.DEFERRED_UPLOADS
+    items = [{"index": i, "filename": f.filename, "metadata": metadata[i]} for i, f in enumerate(files)]
+
+    uploads = []
+    for item, file in zip(items, files):
+        try:
+            uploads.append((item, await ingest_upload(file)))
+        except UploadRejected as e:
+            item["error"] = e.detail
+
+    # Uploads run in the background while the chunks are classified
+    if deferred:
+        store_task = asyncio.ensure_future(run_in_threadpool(_spool_all, [u for _, u in uploads]))
+    else:
+        store_task = asyncio.ensure_future(
+            _upload_all([u for _, u in uploads], upload_outbox.get_uploader(), IMPORT_UPLOAD_CONCURRENCY)
+        )
+
+    try:
+        for start in range(0, len(uploads), CHUNK_SIZE):
+            chunk = uploads[start:start + CHUNK_SIZE]
+            results = await run_in_threadpool(classify_chunk, [u for _, u in chunk])
+            for (item, _), result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    item["error"] = f"Could not read image: {result}"
+                else:
+                    label, confidence, item["features"], item["phash"] = result
+                    item["predicted_category"], item["confidence"] = label, float(confidence)
+    except BaseException:
+        # Also on cancellation (client gone): wait for the stored images and drop them
+        await run_in_threadpool(_discard_stored, await store_task, deferred)
+        raise
+    stored = await store_task
+
+    for (item, _), result in zip(uploads, stored):
+        if isinstance(result, Exception):
+            item.setdefault("error", f"Image upload failed: {result}")
+        else:
+            item["stored"] = result
+
+    ok = [item for item in items if "error" not in item]
+    unused = [item["stored"] for item in items if "error" in item and "stored" in item]
+    try:
+        if ok:
+            insert_outfits(db, user_id, ok, deferred)
+    except Exception:
+        db.rollback()
+        unused += [item["stored"] for item in ok]
+        raise
+    finally:
+        await run_in_threadpool(_discard_stored, unused, deferred)
+
+    if deferred and ok:
+        upload_outbox.outbox.notify()
+
+    return [
+        {"index": item["index"], "filename": item["filename"], "status": "error", "error": item["error"]}
+        if "error" in item else
+        {"index": item["index"], "filename": item["filename"], "status": "created",
+         "predicted_category": item["predicted_category"], "outfit": item["outfit"].to_dict()}
+        for item in items
+    ]
@@ -0,0 +1,88 @@
+"""
+Wardrobe change feed for delta sync (/wardrobe/changes).
+
+Every outfit mutation calls record() in the same transaction as the change.
+outfit_changes keeps one row per (user, outfit), its latest change: recording a
+change deletes the previous row and inserts a new one with a higher seq, and
+a deleted outfit leaves a tombstone. A client stores the cursor of its last
+sync and only receives outfits whose latest change is newer than it.
+
+SQLite runs one write transaction at a time, so seq order is commit order
+and a reader can never see seq N+1 committed before seq N. Backends with
+concurrent writers do not give that guarantee.
+"""
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from cores.utils import decode_cursor, encode_cursor
+from models import Outfit, OutfitChange
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+
+def record(db, user_id, outfit_ids, deleted=False):
+    """Log a change (or deletion) of the given outfits (the caller commits)"""
+    outfit_ids = list(dict.fromkeys(outfit_ids))
+    if not outfit_ids:
+        return
+    db.query(OutfitChange).filter(
+        OutfitChange.user_id == user_id, OutfitChange.outfit_id.in_(outfit_ids)
+    ).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.execute(insert(OutfitChange), [
+        {"outfit_id": outfit_id, "user_id": user_id, "deleted": deleted, "changed_at": now}
+        for outfit_id in outfit_ids
+    ])
+
+
+def parse_cursor(cursor):
+    """seq from an opaque cursor (0 for none); raises ValueError on a bad cursor"""
+    if not cursor:
+        return 0
+    seq, = decode_cursor(cursor, 1)
+    if not isinstance(seq, int) or seq < 0:
+        raise ValueError("Invalid cursor")
+    return seq
+
+
+def changes_since(db, user_id, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Outfits created, updated or deleted after `cursor`, oldest change first.
+    Returns {"changes", "cursor", "has_more"}; pass "cursor" back as the next
+    `since` (immediately while has_more is true).
+    """
+    since = parse_cursor(cursor)
+    rows = (
+        db.query(OutfitChange.seq, OutfitChange.outfit_id, OutfitChange.deleted)
+        .filter(OutfitChange.user_id == user_id, OutfitChange.seq > since)
+        .order_by(OutfitChange.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    live_ids = [outfit_id for _, outfit_id, deleted in rows if not deleted]
+    outfits = {}
+    if live_ids:
+        outfits = {
+            outfit.id: outfit
+            for outfit in db.query(Outfit).filter(Outfit.owner_id == user_id, Outfit.id.in_(live_ids))
+        }
+
+    changes = []
+    for _, outfit_id, deleted in rows:
+        outfit = outfits.get(outfit_id)
+        if outfit is None:
+            # Tombstone, or deleted after this page's rows were read
+            changes.append({"op": "delete", "id": outfit_id})
+        else:
+            changes.append({"op": "upsert", "outfit": outfit.to_dict()})
+
+    return {
+        "changes": changes,
+        "cursor": encode_cursor(rows[-1].seq if rows else since),
+        "has_more": has_more
+    }
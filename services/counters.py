@@ -0,0 +1,186 @@
+"""
+Incrementally maintained usage counters (metric_counters table).
+
+Writers call count_predictions() / count_user() on the session or
+connection that inserts the rows, so the counters commit or roll back with
+them. Every event bumps an all-time total plus its hour and day buckets,
+for the overall metric and for its guest/auth and predicted-category
+breakdowns. /metrics then reads a few rows by primary key instead of
+scanning the predictions table.
+
+Counters only go up: nothing in the app deletes predictions or users, and
+rows removed by hand are not subtracted. rebuild_counters() (run by
+migrate_add_metric_counters.py) recomputes them from the tables.
+
+The upsert and the hourly rollup are dialect-specific; SQLite, PostgreSQL
+and MySQL are supported.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models import MetricCounter, Prediction, User
+
+TOTAL_BUCKET = "all"
+PERIOD_FORMATS = {"day": "d:%Y-%m-%d", "hour": "h:%Y-%m-%dT%H"}
+PERIOD_STEPS = {"day": timedelta(days=1), "hour": timedelta(hours=1)}
+SUPPORTED_DIALECTS = ("sqlite", "postgresql", "mysql")
+
+SELECT_BUCKET_RANGE = text("""
+SELECT bucket, metric, value FROM metric_counters
+WHERE bucket >= :start AND bucket <= :end
+""")
+
+
+def _build_upsert(dialect):
+    """INSERT ... adding to the value of an existing (bucket, metric) row"""
+    if dialect == "mysql":
+        insert = mysql.insert(MetricCounter)
+        return insert.on_duplicate_key_update(value=MetricCounter.value + insert.inserted.value)
+    insert = (sqlite if dialect == "sqlite" else postgresql).insert(MetricCounter)
+    return insert.on_conflict_do_update(
+        index_elements=[MetricCounter.bucket, MetricCounter.metric],
+        set_={"value": MetricCounter.value + insert.excluded.value}
+    )
+
+
+UPSERT_COUNTER = {dialect: _build_upsert(dialect) for dialect in SUPPORTED_DIALECTS}
+
+
+def _dialect(db):
+    dialect = db.get_bind().dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        raise NotImplementedError(f"Usage counters do not support {dialect}")
+    return dialect
+
+
+def _hour(dialect, column):
+    """column formatted as a %Y-%m-%dT%H hour bucket, in SQL"""
+    if dialect == "postgresql":
+        return func.to_char(column, 'YYYY-MM-DD"T"HH24')
+    if dialect == "mysql":
+        return func.date_format(column, "%Y-%m-%dT%H")
+    return func.strftime("%Y-%m-%dT%H", column)
+
+
+def buckets_for(ts):
+    """All-time, day and hour buckets of a timestamp"""
+    return (TOTAL_BUCKET,) + tuple(ts.strftime(fmt) for fmt in PERIOD_FORMATS.values())
+
+
+def _as_datetime(ts):
+    if ts is None:
+        return datetime.utcnow()
+    if isinstance(ts, str):
+        return datetime.fromisoformat(ts)
+    return ts
+
+
+def prediction_metrics(is_guest, category):
+    metrics = ["predictions", "predictions:guest" if is_guest else "predictions:auth"]
+    if category:
+        metrics.append(f"predictions:category:{category}")
+    return metrics
+
+
+def _apply(db, increments):
+    if increments:
+        db.execute(UPSERT_COUNTER[_dialect(db)], [
+            {"bucket": bucket, "metric": metric, "value": value}
+            for (bucket, metric), value in increments.items()
+        ])
+
+
+def count_predictions(db, events):
+    """
+    Bump prediction counters for (is_guest, category, created_at) events.
+    created_at may be a datetime, an ISO string or None (now). The caller commits.
+    """
+    increments = Counter()
+    for is_guest, category, created_at in events:
+        ts = _as_datetime(created_at)
+        for metric in prediction_metrics(is_guest, category):
+            for bucket in buckets_for(ts):
+                increments[(bucket, metric)] += 1
+    _apply(db, increments)
+
+
+def count_user(db, created_at=None):
+    """Bump the registered-users counters (the caller commits)"""
+    _apply(db, Counter((bucket, "users") for bucket in buckets_for(_as_datetime(created_at))))
+
+
+def get_totals(db):
+    """All-time counters as {metric: value}"""
+    rows = db.execute(SELECT_BUCKET_RANGE, {"start": TOTAL_BUCKET, "end": TOTAL_BUCKET})
+    return {metric: value for _, metric, value in rows}
+
+
+def get_summary(db):
+    """All-time totals: predictions, guest/auth split, per-category counts and users"""
+    return _summarize(get_totals(db))
+
+
+def _summarize(values):
+    categories = {
+        metric.split(":", 2)[2]: value
+        for metric, value in values.items()
+        if metric.startswith("predictions:category:")
+    }
+    return {
+        "predictions": values.get("predictions", 0),
+        "guest": values.get("predictions:guest", 0),
+        "auth": values.get("predictions:auth", 0),
+        "by_category": categories,
+        "users": values.get("users", 0)
+    }
+
+
+def get_trend(db, period="day", points=7, now=None):
+    """
+    The last `points` hour or day buckets (oldest first), zero-filled;
+    "users" counts registrations within the bucket.
+    Reads one primary-key range of the counters table.
+    """
+    fmt, step = PERIOD_FORMATS[period], PERIOD_STEPS[period]
+    now = now or datetime.utcnow()
+    keys = [(now - step * i).strftime(fmt) for i in reversed(range(points))]
+
+    values = {key: {} for key in keys}
+    for bucket, metric, value in db.execute(SELECT_BUCKET_RANGE, {"start": keys[0], "end": keys[-1]}):
+        if bucket in values:
+            values[bucket][metric] = value
+
+    return [dict(bucket=key.split(":", 1)[1], **_summarize(values[key])) for key in keys]
+
+
+def rebuild_counters(db):
+    """
+    Recompute every counter from the predictions and users tables
+    (one grouped scan each). Used by the migration; the caller commits.
+    """
+    db.execute(delete(MetricCounter))
+    increments = Counter()
+    dialect = _dialect(db)
+    prediction_hour = _hour(dialect, Prediction.created_at).label("hour")
+    predictions = db.execute(
+        select(Prediction.is_guest, Prediction.predicted_category, prediction_hour, func.count())
+        .group_by(Prediction.is_guest, Prediction.predicted_category, prediction_hour)
+    )
+    for is_guest, category, hour, count in predictions:
+        ts = datetime.strptime(hour, "%Y-%m-%dT%H") if hour else datetime.utcnow()
+        for metric in prediction_metrics(bool(is_guest), category):
+            for bucket in buckets_for(ts):
+                increments[(bucket, metric)] += count
+
+    user_hour = _hour(dialect, User.created_at).label("hour")
+    users = db.execute(select(user_hour, func.count()).group_by(user_hour))
+    for hour, count in users:
+        ts = datetime.strptime(hour, "%Y-%m-%dT%H") if hour else datetime.utcnow()
+        for bucket in buckets_for(ts):
+            increments[(bucket, "users")] += count
+
+    _apply(db, increments)
+    return len(increments)
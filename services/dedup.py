@@ -0,0 +1,172 @@
+"""
+Near-duplicate image detection with perceptual hashes.
+
+Every stored outfit and authenticated prediction carries a 64-bit dHash of
+its image. Per user, the hashes live in a BK-tree so a new upload is matched
+by Hamming distance without comparing against every image. The tree is
+cached per user and extended incrementally with rows newer than the ones it
+has seen; a wardrobe change (e.g. a deleted outfit) rebuilds it.
+
+Matches are re-read from the database, so a duplicate always reports the
+current image_url / upload state of the row it matched.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from PIL import Image
+
+from models import Outfit, Prediction
+
+DEDUP_UPLOADS = os.getenv("DEDUP_UPLOADS", "1") == "1"
+# Max differing bits (out of 64) for two images to count as the same photo
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "4"))
+MAX_CACHED_USERS = 1000
+
+Duplicate = namedtuple(
+    "Duplicate",
+    "kind id distance image_url public_id upload_id image_status category confidence features"
+)
+
+
+def dhash(image, size=8):
+    """Difference hash of a PIL image as an unsigned 64-bit int"""
+    if image.format == "JPEG":
+        # Let the JPEG decoder downscale while decoding
+        image.draft("L", (size * 4, size * 4))
+    gray = image.convert("L").resize((size + 1, size), Image.BILINEAR)
+    pixels = gray.tobytes()
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def to_db(value):
+    """Unsigned 64-bit hash -> signed value that fits an SQLite INTEGER"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def from_db(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes with Hamming distance"""
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, key, item):
+        self.size += 1
+        if self._root is None:
+            self._root = (key, [item], {})
+            return
+        node = self._root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (key, [item], {})
+                return
+            node = child
+
+    def search(self, key, max_distance):
+        """[(distance, item)] within max_distance, closest first"""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_key, items, children = stack.pop()
+            distance = hamming(key, node_key)
+            if distance <= max_distance:
+                found.extend((distance, item) for item in items)
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+class DuplicateIndex:
+    def __init__(self, max_distance=DEDUP_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tree(self, db, user):
+        with self._lock:
+            entry = self._entries.get(user.id)
+            if entry is None or entry["version"] != user.wardrobe_changed_at:
+                entry = {"version": user.wardrobe_changed_at, "tree": BKTree(),
+                         "outfit_id": 0, "prediction_id": 0}
+                self._entries[user.id] = entry
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > MAX_CACHED_USERS:
+                self._entries.popitem(last=False)
+
+            # Pick up rows added since the last lookup (by any worker)
+            for kind, model, owner in (("outfit", Outfit, Outfit.owner_id),
+                                       ("prediction", Prediction, Prediction.user_id)):
+                rows = (
+                    db.query(model.id, model.phash)
+                    .filter(owner == user.id, model.id > entry[f"{kind}_id"], model.phash.isnot(None))
+                    .all()
+                )
+                for row_id, phash in rows:
+                    entry["tree"].add(from_db(phash), (kind, row_id))
+                    entry[f"{kind}_id"] = max(entry[f"{kind}_id"], row_id)
+            return entry["tree"]
+
+    def find(self, db, user, phash):
+        """Closest usable duplicate of `phash` among the user's images, or None"""
+        for distance, (kind, row_id) in self._tree(db, user).search(phash, self.max_distance):
+            if kind == "outfit":
+                row = db.query(Outfit).filter(Outfit.id == row_id, Outfit.owner_id == user.id).first()
+                category, features = (row.category, row.features) if row else (None, None)
+            else:
+                row = db.query(Prediction).filter(Prediction.id == row_id, Prediction.user_id == user.id).first()
+                category, features = (row.predicted_category, None) if row else (None, None)
+            if row is None or row.image_status == "failed":
+                continue
+            if row.image_url is None and row.upload_id is None:
+                continue
+            return Duplicate(kind, row_id, distance, row.image_url, row.public_id, row.upload_id,
+                             row.image_status, category, row.confidence, features)
+        return None
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+index = DuplicateIndex()
+
+
+def image_hash(upload):
+    """dHash of an ingested upload as stored in the database, or None if unreadable"""
+    try:
+        return to_db(dhash(upload.decode()))
+    except Exception as e:
+        print(f"Could not hash upload: {e}")
+        return None
+
+
+def find_duplicate(db, user, phash):
+    if not DEDUP_UPLOADS or phash is None:
+        return None
+    return index.find(db, user, from_db(phash))
+
+
+def invalidate(user_id):
+    index.invalidate(user_id)
@@ -0,0 +1,165 @@
+"""
+Streaming exports (NDJSON or CSV, optionally gzipped).
+
+Rows are read with a server-side cursor (yield_per) in their own session and
+serialized as they arrive; output is flushed in ~64KB chunks, and gzip is
+applied incrementally. Memory use is therefore bounded by one batch of rows
+plus one output chunk, whatever the size of the history.
+
+The generators are synchronous: StreamingResponse iterates them in the
+thread pool, so the database reads never block the event loop.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select
+
+from database import SessionLocal, datetime_key
+from models import Feedback, Outfit, Prediction
+from services.wardrobe_listing import OUTFIT_FIELDS
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+YIELD_PER = 1000
+CHUNK_BYTES = 64 * 1024
+
+PREDICTION_FIELDS = {
+    "id": Prediction.id,
+    "predicted_category": Prediction.predicted_category,
+    "confidence": Prediction.confidence,
+    "image_url": Prediction.image_url,
+    "image_status": Prediction.image_status,
+    "outfit_id": Prediction.outfit_id,
+    "weather_data": Prediction.weather_data,
+    "created_at": Prediction.created_at,
+    "feedback_label": Feedback.user_label,
+    "feedback_helpful": Feedback.is_helpful,
+}
+
+FEEDBACK_FIELDS = {
+    "id": Feedback.id,
+    "prediction_id": Feedback.prediction_id,
+    "user_label": Feedback.user_label,
+    "is_helpful": Feedback.is_helpful,
+    "weather_context": Feedback.weather_context,
+    "model_output": Feedback.model_output,
+    "created_at": Feedback.created_at,
+    "predicted_category": Prediction.predicted_category,
+    "confidence": Prediction.confidence,
+    "image_url": Prediction.image_url,
+}
+
+
+def outfits_query(user_id):
+    return (
+        select(*(column.label(name) for name, column in OUTFIT_FIELDS.items()))
+        .where(Outfit.owner_id == user_id)
+        .order_by(Outfit.id)
+    )
+
+
+def predictions_query(user_id):
+    """
+    A user's predictions, one row each, with the latest feedback the user
+    gave on it, if any (/feedback adds a row per submission)
+    """
+    latest = (
+        select(Feedback.prediction_id, func.max(Feedback.id).label("feedback_id"))
+        .where(Feedback.user_id == user_id, Feedback.prediction_id.isnot(None))
+        .group_by(Feedback.prediction_id)
+        .subquery()
+    )
+    return (
+        select(*(column.label(name) for name, column in PREDICTION_FIELDS.items()))
+        .outerjoin(latest, latest.c.prediction_id == Prediction.id)
+        .outerjoin(Feedback, Feedback.id == latest.c.feedback_id)
+        .where(Prediction.user_id == user_id)
+        .order_by(Prediction.id)
+    )
+
+
+def feedback_query(since=None, until=None):
+    """
+    All feedback (guest and authenticated) with the prediction it rates,
+    optionally limited to an inclusive created_at date range
+    """
+    query = (
+        select(*(column.label(name) for name, column in FEEDBACK_FIELDS.items()))
+        .outerjoin(Prediction, Feedback.prediction_id == Prediction.id)
+        .order_by(Feedback.id)
+    )
+    created_key = datetime_key(Feedback.created_at)
+    if since is not None:
+        query = query.where(created_key >= since.isoformat())
+    if until is not None:
+        query = query.where(created_key < (until + timedelta(days=1)).isoformat())
+    return query
+
+
+def iter_rows(query, session_factory=SessionLocal, yield_per=YIELD_PER):
+    """Rows of `query`, fetched yield_per at a time from a server-side cursor"""
+    db = session_factory()
+    try:
+        for row in db.execute(query.execution_options(yield_per=yield_per)):
+            yield row
+    finally:
+        db.close()
+
+
+def _value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def ndjson_chunks(rows):
+    buffer, size = [], 0
+    for row in rows:
+        line = json.dumps({name: _value(value) for name, value in row._mapping.items()}) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(["" if value is None else _value(value) for value in row])
+        if buffer.tell() >= CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(query, fmt, gzip=False, session_factory=SessionLocal):
+    """Bytes of the export of `query` as `fmt` ("ndjson" or "csv")"""
+    rows = iter_rows(query, session_factory)
+    text = ndjson_chunks(rows) if fmt == "ndjson" else csv_chunks(query.selected_columns.keys(), rows)
+    chunks = (chunk.encode() for chunk in text)
+    return gzip_chunks(chunks) if gzip else chunks
+
+
+def response_headers(name, fmt, gzip=False):
+    """(media_type, headers) for an export download called `name`"""
+    filename = f"{name}.{fmt}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else FORMATS[fmt]
+    return media_type, {"Content-Disposition": f'attachment; filename="{filename}"'}
@@ -0,0 +1,163 @@
+"""
+Bounded-memory ingestion of uploaded images.
+
+ingest_upload() copies an UploadFile in fixed-size chunks, enforcing a byte
+cap as it goes, and sniffs the format and dimensions from the image header
+(PIL's Image.open only parses the header) before any pixel is decoded.
+Any format PIL can identify is accepted. Oversize files, oversize images
+and non-images are rejected early with an UploadRejected error.
+
+Small uploads stay in memory; larger ones are spooled to a temporary file.
+The resulting IngestedImage is handed as-is to the uploader (bytes or a
+path) and to the decoder (a fresh reader over the same buffer), so the body
+is never copied per consumer.
+"""
+import io
+import os
+import tempfile
+import weakref
+
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+
+from cores.instrumentation import stage
+
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv("UPLOAD_MAX_PIXELS", str(40_000_000)))
+# Uploads above this size are spooled to disk instead of kept in memory
+SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+# The header must be identifiable within this many bytes
+SNIFF_BYTES = 512 * 1024
+
+# Decodes elsewhere (batch uploads, zip entries) get the same pixel limit
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+
+class UploadRejected(Exception):
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class IngestedImage:
+    """An uploaded image held either in memory (data) or in a temp file (path)"""
+
+    def __init__(self, format, width, height, size, data=None, path=None):
+        self.format = format
+        self.width = width
+        self.height = height
+        self.size = size
+        self.data = data
+        self.path = path
+        # The temp file goes away with the object (or on close())
+        self._finalizer = weakref.finalize(self, _remove, path) if path else None
+
+    def source(self):
+        """What to hand to an uploader: the bytes, or the temp file path"""
+        return self.path if self.path else self.data
+
+    def open(self):
+        """A fresh binary reader; BytesIO shares the bytes instead of copying"""
+        return open(self.path, "rb") if self.path else io.BytesIO(self.data)
+
+    def decode(self):
+        """Image.open over a fresh reader (pixels are loaded lazily)"""
+        return Image.open(self.open())
+
+    def close(self):
+        if self._finalizer is not None:
+            self._finalizer()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def sniff_header(head):
+    """
+    Return (format, width, height) parsed from the first bytes of an image,
+    or None when they are not (yet) enough to identify it.
+    """
+    try:
+        with Image.open(io.BytesIO(head)) as img:
+            return img.format, img.width, img.height
+    except Image.DecompressionBombError:
+        raise UploadRejected(413, "Image dimensions are too large")
+    except Exception:
+        return None
+
+
+def _check_header(header):
+    _, width, height = header
+    if width * height > MAX_IMAGE_PIXELS:
+        raise UploadRejected(413, f"Image dimensions are too large ({width}x{height})")
+
+
+def ingest_file(src, max_bytes=None, spool_memory_bytes=None):
+    """
+    Copy a readable binary file into an IngestedImage (blocking).
+    Raises UploadRejected as soon as a limit is exceeded.
+    """
+    max_bytes = MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    spool_memory_bytes = SPOOL_MEMORY_BYTES if spool_memory_bytes is None else spool_memory_bytes
+
+    chunks = []
+    head = bytearray()
+    header = None
+    size = 0
+    spool = None
+    try:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(413, f"Upload exceeds {max_bytes} bytes")
+
+            if header is None and len(head) < SNIFF_BYTES:
+                head += chunk
+                header = sniff_header(bytes(head))
+                if header is not None:
+                    _check_header(header)
+            elif header is None:
+                raise UploadRejected(415, "Unsupported or corrupt image")
+
+            if spool is not None:
+                spool.write(chunk)
+            elif size > spool_memory_bytes:
+                spool = tempfile.NamedTemporaryFile(prefix="upload-", suffix=".img", delete=False)
+                for c in chunks:
+                    spool.write(c)
+                spool.write(chunk)
+                chunks = []
+            else:
+                chunks.append(chunk)
+
+        if header is None:
+            raise UploadRejected(415 if size else 400, "Unsupported or corrupt image" if size else "Empty upload")
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            _remove(spool.name)
+        raise
+
+    fmt, width, height = header
+    if spool is not None:
+        spool.close()
+        return IngestedImage(fmt, width, height, size, path=spool.name)
+    return IngestedImage(fmt, width, height, size, data=b"".join(chunks))
+
+
+async def ingest_upload(file):
+    """Ingest a FastAPI UploadFile without reading it into memory at once"""
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise UploadRejected(413, f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+    with stage("ingest"):
+        await file.seek(0)
+        return await run_in_threadpool(ingest_file, file.file)
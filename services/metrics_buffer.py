@@ -0,0 +1,139 @@
+"""
+Write-behind buffer for guest prediction rows.
+
+/predict/guest only records a prediction for metrics, so there is no need to
+commit it inside the request. Rows are queued in memory and a background task
+inserts them in bulk, one transaction per batch (together with their
+/metrics counters), whenever the queue reaches
+FLUSH_SIZE rows or FLUSH_INTERVAL seconds pass. Shutdown drains the queue.
+"""
+import asyncio
+import os
+import threading
+from collections import deque
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from cores.instrumentation import stage
+from database import SessionLocal
+from services.counters import count_predictions
+
+FLUSH_SIZE = int(os.getenv("GUEST_METRICS_FLUSH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.getenv("GUEST_METRICS_FLUSH_INTERVAL", "1.0"))
+MAX_QUEUE = int(os.getenv("GUEST_METRICS_MAX_QUEUE", "10000"))
+
+INSERT_GUEST_PREDICTION = text("""
+INSERT INTO predictions (user_id, is_guest, image_url, public_id, predicted_category, confidence, weather_data, created_at)
+VALUES (NULL, 1, NULL, NULL, :outfit, :confidence, :weather_data, :created_at)
+""")
+
+
+class PredictionWriteBuffer:
+    def __init__(self, session_factory=SessionLocal, flush_size=FLUSH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_queue=MAX_QUEUE):
+        self.session_factory = session_factory
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._rows = deque()
+        self._lock = threading.Lock()
+        self._wakeup = None
+        self._worker = None
+        self.flushed = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+
+    def add(self, row):
+        """
+        Queue one row (dict with outfit, confidence, weather_data, created_at).
+        Never blocks; when the queue is full the row is dropped and counted.
+        """
+        with self._lock:
+            if len(self._rows) >= self.max_queue:
+                self.dropped += 1
+                return False
+            self._rows.append(row)
+            full = len(self._rows) >= self.flush_size
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _take_batch(self):
+        with self._lock:
+            count = min(len(self._rows), self.flush_size)
+            return [self._rows.popleft() for _ in range(count)]
+
+    def _write(self, rows):
+        db = self.session_factory()
+        try:
+            with stage("sqlite_insert"):
+                db.execute(INSERT_GUEST_PREDICTION, rows)
+                count_predictions(db, [(True, row["outfit"], row["created_at"]) for row in rows])
+                db.commit()
+        finally:
+            db.close()
+
+    def _requeue(self, rows):
+        with self._lock:
+            room = max(self.max_queue - len(self._rows), 0)
+            self._rows.extendleft(reversed(rows[:room]))
+            self.dropped += len(rows) - min(room, len(rows))
+
+    async def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        written = 0
+        while True:
+            rows = self._take_batch()
+            if not rows:
+                return written
+            try:
+                await run_in_threadpool(self._write, rows)
+            except Exception as e:
+                print(f"✗ Failed to flush {len(rows)} guest predictions: {e}")
+                self.failed_flushes += 1
+                self._requeue(rows)
+                return written
+            written += len(rows)
+            self.flushed += len(rows)
+            self.flushes += 1
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and drain the queue"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def stats(self):
+        with self._lock:
+            queued = len(self._rows)
+        return {
+            "queued": queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes
+        }
+
+
+guest_predictions = PredictionWriteBuffer()
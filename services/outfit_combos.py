@@ -0,0 +1,231 @@
+"""
+Outfit combination generator.
+
+Groups wardrobe items into slots (top, bottom, one-piece, footwear, outerwear,
+bag) and runs a bounded beam search to build complete, weather-suitable
+outfits. Outerwear is added on cold days and a bag whenever the wardrobe
+has one. Every slot is pre-filtered to its best few items first, so the work
+per request is O(slots * beam_width * per_slot) no matter how large the
+wardrobe is.
+"""
+import heapq
+from datetime import date
+
+from rules.outfit_weather import outfit_weather_check
+
+
+# Category -> slot. Unknown categories are ignored by the generator.
+SLOT_BY_CATEGORY = {
+    # Tops
+    "blouse": "top", "shirt": "top", "top": "top", "tshirt": "top",
+    "t-shirt": "top", "polo": "top", "kurti": "top", "sweatshirt": "top",
+    "sweater": "top", "hoodie": "top",
+    # Bottoms
+    "jeans": "bottom", "leggings": "bottom", "palazzo": "bottom",
+    "shorts": "bottom", "skirt": "bottom", "trouser": "bottom",
+    "trousers": "bottom",
+    # One-piece (replaces top + bottom)
+    "dress": "one_piece", "gown": "one_piece", "jumpsuit": "one_piece",
+    "saree": "one_piece", "lehenga": "one_piece",
+    # Footwear
+    "boots": "footwear", "flats": "footwear", "loafers": "footwear",
+    "sandals": "footwear", "shoe": "footwear", "sneakers": "footwear",
+    "heels": "footwear",
+    # Outerwear
+    "coat": "outerwear", "jacket": "outerwear",
+    # Bags
+    "bag": "bag", "backpack": "bag",
+}
+
+# Colors that go with anything; two identical non-neutral colors on top and
+# bottom get a small penalty.
+NEUTRAL_COLORS = {"black", "white", "grey", "gray", "beige", "navy", "denim", "brown", "cream"}
+
+# Below this daily minimum outfits get outerwear; items rejected only for the
+# cold are then kept (as a warning) if the wardrobe has outerwear to go on top.
+OUTERWEAR_TEMP = 15
+
+VERDICT_SCORES = {"✅": 1.0, "⚠": 0.5, "❌": 0.0}
+
+DEFAULT_PER_SLOT = 12
+DEFAULT_BEAM_WIDTH = 32
+
+
+def slot_for_category(category):
+    """Return the wardrobe slot for a category, or None if it has no slot"""
+    if not category:
+        return None
+    return SLOT_BY_CATEGORY.get(category.lower())
+
+
+def _verdict_score(category, weather, layered=False):
+    """
+    Map the rules verdict for a category to a score in [0, 1].
+
+    With `layered` set, a rejection caused only by the cold is softened to a
+    warning, since the outfit will get outerwear on top.
+    """
+    if not weather:
+        return 1.0
+    verdict = outfit_weather_check(
+        category,
+        weather["temp"],
+        weather.get("rain", 0),
+        min_temp=weather.get("min_temp"),
+        max_temp=weather.get("max_temp"),
+        rain_prob=weather.get("rain_prob") or 0,
+    )
+    if layered and "❌" in verdict and all("cold" in r.lower() for r in verdict.split(";")):
+        return VERDICT_SCORES["⚠"]
+    for symbol, score in VERDICT_SCORES.items():
+        if symbol in verdict:
+            return score
+    return 0.5
+
+
+def _recency_score(last_worn_date, today):
+    """1.0 for never worn, rising from 0 to 1 over 30 days since last wear"""
+    if last_worn_date is None:
+        return 1.0
+    days = (today - last_worn_date).days
+    return max(0.0, min(days, 30)) / 30.0
+
+
+def _needs_outerwear(weather):
+    if not weather:
+        return False
+    min_temp = weather.get("min_temp")
+    if min_temp is None:
+        min_temp = weather.get("temp")
+    return min_temp is not None and min_temp < OUTERWEAR_TEMP
+
+
+def score_item(item, weather=None, occasion=None, today=None, _verdicts=None, has_outerwear=False):
+    """
+    Score a single wardrobe item.
+
+    Returns None when the item is unsuitable for the weather, otherwise a
+    float combining weather fit, recency, occasion match and confidence.
+    `has_outerwear` says whether a coat or jacket is available to layer over it.
+    """
+    today = today or date.today()
+    category = (item.category or "").lower()
+    layered = (has_outerwear and _needs_outerwear(weather)
+               and slot_for_category(category) != "outerwear")
+
+    # The weather verdict only depends on the category, so cache it per call
+    if _verdicts is not None and category in _verdicts:
+        weather_fit = _verdicts[category]
+    else:
+        weather_fit = _verdict_score(category, weather, layered)
+        if _verdicts is not None:
+            _verdicts[category] = weather_fit
+
+    if weather_fit == 0.0:
+        return None
+
+    score = 2.0 * weather_fit + _recency_score(item.last_worn_date, today)
+    if occasion and item.occasion:
+        score += 0.5 if item.occasion.lower() == occasion.lower() else -0.25
+    if item.confidence is not None:
+        score += 0.1 * float(item.confidence)
+    return score
+
+
+def group_by_slot(items, weather=None, occasion=None, avoid_before=None,
+                  per_slot=DEFAULT_PER_SLOT, today=None):
+    """
+    Bucket items by slot and keep the best `per_slot` of each.
+
+    Items worn on or after `avoid_before` and items the weather rules reject
+    are dropped here, before any combinations are built.
+    """
+    today = today or date.today()
+    available = []
+    for item in items:
+        slot = slot_for_category(item.category)
+        if slot is None:
+            continue
+        if avoid_before and item.last_worn_date and item.last_worn_date >= avoid_before:
+            continue
+        available.append((slot, item))
+    # Outerwear first: only if some of it passes can cold-only rejections of
+    # the other items be softened
+    available.sort(key=lambda entry: entry[0] != "outerwear")
+
+    verdicts = {}
+    slots = {}
+    for slot, item in available:
+        score = score_item(item, weather, occasion, today, verdicts, bool(slots.get("outerwear")))
+        if score is None:
+            continue
+        slots.setdefault(slot, []).append((score, item.id, item))
+
+    return {
+        slot: heapq.nlargest(per_slot, entries, key=lambda e: (e[0], -e[1]))
+        for slot, entries in slots.items()
+    }
+
+
+def _pair_bonus(state_items, item):
+    """Compatibility of a new item with the items already chosen"""
+    bonus = 0.0
+    for other in state_items:
+        if item.occasion and other.occasion:
+            bonus += 0.2 if item.occasion.lower() == other.occasion.lower() else -0.1
+        if item.color and other.color:
+            color = item.color.lower()
+            if color == other.color.lower() and color not in NEUTRAL_COLORS:
+                bonus -= 0.3
+    return bonus
+
+
+def _expand(beam, candidates, beam_width):
+    """Extend every partial outfit in the beam with each candidate"""
+    expanded = []
+    for score, items in beam:
+        for item_score, _, item in candidates:
+            expanded.append((score + item_score + _pair_bonus(items, item), items + (item,)))
+    return heapq.nlargest(beam_width, expanded, key=lambda s: s[0])
+
+
+def generate_combinations(items, weather=None, occasion=None, avoid_before=None,
+                          top_k=5, beam_width=DEFAULT_BEAM_WIDTH,
+                          per_slot=DEFAULT_PER_SLOT, today=None):
+    """
+    Build the top-K complete outfits from a user's wardrobe.
+
+    An outfit is (top + bottom) or a one-piece, plus footwear, with
+    outerwear on cold days and a bag when one is available. `weather` is a dict with temp, rain, min_temp,
+    max_temp and rain_prob (as returned by services.weather); pass None to
+    skip weather filtering.
+
+    Returns a list of {"score": float, "items": [item, ...]} dicts, best first.
+    """
+    slots = group_by_slot(items, weather, occasion, avoid_before, per_slot, today)
+    if not slots.get("footwear"):
+        return []
+
+    # Base layer: both top+bottom and one-piece branches share the beam
+    beam = []
+    if slots.get("top") and slots.get("bottom"):
+        beam = _expand([(0.0, ())], slots["top"], beam_width)
+        beam = _expand(beam, slots["bottom"], beam_width)
+    if slots.get("one_piece"):
+        beam += _expand([(0.0, ())], slots["one_piece"], beam_width)
+    if not beam:
+        return []
+    # Average the base score so one-piece outfits compete fairly with two-item bases
+    beam = [(score / len(chosen), chosen) for score, chosen in beam]
+    beam = heapq.nlargest(beam_width, beam, key=lambda s: s[0])
+
+    beam = _expand(beam, slots["footwear"], beam_width)
+
+    # Outerwear only when the day gets cold; without weather it is left out
+    if _needs_outerwear(weather) and slots.get("outerwear"):
+        beam = _expand(beam, slots["outerwear"], beam_width)
+    if slots.get("bag"):
+        beam = _expand(beam, slots["bag"], beam_width)
+
+    best = heapq.nlargest(top_k, beam, key=lambda s: s[0])
+    return [{"score": round(score, 3), "items": list(chosen)} for score, chosen in best]
@@ -0,0 +1,156 @@
+"""
+Precomputed next-day outfit plans.
+
+The nightly job (precompute_plans.py) fetches one forecast per distinct saved
+location and stores each user's top combinations in the outfit_plans table.
+The suggestion endpoint then reads a single row per request and only rebuilds
+a plan when the user's wardrobe changed after it was built. Plans store item
+ids; the items are loaded (one query) and serialized like live suggestions
+when the plan is served, so image uploads finished since are reflected.
+"""
+import json
+from datetime import date, datetime, timedelta
+
+from models import Outfit, OutfitPlan, User
+from services import weather as weather_svc
+from services.outfit_combos import generate_combinations
+
+# Plans are built with the suggestion endpoint's default settings
+PLAN_TOP_K = 10
+PLAN_AVOID_DAYS = 7
+
+
+def location_key(user):
+    """Key used to share one forecast between users at the same place"""
+    if user.home_lat is not None and user.home_lon is not None:
+        return ("coords", round(user.home_lat, 2), round(user.home_lon, 2))
+    if user.home_city:
+        return ("city", user.home_city.strip().lower())
+    return None
+
+
+def _fetch_forecast(key, day):
+    if key[0] == "coords":
+        temp, rain_vol, details = weather_svc.get_daily_forecast(day, lat=key[1], lon=key[2])
+    else:
+        temp, rain_vol, details = weather_svc.get_daily_forecast(day, city=key[1])
+    return {
+        "temp": temp,
+        "rain": rain_vol,
+        "min_temp": details.get("min_temp"),
+        "max_temp": details.get("max_temp"),
+        "rain_prob": details.get("daily_rain_prob"),
+        "description": details.get("description")
+    }
+
+
+def serialize_combination(score, items):
+    """Response shape of one combination, for plans and live suggestions alike"""
+    return {"score": score, "items": [item.to_dict() for item in items]}
+
+
+def _load_combinations(db, user_id, stored):
+    """Stored {"score", "item_ids"} combinations -> response shape"""
+    ids = {item_id for combo in stored for item_id in combo["item_ids"]}
+    outfits = {}
+    if ids:
+        outfits = {
+            outfit.id: outfit
+            for outfit in db.query(Outfit).filter(Outfit.owner_id == user_id, Outfit.id.in_(ids))
+        }
+    return [
+        serialize_combination(combo["score"], [outfits[item_id] for item_id in combo["item_ids"]])
+        for combo in stored
+        if all(item_id in outfits for item_id in combo["item_ids"])
+    ]
+
+
+def build_plan(db, user_id, plan_date, weather):
+    """Compute and upsert one user's plan (the caller commits)"""
+    items = db.query(Outfit).filter(Outfit.owner_id == user_id).all()
+    combos = generate_combinations(
+        items,
+        weather=weather,
+        avoid_before=plan_date - timedelta(days=PLAN_AVOID_DAYS),
+        top_k=PLAN_TOP_K,
+        today=plan_date
+    )
+    payload = [
+        {"score": combo["score"], "item_ids": [item.id for item in combo["items"]]}
+        for combo in combos
+    ]
+
+    plan = db.get(OutfitPlan, user_id) or OutfitPlan(user_id=user_id)
+    plan.plan_date = plan_date
+    plan.built_at = datetime.utcnow()
+    plan.weather_data = json.dumps(weather, separators=(",", ":")) if weather else None
+    plan.plan = json.dumps(payload, separators=(",", ":"))
+    db.add(plan)
+    return plan
+
+
+def precompute_plans(db, plan_date=None):
+    """
+    Build plans for every active user (saved location + non-empty wardrobe).
+
+    Forecasts are fetched once per distinct location. Returns a summary dict.
+    """
+    plan_date = plan_date or date.today() + timedelta(days=1)
+
+    users = (
+        db.query(User)
+        .filter((User.home_city.isnot(None)) | (User.home_lat.isnot(None)))
+        .filter(User.outfits.any())
+        .all()
+    )
+
+    forecasts = {}
+    built = 0
+    for user in users:
+        key = location_key(user)
+        if key is None:
+            continue
+        if key not in forecasts:
+            forecasts[key] = _fetch_forecast(key, plan_date)
+        build_plan(db, user.id, plan_date, forecasts[key])
+        built += 1
+    db.commit()
+
+    return {
+        "plan_date": plan_date.isoformat(),
+        "users": built,
+        "forecasts_fetched": len(forecasts)
+    }
+
+
+def get_plan(db, user, today=None):
+    """
+    Return today's plan for a user as {"weather", "combinations", "built_at"}.
+
+    Returns None when no plan was built for today. A plan older than the
+    user's last wardrobe change is rebuilt in place with its stored weather.
+    """
+    today = today or date.today()
+    plan = db.get(OutfitPlan, user.id)
+    if plan is None or plan.plan_date != today:
+        return None
+
+    weather = json.loads(plan.weather_data) if plan.weather_data else None
+    stored = json.loads(plan.plan)
+    # Plans built before they stored item ids are rebuilt as well
+    outdated = any("item_ids" not in combo for combo in stored)
+    if outdated or (user.wardrobe_changed_at and user.wardrobe_changed_at > plan.built_at):
+        plan = build_plan(db, user.id, today, weather)
+        db.commit()
+        stored = json.loads(plan.plan)
+
+    return {
+        "weather": weather,
+        "combinations": _load_combinations(db, user.id, stored),
+        "built_at": plan.built_at.isoformat()
+    }
+
+
+def discard_plan(db, user_id):
+    """Drop a user's stored plan, e.g. after a location change (the caller commits)"""
+    db.query(OutfitPlan).filter(OutfitPlan.user_id == user_id).delete(synchronize_session=False)
@@ -0,0 +1,114 @@
+"""
+Visual similarity search within a user's wardrobe.
+
+Each outfit stores its feature vector (ml/extract_features) as a float16
+blob. Per user, the vectors are stacked once into an L2-normalized float32
+matrix and cached, tagged with the user's wardrobe_changed_at; a query is
+then a single matrix-vector product (cosine similarity, the same measure
+the classifier uses).
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from models import Outfit, PendingFeatures
+
+FEATURE_DTYPE = np.float16
+MAX_CACHED_USERS = 1000
+# Features of uploads that were never saved are dropped after this long
+PENDING_TTL = timedelta(days=7)
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def pack(features):
+    return np.asarray(features, dtype=FEATURE_DTYPE).tobytes()
+
+
+def unpack(blob):
+    return np.frombuffer(blob, dtype=FEATURE_DTYPE).astype(np.float32)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def pending_key(upload_id=None, image_url=None):
+    return f"upload:{upload_id}" if upload_id else f"url:{image_url}"
+
+
+def remember_upload_features(db, user_id, key, features=None, phash=None):
+    """
+    Keep an upload's features (array or packed blob) and perceptual hash
+    until it is saved (the caller commits)
+    """
+    now = datetime.utcnow()
+    db.query(PendingFeatures).filter(
+        PendingFeatures.user_id == user_id,
+        PendingFeatures.created_at < now - PENDING_TTL
+    ).delete(synchronize_session=False)
+    if features is not None and not isinstance(features, bytes):
+        features = pack(features)
+    db.merge(PendingFeatures(key=key, user_id=user_id, features=features, phash=phash, created_at=now))
+
+
+def attach_upload_features(db, outfit, key):
+    """Move pending features / hash for `key` onto a new outfit (the caller commits)"""
+    pending = db.get(PendingFeatures, key)
+    if pending is not None and pending.user_id == outfit.owner_id:
+        outfit.features = pending.features
+        outfit.phash = pending.phash
+        db.delete(pending)
+
+
+def get_matrix(db, user):
+    """(outfit ids, normalized feature matrix) for a user, cached per wardrobe version"""
+    version = user.wardrobe_changed_at
+    with _lock:
+        entry = _cache.get(user.id)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(user.id)
+            return entry[1], entry[2]
+
+    rows = (
+        db.query(Outfit.id, Outfit.features)
+        .filter(Outfit.owner_id == user.id, Outfit.features.isnot(None))
+        .all()
+    )
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    if rows:
+        matrix = _normalize(np.stack([unpack(row[1]) for row in rows]))
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+
+    with _lock:
+        _cache[user.id] = (version, ids, matrix)
+        _cache.move_to_end(user.id)
+        while len(_cache) > MAX_CACHED_USERS:
+            _cache.popitem(last=False)
+    return ids, matrix
+
+
+def invalidate(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def nearest(db, user, features, limit=5, exclude_id=None):
+    """[(outfit_id, score)] of the most similar outfits, best first"""
+    ids, matrix = get_matrix(db, user)
+    if len(ids) == 0:
+        return []
+    query = _normalize(np.asarray(features, dtype=np.float32))
+    scores = matrix @ query
+    if exclude_id is not None:
+        scores = np.where(ids == exclude_id, -np.inf, scores)
+
+    k = min(limit, len(ids))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(int(ids[i]), round(float(scores[i]), 4)) for i in top if np.isfinite(scores[i])]
@@ -0,0 +1,271 @@
+"""
+Deferred, durable image uploads (outbox pattern).
+
+Endpoints spool the image bytes to a local directory and insert an
+UploadJob row in the same transaction as their Prediction/Outfit row, then
+return immediately with image_status="pending". A background worker uploads
+spooled images with bounded concurrency and retries, then backfills
+image_url/public_id on every row linked to the job.
+
+Jobs live in the database and the bytes on disk, so pending uploads survive
+a restart: the worker picks them up again on startup.
+"""
+import asyncio
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from database import BASE_DIR, SessionLocal
+from models import UploadJob, Prediction, Outfit
+from services import change_feed
+
+# Set DEFERRED_UPLOADS=0 to upload inline, inside the request
+DEFERRED_UPLOADS = os.getenv("DEFERRED_UPLOADS", "1") == "1"
+SPOOL_DIR = Path(os.getenv("UPLOAD_SPOOL_DIR", str(BASE_DIR / "upload_spool")))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+UPLOAD_MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", "5"))
+UPLOAD_RETRY_BASE_SECONDS = float(os.getenv("UPLOAD_RETRY_BASE_SECONDS", "2"))
+UPLOAD_POLL_SECONDS = float(os.getenv("UPLOAD_POLL_SECONDS", "5"))
+# "cloudinary" (default) or "local" (filesystem stand-in, for tests/dev)
+UPLOAD_BACKEND = os.getenv("UPLOAD_BACKEND", "cloudinary")
+UPLOAD_LOCAL_DIR = os.getenv("UPLOAD_LOCAL_DIR", str(BASE_DIR / "local_uploads"))
+
+
+class LocalUploader:
+    """
+    Filesystem stand-in for the Cloudinary API.
+    Same call signature and result keys as upload_image_to_cloudinary.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def __call__(self, file, folder="wardrobe"):
+        public_id = f"{folder}/{uuid.uuid4().hex}"
+        target = self.root / public_id
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(file, (bytes, bytearray)):
+            target.write_bytes(file)
+        else:
+            shutil.copyfile(file, target)
+        return {
+            "secure_url": target.resolve().as_uri(),
+            "public_id": public_id,
+            "format": None,
+            "width": None,
+            "height": None
+        }
+
+
+def get_uploader():
+    """Return the configured upload function: (file, folder) -> result dict"""
+    if UPLOAD_BACKEND == "local":
+        return LocalUploader(UPLOAD_LOCAL_DIR)
+    # Imported lazily: cloudinary_config validates credentials on import
+    from cloudinary_config import upload_image_to_cloudinary
+    return upload_image_to_cloudinary
+
+
+def spool_image(image, spool_dir=None):
+    """
+    Write an image (bytes, or the path of an ingested upload) to the spool
+    directory atomically; returns the path
+    """
+    spool_dir = Path(spool_dir or SPOOL_DIR)
+    spool_dir.mkdir(parents=True, exist_ok=True)
+    path = spool_dir / f"{uuid.uuid4().hex}.img"
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        if isinstance(image, (bytes, bytearray)):
+            f.write(image)
+        else:
+            with open(image, "rb") as src:
+                shutil.copyfileobj(src, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return str(path)
+
+
+def create_job(db, user_id, spool_path, folder="wardrobe"):
+    """Insert an UploadJob for an already spooled file (the caller commits)"""
+    job = UploadJob(user_id=user_id, folder=folder, spool_path=spool_path, status="pending")
+    db.add(job)
+    db.flush()
+    return job
+
+
+def create_jobs(db, user_id, spool_paths, folder="wardrobe"):
+    """create_job for many files with one flush (the caller commits)"""
+    jobs = [UploadJob(user_id=user_id, folder=folder, spool_path=path, status="pending") for path in spool_paths]
+    db.add_all(jobs)
+    db.flush()
+    return jobs
+
+
+def _record_outfit_changes(db, job_id):
+    """Put outfits whose image state just changed on the sync change feed"""
+    rows = db.query(Outfit.id, Outfit.owner_id).filter(Outfit.upload_id == job_id).all()
+    for outfit_id, owner_id in rows:
+        change_feed.record(db, owner_id, [outfit_id])
+
+
+class UploadOutbox:
+    def __init__(self, uploader=None, session_factory=SessionLocal,
+                 concurrency=UPLOAD_CONCURRENCY, max_attempts=UPLOAD_MAX_ATTEMPTS,
+                 retry_base_seconds=UPLOAD_RETRY_BASE_SECONDS, poll_seconds=UPLOAD_POLL_SECONDS):
+        self._uploader = uploader
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_seconds = poll_seconds
+        self._wakeup = None
+        self._worker = None
+
+    @property
+    def uploader(self):
+        if self._uploader is None:
+            self._uploader = get_uploader()
+        return self._uploader
+
+    def notify(self):
+        """Wake the worker after new jobs were committed"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run(self):
+        # Uploads interrupted by a restart are retried
+        await run_in_threadpool(self._reset_interrupted)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Upload outbox error: {e}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def _reset_interrupted(self):
+        db = self.session_factory()
+        try:
+            db.query(UploadJob).filter(UploadJob.status == "uploading").update(
+                {UploadJob.status: "pending"}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim_due_jobs(self):
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            jobs = (
+                db.query(UploadJob)
+                .filter(UploadJob.status == "pending")
+                .filter((UploadJob.next_attempt_at.is_(None)) | (UploadJob.next_attempt_at <= now))
+                .order_by(UploadJob.id)
+                .limit(self.concurrency * 8)
+                .all()
+            )
+            claimed = [(job.id, job.spool_path, job.folder) for job in jobs]
+            for job in jobs:
+                job.status = "uploading"
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    async def run_once(self):
+        """Upload every job that is currently due; returns the number processed"""
+        claimed = await run_in_threadpool(self._claim_due_jobs)
+        if not claimed:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def process(job_id, spool_path, folder):
+            async with semaphore:
+                try:
+                    result = await run_in_threadpool(self.uploader, spool_path, folder=folder)
+                except Exception as e:
+                    await run_in_threadpool(self._record_failure, job_id, str(e))
+                    return
+                await run_in_threadpool(self._record_success, job_id, result)
+
+        await asyncio.gather(*(process(*job) for job in claimed))
+        return len(claimed)
+
+    def _record_success(self, job_id, result):
+        db = self.session_factory()
+        try:
+            job = db.get(UploadJob, job_id)
+            job.status = "done"
+            job.image_url = result["secure_url"]
+            job.public_id = result["public_id"]
+            job.last_error = None
+            spool_path, job.spool_path = job.spool_path, None
+
+            backfill = {"image_url": job.image_url, "public_id": job.public_id, "image_status": "ready"}
+            for model in (Prediction, Outfit):
+                db.query(model).filter(model.upload_id == job_id).update(
+                    {getattr(model, k): v for k, v in backfill.items()}, synchronize_session=False
+                )
+            _record_outfit_changes(db, job_id)
+            db.commit()
+        finally:
+            db.close()
+
+        if spool_path and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+    def _record_failure(self, job_id, error):
+        spool_path = None
+        db = self.session_factory()
+        try:
+            job = db.get(UploadJob, job_id)
+            job.attempts += 1
+            job.last_error = error[:500]
+            if job.attempts >= self.max_attempts:
+                # Failed jobs are never retried: drop their spooled bytes
+                job.status = "failed"
+                spool_path, job.spool_path = job.spool_path, None
+                for model in (Prediction, Outfit):
+                    db.query(model).filter(model.upload_id == job_id).update(
+                        {model.image_status: "failed"}, synchronize_session=False
+                    )
+                _record_outfit_changes(db, job_id)
+                print(f"Upload job {job_id} failed permanently: {error}")
+            else:
+                job.status = "pending"
+                delay = self.retry_base_seconds * (2 ** (job.attempts - 1))
+                job.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            db.commit()
+        finally:
+            db.close()
+
+        if spool_path and os.path.exists(spool_path):
+            os.remove(spool_path)
+
+
+outbox = UploadOutbox()
@@ -0,0 +1,88 @@
+"""
+Paginated, column-projected outfit listings.
+
+List endpoints select only the requested columns (no ORM instances) and
+page newest-first on (created_at, id) with an opaque cursor (outfits without
+created_at come last). Rows come out
+in the same shape as Outfit.to_dict(), restricted to the requested fields.
+"""
+from datetime import date, datetime
+
+from cores.utils import encode_cursor, keyset_before
+from database import datetime_key, desc_nulls_last
+from models import Outfit
+
+# Same keys, in the same order, as Outfit.to_dict()
+OUTFIT_FIELDS = {
+    "id": Outfit.id,
+    "image_url": Outfit.image_url,
+    "public_id": Outfit.public_id,
+    "image_status": Outfit.image_status,
+    "category": Outfit.category,
+    "color": Outfit.color,
+    "occasion": Outfit.occasion,
+    "last_worn_date": Outfit.last_worn_date,
+    "confidence": Outfit.confidence,
+    "notes": Outfit.notes,
+    "owner_id": Outfit.owner_id,
+    "created_at": Outfit.created_at,
+    "updated_at": Outfit.updated_at,
+}
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# See database.datetime_key: cursor positions round-trip exactly
+_created_key = datetime_key(Outfit.created_at)
+
+
+def parse_fields(fields):
+    """Comma-separated field list -> list of names (all fields when empty)"""
+    if not fields:
+        return list(OUTFIT_FIELDS)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in OUTFIT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _serialize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def list_outfits(db, user_id, filters=(), fields=None, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    One page of a user's outfits matching `filters` (SQLAlchemy criteria).
+    Returns {"count", "outfits", "next_cursor"}; raises ValueError on a bad
+    fields list, cursor or limit.
+    """
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    names = parse_fields(fields)
+
+    query = (
+        db.query(
+            *(OUTFIT_FIELDS[name].label(name) for name in names),
+            Outfit.id.label("_id"),
+            _created_key.label("_created_key")
+        )
+        .filter(Outfit.owner_id == user_id, *filters)
+    )
+    if cursor:
+        query = query.filter(keyset_before(_created_key, Outfit.id, cursor))
+
+    rows = query.order_by(desc_nulls_last(_created_key), Outfit.id.desc()).limit(limit + 1).all()
+    page = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(page[-1]._created_key, page[-1]._id)
+
+    return {
+        "count": len(page),
+        "outfits": [{name: _serialize(getattr(row, name)) for name in names} for row in page],
+        "next_cursor": next_cursor
+    }
@@ -0,0 +1,26 @@
+"""
+Bookkeeping shared by every endpoint that changes a user's wardrobe.
+"""
+from datetime import datetime
+
+from models import User
+from services import wardrobe_stats, similarity, dedup
+
+
+def mark_wardrobe_changed(db, user_id):
+    """
+    Record that a user's wardrobe changed.
+
+    Runs inside the caller's transaction (no commit here), so the marker is
+    only visible once the mutation itself is committed.
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {User.wardrobe_changed_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+    # Cached stats, similarity matrices and duplicate indexes are also keyed
+    # on the marker, so a request that rebuilds them before this commit cannot
+    # keep the old ones.
+    wardrobe_stats.invalidate(user_id)
+    similarity.invalidate(user_id)
+    dedup.invalidate(user_id)
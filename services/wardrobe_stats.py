@@ -0,0 +1,67 @@
+"""
+Wardrobe statistics: one grouped query per computation, cached per user.
+
+A cache entry is tagged with the user's wardrobe_changed_at and the day it
+was computed, so it is reused until a wardrobe mutation (save, update,
+delete, wear) bumps the marker or the 7-day window moves. Mutations also
+drop the entry eagerly through invalidate().
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from sqlalchemy import case, func
+
+from models import Outfit
+
+MAX_CACHED_USERS = 10000
+RECENT_DAYS = 7
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def compute_stats(db, user_id, today=None):
+    """All stats fields from a single GROUP BY category query"""
+    week_ago = (today or date.today()) - timedelta(days=RECENT_DAYS)
+    rows = (
+        db.query(
+            Outfit.category,
+            func.count(Outfit.id),
+            func.sum(case((Outfit.last_worn_date.is_(None), 1), else_=0)),
+            func.sum(case((Outfit.last_worn_date >= week_ago, 1), else_=0))
+        )
+        .filter(Outfit.owner_id == user_id)
+        .group_by(Outfit.category)
+        .all()
+    )
+    return {
+        "total_outfits": sum(row[1] for row in rows),
+        "categories": {row[0]: row[1] for row in rows},
+        "never_worn": sum(row[2] or 0 for row in rows),
+        "recently_worn_7_days": sum(row[3] or 0 for row in rows)
+    }
+
+
+def get_stats(db, user, today=None):
+    """Cached stats for a user (a User row, for its wardrobe_changed_at)"""
+    today = today or date.today()
+    version = (user.wardrobe_changed_at, today)
+    with _lock:
+        entry = _cache.get(user.id)
+        if entry is not None and entry[0] == version:
+            _cache.move_to_end(user.id)
+            return entry[1]
+
+    stats = compute_stats(db, user.id, today)
+    with _lock:
+        _cache[user.id] = (version, stats)
+        _cache.move_to_end(user.id)
+        while len(_cache) > MAX_CACHED_USERS:
+            _cache.popitem(last=False)
+    return stats
+
+
+def invalidate(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
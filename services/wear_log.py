@@ -0,0 +1,189 @@
+"""
+Wear history: an append-only wear_events log plus per-outfit rollups.
+
+record_wear() appends an event and bumps the outfit's rollup in the same
+transaction, with a single upsert so concurrent wears of one outfit neither
+collide on the first insert nor lose an increment. The 30/90-day window counts are kept current lazily: when a
+user's rollups were last rolled on an earlier day, roll_forward() subtracts
+only the events that have since left a window (a small indexed range of
+wear_events), so rotation and most-worn reads cost O(items).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models import Outfit, OutfitWearStats, WearEvent
+
+WINDOWS = {"worn_30d": 30, "worn_90d": 90}
+SUPPORTED_DIALECTS = ("sqlite", "postgresql", "mysql")
+
+
+def _build_upsert(dialect):
+    """INSERT a first-wear rollup, or add one wear to the existing row"""
+    if dialect == "sqlite":
+        least, greatest = func.min, func.max
+    else:
+        least, greatest = func.least, func.greatest
+    if dialect == "mysql":
+        insert = mysql.insert(OutfitWearStats)
+        new = insert.inserted
+    else:
+        insert = (sqlite if dialect == "sqlite" else postgresql).insert(OutfitWearStats)
+        new = insert.excluded
+    updates = {
+        "wear_count": OutfitWearStats.wear_count + 1,
+        "worn_30d": OutfitWearStats.worn_30d + 1,
+        "worn_90d": OutfitWearStats.worn_90d + 1,
+        "first_worn_on": least(func.coalesce(OutfitWearStats.first_worn_on, new.first_worn_on), new.first_worn_on),
+        "last_worn_on": greatest(func.coalesce(OutfitWearStats.last_worn_on, new.last_worn_on), new.last_worn_on),
+    }
+    if dialect == "mysql":
+        return insert.on_duplicate_key_update(**updates)
+    return insert.on_conflict_do_update(index_elements=[OutfitWearStats.outfit_id], set_=updates)
+
+
+UPSERT_WEAR = {dialect: _build_upsert(dialect) for dialect in SUPPORTED_DIALECTS}
+
+
+def _dialect(db):
+    dialect = db.get_bind().dialect.name
+    if dialect not in SUPPORTED_DIALECTS:
+        raise NotImplementedError(f"Wear rollups do not support {dialect}")
+    return dialect
+
+
+def roll_forward(db, user_id, today=None):
+    """Bring a user's window counts up to `today` (the caller commits)"""
+    today = today or date.today()
+    stale = (
+        db.query(OutfitWearStats)
+        .filter(OutfitWearStats.user_id == user_id, OutfitWearStats.rolled_on < today)
+        .all()
+    )
+    if not stale:
+        return 0
+
+    # An event counted on rolled_on r has left window N by today
+    # when r - N < worn_on <= today - N
+    oldest = min(stats.rolled_on for stats in stale)
+    events = (
+        db.query(WearEvent.outfit_id, WearEvent.worn_on)
+        .filter(
+            WearEvent.user_id == user_id,
+            WearEvent.worn_on > oldest - timedelta(days=max(WINDOWS.values())),
+            WearEvent.worn_on <= today - timedelta(days=min(WINDOWS.values()))
+        )
+        .all()
+    )
+    by_outfit = defaultdict(list)
+    for outfit_id, worn_on in events:
+        by_outfit[outfit_id].append(worn_on)
+
+    for stats in stale:
+        for column, days in WINDOWS.items():
+            window = timedelta(days=days)
+            expired = sum(
+                1 for worn_on in by_outfit.get(stats.outfit_id, ())
+                if stats.rolled_on - window < worn_on <= today - window
+            )
+            if expired:
+                setattr(stats, column, max(getattr(stats, column) - expired, 0))
+        stats.rolled_on = today
+    return len(stale)
+
+
+def record_wear(db, outfit, worn_on=None):
+    """Append a wear event and update the outfit's rollup (the caller commits)"""
+    worn_on = worn_on or date.today()
+    roll_forward(db, outfit.owner_id, worn_on)
+
+    db.add(WearEvent(outfit_id=outfit.id, user_id=outfit.owner_id, worn_on=worn_on))
+    db.flush()
+    db.execute(UPSERT_WEAR[_dialect(db)].values(
+        outfit_id=outfit.id, user_id=outfit.owner_id,
+        wear_count=1, worn_30d=1, worn_90d=1,
+        first_worn_on=worn_on, last_worn_on=worn_on, rolled_on=worn_on
+    ))
+    return db.get(OutfitWearStats, outfit.id, populate_existing=True)
+
+
+def forget_outfit(db, outfit_id):
+    """Drop the history of a deleted outfit (the caller commits)"""
+    db.query(WearEvent).filter(WearEvent.outfit_id == outfit_id).delete(synchronize_session=False)
+    db.query(OutfitWearStats).filter(OutfitWearStats.outfit_id == outfit_id).delete(synchronize_session=False)
+
+
+def _rollup(stats):
+    fields = stats.to_dict()
+    del fields["outfit_id"]
+    return fields
+
+
+def _outfit_summary(outfit):
+    return {
+        "id": outfit.id,
+        "category": outfit.category,
+        "color": outfit.color,
+        "occasion": outfit.occasion,
+        "image_url": outfit.image_url
+    }
+
+
+def most_worn(db, user_id, window="all", limit=10, today=None):
+    """
+    Outfits ordered by wear count overall ("all") or within the "30d"/"90d"
+    window. Rolls the rollups forward first (the caller commits).
+    """
+    column = {
+        "all": OutfitWearStats.wear_count,
+        "30d": OutfitWearStats.worn_30d,
+        "90d": OutfitWearStats.worn_90d
+    }[window]
+    roll_forward(db, user_id, today)
+    rows = (
+        db.query(OutfitWearStats, Outfit.id, Outfit.category, Outfit.color, Outfit.occasion, Outfit.image_url)
+        .join(Outfit, Outfit.id == OutfitWearStats.outfit_id)
+        .filter(OutfitWearStats.user_id == user_id, column > 0)
+        .order_by(column.desc(), OutfitWearStats.last_worn_on.desc())
+        .limit(limit)
+        .all()
+    )
+    return [{**_outfit_summary(row), **_rollup(row[0])} for row in rows]
+
+
+def rotation(db, user_id, today=None):
+    """
+    How evenly the wardrobe is worn: per-outfit rollups (zero for never
+    worn items) and the share of items worn within 30 and 90 days.
+    """
+    today = today or date.today()
+    roll_forward(db, user_id, today)
+    rows = (
+        db.query(Outfit.id, Outfit.category, Outfit.color, Outfit.occasion, Outfit.image_url, OutfitWearStats)
+        .outerjoin(OutfitWearStats, OutfitWearStats.outfit_id == Outfit.id)
+        .filter(Outfit.owner_id == user_id)
+        .all()
+    )
+    items = []
+    for row in rows:
+        stats = row[-1]
+        item = _outfit_summary(row)
+        if stats is not None:
+            item.update(_rollup(stats))
+            item["days_since_worn"] = (today - stats.last_worn_on).days
+        else:
+            item.update(wear_count=0, worn_30d=0, worn_90d=0,
+                        first_worn_on=None, last_worn_on=None, days_since_worn=None)
+        items.append(item)
+
+    total = len(items)
+    items.sort(key=lambda i: (i["worn_90d"], i["wear_count"]))
+    return {
+        "total_outfits": total,
+        "worn_30d_share": round(sum(1 for i in items if i["worn_30d"]) / total, 3) if total else 0.0,
+        "worn_90d_share": round(sum(1 for i in items if i["worn_90d"]) / total, 3) if total else 0.0,
+        "never_worn": sum(1 for i in items if not i["wear_count"]),
+        "outfits": items
+    }
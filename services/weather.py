@@ -3,138 +3,165 @@ import requests
 from dotenv import load_dotenv
 from datetime import datetime
 
+from cores.instrumentation import timed
+
 # Load environment variables from .env file
 load_dotenv()
 
-def get_weather(city=None, lat=None, lon=None):
-    API_KEY = os.getenv("OPENWEATHER_API_KEY")
-    # Graceful fallback instead of crash
-    if not API_KEY:
-        print("WARNING: OPENWEATHER_API_KEY is not set. Returning default/empty weather data.")
-        return 20, 0, {
-            "humidity": None, "clouds": None, "description": "Unknown",
-            "sun_exposure": "Unknown", "min_temp": 20, "max_temp": 20, 
-            "daily_rain_prob": 0
-        }
-    
-    city = city.strip() if city else ""
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+DEFAULT_TEMP = 20
+
 
-    # Default fallback details
-    default_details = {
-        "humidity": None, 
-        "clouds": None, 
-        "description": "Unknown", 
+def _default_details():
+    """Details returned when no forecast is available"""
+    return {
+        "humidity": None,
+        "clouds": None,
+        "description": "Unknown",
         "sun_exposure": "Unknown",
-        "min_temp": 20,
-        "max_temp": 20,
+        "min_temp": DEFAULT_TEMP,
+        "max_temp": DEFAULT_TEMP,
         "daily_rain_prob": 0
     }
 
-    # If coordinates provided, prefer them
-    if lat is not None and lon is not None:
-        source = f"lat={lat}, lon={lon}"
-    elif not city:
-        print("City name is empty and no coordinates provided")
-        return 20, 0, default_details
-    else:
-        source = city
 
-    # Use 5 day / 3 hour forecast to get daily min/max
-    url = "https://api.openweathermap.org/data/2.5/forecast"
+def _fetch_forecast(city=None, lat=None, lon=None):
+    """
+    The 3-hourly entries of the 5 day forecast for coordinates (preferred)
+    or a city, with a description of the location for logging.
+    Returns (None, source) when there is no API key or location, or the
+    request fails.
+    """
+    API_KEY = os.getenv("OPENWEATHER_API_KEY")
+    # Graceful fallback instead of crash
+    if not API_KEY:
+        print("WARNING: OPENWEATHER_API_KEY is not set. Returning default/empty weather data.")
+        return None, None
+
+    city = city.strip() if city else ""
     params = {
         "appid": API_KEY,
         "units": "metric"
     }
+    # If coordinates provided, prefer them
     if lat is not None and lon is not None:
         params.update({"lat": lat, "lon": lon})
-    else:
+        source = f"lat={lat}, lon={lon}"
+    elif city:
         params.update({"q": city})
+        source = city
+    else:
+        print("City name is empty and no coordinates provided")
+        return None, None
 
     try:
-        response = requests.get(url, params=params, timeout=5)
+        response = requests.get(FORECAST_URL, params=params, timeout=5)
         data = response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"Network error fetching weather for {source}: {e}")
+        return None, source
 
-        if response.status_code != 200:
-            print(f"Weather API error for {source}: {data}")
-            return 20, 0, default_details
-
-        # Get current items for today (approximate by taking first 8 intervals = 24h)
-        # Or better: filter by date.
-        
-        forecast_list = data.get("list", [])
-        if not forecast_list:
-            return 20, 0, default_details
-
-        # Current weather is roughly the first item
-        current = forecast_list[0]
-        current_temp = current.get("main", {}).get("temp", 20)
-        current_humidity = current.get("main", {}).get("humidity")
-        current_clouds = current.get("clouds", {}).get("all")
-        current_desc = current.get("weather", [{}])[0].get("description", "Unknown")
-
-        # Calculate daily min/max and rain prob from the next 24h (8 items)
-        next_24h = forecast_list[:8]
-        temps = [item.get("main", {}).get("temp") for item in next_24h]
-        min_temp = min(temps)
-        max_temp = max(temps)
-        
-        # Rain probability (pop is Probability of Precipitation)
-        # Max pop in next 24h
-        pops = [item.get("pop", 0) for item in next_24h]
-        max_pop = max(pops)
-        daily_rain_prob = max_pop * 100 # Convert to percentage
-
-        # Determine overall rain volume (approx)
-        total_rain_vol = 0
-        for item in next_24h:
-            rain_info = item.get("rain", {})
-            total_rain_vol += rain_info.get("3h", 0)
-
-        # Approximate sun exposure
-        sun_exposure = "Unknown"
-        try:
-            if current_clouds is None:
-                sun_exposure = "Unknown"
-            elif current_clouds < 30 and current_temp >= 25:
-                sun_exposure = "☀ Strong sun exposure"
-            elif current_clouds < 50 and current_temp >= 20:
-                sun_exposure = "☀ Moderate sun exposure"
-            else:
-                sun_exposure = "☁ Low sun exposure"
-        except Exception:
+    if response.status_code != 200:
+        print(f"Weather API error for {source}: {data}")
+        return None, source
+    return data.get("list", []), source
+
+
+def _aggregate(items):
+    """(min_temp, max_temp, rain probability %, total rain mm) over forecast entries"""
+    temps = [item.get("main", {}).get("temp") for item in items]
+    # pop is the Probability of Precipitation; take the highest
+    pops = [item.get("pop", 0) for item in items]
+    total_rain_vol = sum(item.get("rain", {}).get("3h", 0) for item in items)
+    return min(temps), max(temps), max(pops) * 100, total_rain_vol
+
+
+@timed("get_weather")
+def get_weather(city=None, lat=None, lon=None):
+    """
+    Current temperature, rain volume over the next 24h (mm) and details
+    (humidity, clouds, description, sun exposure, 24h min/max and rain
+    probability). Falls back to defaults when no forecast is available.
+    """
+    forecast_list, source = _fetch_forecast(city, lat, lon)
+    if not forecast_list:
+        return DEFAULT_TEMP, 0, _default_details()
+
+    # Current weather is roughly the first item
+    current = forecast_list[0]
+    current_temp = current.get("main", {}).get("temp", DEFAULT_TEMP)
+    current_humidity = current.get("main", {}).get("humidity")
+    current_clouds = current.get("clouds", {}).get("all")
+    current_desc = current.get("weather", [{}])[0].get("description", "Unknown")
+
+    # Daily min/max, rain probability and volume from the next 24h (8 items)
+    min_temp, max_temp, daily_rain_prob, total_rain_vol = _aggregate(forecast_list[:8])
+
+    # Approximate sun exposure
+    sun_exposure = "Unknown"
+    try:
+        if current_clouds is None:
             sun_exposure = "Unknown"
+        elif current_clouds < 30 and current_temp >= 25:
+            sun_exposure = "☀ Strong sun exposure"
+        elif current_clouds < 50 and current_temp >= 20:
+            sun_exposure = "☀ Moderate sun exposure"
+        else:
+            sun_exposure = "☁ Low sun exposure"
+    except Exception:
+        sun_exposure = "Unknown"
 
-        # Humidity descriptor
-        humidity_desc = None
-        if current_humidity is not None:
-            if current_humidity <= 40:
-                humidity_desc = " Low humidity"
-            elif current_humidity <= 70:
-                humidity_desc = " Moderate humidity"
-            else:
-                humidity_desc = " High humidity"
-
-        details = {
-            "humidity": current_humidity,
-            "humidity_desc": humidity_desc,
-            "clouds": current_clouds,
-            "description": current_desc,
-            "sun_exposure": sun_exposure,
-            "min_temp": min_temp,
-            "max_temp": max_temp,
-            "daily_rain_prob": daily_rain_prob
-        }
-
-        print(f"Weather data for {source}: current={current_temp}, min={min_temp}, max={max_temp}, rain_prob={daily_rain_prob}%")
-        
-        # Return current_temp for main logic, but pass daily stats in details
-        # Pass predicted rain (pop) as the main rain metric if it's high, or volume
-        # The original code expected rain volume in mm? or boolean?
-        # Original: rain = data.get("rain", {}).get("1h", 0) -> This is mm.
-        # Let's return total_rain_vol for compatibility but use max_pop for advice.
-        
-        return current_temp, total_rain_vol, details
+    # Humidity descriptor
+    humidity_desc = None
+    if current_humidity is not None:
+        if current_humidity <= 40:
+            humidity_desc = " Low humidity"
+        elif current_humidity <= 70:
+            humidity_desc = " Moderate humidity"
+        else:
+            humidity_desc = " High humidity"
+
+    details = {
+        "humidity": current_humidity,
+        "humidity_desc": humidity_desc,
+        "clouds": current_clouds,
+        "description": current_desc,
+        "sun_exposure": sun_exposure,
+        "min_temp": min_temp,
+        "max_temp": max_temp,
+        "daily_rain_prob": daily_rain_prob
+    }
 
-    except requests.exceptions.RequestException as e:
-        print(f"Network error fetching weather for {city}: {e}")
-        return 20, 0, default_details
+    print(f"Weather data for {source}: current={current_temp}, min={min_temp}, max={max_temp}, rain_prob={daily_rain_prob}%")
+
+    # Return current_temp for main logic, but pass daily stats in details.
+    # Rain volume (mm) is kept for compatibility; advice uses the probability.
+    return current_temp, total_rain_vol, details
+
+
+def get_daily_forecast(day, city=None, lat=None, lon=None):
+    """
+    Forecast summary for a single calendar day (e.g. tomorrow).
+
+    Returns the same (temp, rain_vol, details) shape as get_weather, where
+    temp is the forecast closest to midday and min/max/rain_prob cover the
+    whole day.
+    """
+    forecast_list, _ = _fetch_forecast(city, lat, lon)
+    day_prefix = day.isoformat()
+    items = [item for item in forecast_list or [] if item.get("dt_txt", "").startswith(day_prefix)]
+    if not items:
+        return DEFAULT_TEMP, 0, _default_details()
+
+    midday = min(items, key=lambda item: abs(int(item["dt_txt"][11:13]) - 12))
+    min_temp, max_temp, daily_rain_prob, total_rain_vol = _aggregate(items)
+    details = {
+        **_default_details(),
+        "humidity": midday.get("main", {}).get("humidity"),
+        "clouds": midday.get("clouds", {}).get("all"),
+        "description": midday.get("weather", [{}])[0].get("description", "Unknown"),
+        "min_temp": min_temp,
+        "max_temp": max_temp,
+        "daily_rain_prob": daily_rain_prob
+    }
+    return midday.get("main", {}).get("temp", DEFAULT_TEMP), total_rain_vol, details
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+import auth
+from models import User
+
+
+def _bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_principal_is_cached_until_password_change_or_delete(db_session_with_statements):
+    auth.principal_cache.clear()
+    db, queries = db_session_with_statements
+    user = User(email="a@x.com", password="old")
+    db.add(user)
+    db.commit()
+    token = auth.create_access_token({"sub": user.email, "uid": user.id})
+
+    assert auth.get_current_principal(_bearer(token), db) == (user.id, "a@x.com")
+    queries.clear()
+    assert auth.get_current_principal(_bearer(token), db).id == user.id
+    assert queries == []
+
+    user.password = "new"
+    db.commit()
+    assert auth.principal_cache.get(token) is None
+    with pytest.raises(HTTPException):
+        auth.get_current_principal(_bearer(token), db)
+    assert auth.principal_cache.get(token) is None
+
+    token = auth.create_access_token({"sub": user.email, "uid": user.id, "ver": user.token_version})
+    auth.get_current_principal(_bearer(token), db)
+    assert auth.principal_cache.get(token) is not None
+
+    db.delete(user)
+    db.commit()
+    with pytest.raises(HTTPException):
+        auth.get_current_principal(_bearer(token), db)
+
+
+def test_cache_entries_expire():
+    cache = auth.PrincipalCache(ttl=0.05)
+    cache.put("t", auth.Principal(1, "a@x.com"))
+    assert cache.get("t") == (1, "a@x.com")
+    cache.put("expired-token", auth.Principal(1, "a@x.com"), token_exp=0)
+    assert cache.get("expired-token") is None
+    time.sleep(0.06)
+    assert cache.get("t") is None
+
+
+def test_tokens_without_a_version_work_until_the_password_changes(db_session):
+    auth.principal_cache.clear()
+    user = User(email="a@x.com", password="old")
+    db_session.add(user)
+    db_session.commit()
+    token = auth.create_access_token({"sub": user.email, "uid": user.id})
+    assert auth.get_current_principal(_bearer(token), db_session).id == user.id
+
+    user.password = "new"
+    db_session.commit()
+    assert user.token_version == 1
+    with pytest.raises(HTTPException):
+        auth.get_current_principal(_bearer(token), db_session)
@@ -0,0 +1,42 @@
+import asyncio
+import glob
+
+from PIL import Image
+
+from ml.batcher import MicroBatcher
+from ml.classifier import predict_outfit_type
+from ml.extract_features import extract_features
+
+
+def _images():
+    paths = sorted(p for p in glob.glob("reference_images/*/*") if p.endswith((".jpg", ".jpeg", ".png")))
+    return [Image.open(p).convert("RGB") for p in paths[:12]]
+
+
+def test_concurrent_requests_are_batched():
+    images = _images()
+    expected = [predict_outfit_type(extract_features(img)) for img in images]
+    batcher = MicroBatcher(max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(img) for img in images))
+
+    results = asyncio.run(run())
+    assert results == expected
+
+    stats = batcher.stats()
+    assert stats["batch_size"]["sum"] == len(images)
+    # 12 concurrent requests with a cap of 8 -> at least one batch larger than 1
+    assert stats["batch_size"]["count"] < len(images)
+
+
+def test_lone_request_is_not_delayed():
+    image = _images()[0]
+    batcher = MicroBatcher(max_batch_size=32, max_wait_ms=1000)
+
+    async def run():
+        return await asyncio.wait_for(batcher.submit(image), timeout=0.9)
+
+    label, confidence = asyncio.run(run())
+    assert (label, confidence) == predict_outfit_type(extract_features(image))
+    assert batcher.stats()["batch_size"]["count"] == 1
@@ -0,0 +1,67 @@
+from models import Outfit, User
+from services import change_feed
+
+
+def _add(db, user, category):
+    outfit = Outfit(owner_id=user.id, image_url=category, category=category)
+    db.add(outfit)
+    db.flush()
+    change_feed.record(db, user.id, [outfit.id])
+    db.commit()
+    return outfit
+
+
+def _sync(db, user, cursor, limit=100):
+    page = change_feed.changes_since(db, user.id, cursor, limit)
+    ops = [(c["op"], c["outfit"]["category"] if c["op"] == "upsert" else c["id"]) for c in page["changes"]]
+    return ops, page["cursor"], page["has_more"]
+
+
+def test_delta_sync_returns_only_newer_changes(db_session):
+    db = db_session
+    user, other = User(email="a@x.com", password="x"), User(email="b@x.com", password="x")
+    db.add_all([user, other])
+    db.flush()
+    shirt, jeans, hat = (_add(db, user, c) for c in ("shirt", "jeans", "hat"))
+    _add(db, other, "scarf")
+
+    ops, cursor, has_more = _sync(db, user, None, limit=2)
+    assert ops == [("upsert", "shirt"), ("upsert", "jeans")] and has_more
+    ops, cursor, has_more = _sync(db, user, cursor)
+    assert ops == [("upsert", "hat")] and not has_more
+    assert _sync(db, user, cursor)[0] == []
+
+    # Update the newest outfit (its seq is the current maximum) and delete another
+    hat.color = "red"
+    change_feed.record(db, user.id, [hat.id])
+    change_feed.record(db, user.id, [shirt.id], deleted=True)
+    db.delete(shirt)
+    db.commit()
+
+    ops, cursor, _ = _sync(db, user, cursor)
+    assert ops == [("upsert", "hat"), ("delete", shirt.id)]
+    assert _sync(db, user, cursor)[0] == []
+
+    # A fresh client sees the current state only, one entry per outfit
+    assert _sync(db, user, None)[0] == [("upsert", "jeans"), ("upsert", "hat"), ("delete", shirt.id)]
+
+
+def test_reused_outfit_id_keeps_other_users_tombstone(db_session):
+    db = db_session
+    user, other = User(email="a@x.com", password="x"), User(email="b@x.com", password="x")
+    db.add_all([user, other])
+    db.flush()
+    _add(db, user, "shirt")
+    hat = _add(db, user, "hat")
+    _, cursor, _ = _sync(db, user, None)
+
+    # Deleting the max-id outfit frees its id: SQLite gives it to the next insert
+    hat_id = hat.id
+    change_feed.record(db, user.id, [hat_id], deleted=True)
+    db.delete(hat)
+    db.commit()
+    scarf = _add(db, other, "scarf")
+    assert scarf.id == hat_id
+
+    assert _sync(db, user, cursor)[0] == [("delete", hat_id)]
+    assert _sync(db, other, None)[0] == [("upsert", "scarf")]
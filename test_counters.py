@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import mysql, postgresql
+
+from models import Prediction, User
+from services import counters
+
+
+def test_counters_track_totals_and_buckets(db_session):
+    db = db_session
+    now = datetime(2026, 3, 10, 14, 30)
+    counters.count_predictions(db, [
+        (True, "shirt", now.isoformat()),
+        (True, "shirt", now - timedelta(days=1)),
+        (False, "jeans", now),
+    ])
+    counters.count_user(db, now)
+    db.commit()
+
+    summary = counters.get_summary(db)
+    assert summary["predictions"] == 3
+    assert (summary["guest"], summary["auth"]) == (2, 1)
+    assert summary["by_category"] == {"shirt": 2, "jeans": 1}
+    assert summary["users"] == 1
+
+    days = counters.get_trend(db, period="day", points=3, now=now)
+    assert [d["bucket"] for d in days] == ["2026-03-08", "2026-03-09", "2026-03-10"]
+    assert [d["predictions"] for d in days] == [0, 1, 2]
+    hours = counters.get_trend(db, period="hour", points=2, now=now)
+    assert hours[-1]["bucket"] == "2026-03-10T14" and hours[-1]["guest"] == 1
+
+
+def test_rebuild_matches_incremental_counts(db_session):
+    db = db_session
+    created = datetime(2026, 3, 10, 9, 5)
+    db.add(User(email="a@x.com", password="x", created_at=created))
+    db.add_all([
+        Prediction(is_guest=True, predicted_category="shirt", created_at=created),
+        Prediction(is_guest=False, predicted_category="dress", created_at=created),
+    ])
+    counters.count_user(db, created)
+    counters.count_predictions(db, [(True, "shirt", created), (False, "dress", created)])
+    db.commit()
+    incremental = counters.get_trend(db, period="hour", points=1, now=created)
+
+    counters.rebuild_counters(db)
+    db.commit()
+    assert counters.get_trend(db, period="hour", points=1, now=created) == incremental
+    assert counters.get_summary(db)["predictions"] == 2
+
+    # Counters are not decremented on delete; a rebuild brings them back in line
+    db.query(Prediction).filter(Prediction.predicted_category == "dress").delete()
+    db.commit()
+    assert counters.get_summary(db)["predictions"] == 2
+    counters.rebuild_counters(db)
+    db.commit()
+    summary = counters.get_summary(db)
+    assert (summary["predictions"], summary["by_category"], summary["users"]) == (1, {"shirt": 1}, 1)
+
+
+def test_upsert_is_built_per_dialect():
+    pg = str(counters.UPSERT_COUNTER["postgresql"].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (bucket, metric) DO UPDATE SET value = (metric_counters.value + excluded.value)" in pg
+    my = str(counters.UPSERT_COUNTER["mysql"].compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE value = (metric_counters.value + VALUES(value))" in my
@@ -0,0 +1,57 @@
+import glob
+import io
+import random
+
+from PIL import Image
+
+from models import Outfit, Prediction, User
+from services import dedup
+from services.wardrobe_state import mark_wardrobe_changed
+
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(7)
+    keys = [rng.getrandbits(64) for _ in range(300)]
+    # A few near copies so that some queries have close matches
+    keys += [k ^ (1 << rng.randrange(64)) for k in keys[:30]]
+    tree = dedup.BKTree()
+    for i, key in enumerate(keys):
+        tree.add(key, i)
+
+    for query in keys[:20] + [rng.getrandbits(64) for _ in range(20)]:
+        expected = sorted((dedup.hamming(query, k), i) for i, k in enumerate(keys)
+                          if dedup.hamming(query, k) <= 6)
+        assert sorted(tree.search(query, 6)) == expected
+
+
+def test_reencoded_image_is_a_duplicate(db_session):
+    db = db_session
+    user = User(email="a@x.com", password="x")
+    db.add(user)
+    db.flush()
+
+    paths = sorted(glob.glob("reference_images/*/*"))[:6]
+    images = [Image.open(p).convert("RGB") for p in paths]
+    outfit = Outfit(owner_id=user.id, image_url="u0", public_id="p0", category="shirt",
+                    phash=dedup.to_db(dedup.dhash(images[0])))
+    db.add(outfit)
+    db.add_all(Prediction(user_id=user.id, image_url=f"u{i}", predicted_category="x", confidence=0.5,
+                          phash=dedup.to_db(dedup.dhash(img)))
+               for i, img in enumerate(images[1:], 1))
+    db.commit()
+
+    # Same photo, resized and saved as JPEG
+    buf = io.BytesIO()
+    images[0].resize((images[0].width // 2, images[0].height // 2)).save(buf, "JPEG", quality=80)
+    again = dedup.to_db(dedup.dhash(Image.open(io.BytesIO(buf.getvalue()))))
+
+    found = dedup.find_duplicate(db, user, again)
+    assert (found.kind, found.id, found.image_url, found.public_id) == ("outfit", outfit.id, "u0", "p0")
+
+    # Deleting the outfit rebuilds the index
+    db.delete(outfit)
+    mark_wardrobe_changed(db, user.id)
+    db.commit()
+    db.refresh(user)
+    found = dedup.find_duplicate(db, user, again)
+    assert found is None
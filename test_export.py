@@ -0,0 +1,58 @@
+import csv
+import gzip
+import io
+import json
+
+from models import Feedback, Outfit, Prediction, User
+from services import export
+
+
+def test_exports_stream_in_chunks(session_factory, db_session, monkeypatch):
+    factory, db = session_factory, db_session
+    user = User(email="a@x.com", password="x")
+    db.add(user)
+    db.flush()
+    db.add_all(Outfit(owner_id=user.id, image_url=f"u{i}", category="shirt", notes='say "hi", bye')
+               for i in range(300))
+    prediction = Prediction(user_id=user.id, predicted_category="jeans", confidence=0.5)
+    db.add(prediction)
+    db.flush()
+    db.add(Feedback(prediction_id=prediction.id, user_id=user.id, user_label="skirt", is_helpful=0))
+    db.commit()
+    monkeypatch.setattr(export, "CHUNK_BYTES", 1024)
+
+    chunks = list(export.stream(export.outfits_query(user.id), "ndjson", session_factory=factory))
+    assert len(chunks) > 5
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [row["image_url"] for row in rows] == [f"u{i}" for i in range(300)]
+    assert rows[0]["created_at"] is not None
+
+    body = gzip.decompress(b"".join(export.stream(export.outfits_query(user.id), "csv", gzip=True,
+                                                  session_factory=factory)))
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert len(rows) == 300 and rows[0]["notes"] == 'say "hi", bye' and rows[0]["color"] == ""
+
+    body = b"".join(export.stream(export.predictions_query(user.id), "ndjson", session_factory=factory))
+    row = json.loads(body)
+    assert (row["predicted_category"], row["feedback_label"], row["feedback_helpful"]) == ("jeans", "skirt", 0)
+
+
+def test_prediction_export_uses_latest_feedback_of_the_user(session_factory, db_session):
+    factory, db = session_factory, db_session
+    user, other = User(email="a@x.com", password="x"), User(email="b@x.com", password="x")
+    db.add_all([user, other])
+    db.flush()
+    rated, unrated = (Prediction(user_id=user.id, predicted_category=c, confidence=0.5) for c in ("jeans", "shirt"))
+    db.add_all([rated, unrated])
+    db.flush()
+    db.add_all([
+        Feedback(prediction_id=rated.id, user_id=user.id, user_label="skirt", is_helpful=0),
+        Feedback(prediction_id=rated.id, user_id=user.id, user_label="shorts", is_helpful=1),
+        Feedback(prediction_id=unrated.id, user_id=other.id, user_label="dress", is_helpful=0),
+    ])
+    db.commit()
+
+    body = b"".join(export.stream(export.predictions_query(user.id), "ndjson", session_factory=factory))
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert [(r["id"], r["feedback_label"], r["feedback_helpful"]) for r in rows] == \
+        [(rated.id, "shorts", 1), (unrated.id, None, None)]
@@ -0,0 +1,52 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from services.ingest import UploadRejected, ingest_file
+
+
+def _png(width, height):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_small_upload_stays_in_memory():
+    data = _png(64, 48)
+    upload = ingest_file(io.BytesIO(data))
+    assert (upload.format, upload.width, upload.height) == ("PNG", 64, 48)
+    assert upload.path is None and upload.source() == data
+    assert upload.decode().size == (64, 48)
+
+
+def test_large_upload_is_spooled_and_removed_on_close():
+    data = _png(64, 48)
+    upload = ingest_file(io.BytesIO(data), spool_memory_bytes=100)
+    assert upload.data is None and os.path.exists(upload.path)
+    with upload.open() as f:
+        assert f.read() == data
+    upload.close()
+    assert not os.path.exists(upload.path)
+
+
+def test_byte_cap_is_enforced_while_reading():
+    with pytest.raises(UploadRejected) as exc:
+        ingest_file(io.BytesIO(_png(64, 48)), max_bytes=100)
+    assert exc.value.status_code == 413
+
+
+def test_oversize_dimensions_rejected_from_header():
+    # 1-bit PNG: a few KB on the wire, 100M pixels once decoded
+    buf = io.BytesIO()
+    Image.new("1", (10000, 10000)).save(buf, format="PNG")
+    with pytest.raises(UploadRejected) as exc:
+        ingest_file(io.BytesIO(buf.getvalue()))
+    assert exc.value.status_code == 413
+
+
+def test_non_image_rejected():
+    with pytest.raises(UploadRejected) as exc:
+        ingest_file(io.BytesIO(b"not an image" * 100))
+    assert exc.value.status_code == 415
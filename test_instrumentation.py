@@ -0,0 +1,32 @@
+import pytest
+
+from cores.instrumentation import Registry, STAGE_ERRORS, STAGE_LATENCY, stage
+
+
+def test_prometheus_text_format():
+    registry = Registry()
+    latency = registry.histogram("demo_seconds", "Demo latency", ("route",), buckets=(0.1, 1))
+    requests = registry.counter("demo_total", "Demo requests", ("route", "status"))
+    latency.labels("/a").observe(0.05)
+    latency.labels("/a").observe(0.5)
+    requests.labels("/a", "200").inc()
+    requests.labels("/a", "200").inc()
+
+    lines = registry.render().splitlines()
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'demo_seconds_count{route="/a"} 2' in lines
+    assert 'demo_total{route="/a",status="200"} 2' in lines
+
+
+def test_stage_records_latency_and_errors_outside_requests():
+    before = STAGE_LATENCY.labels("background", "test_stage").snapshot()["count"]
+    with stage("test_stage"):
+        pass
+    with pytest.raises(ValueError):
+        with stage("test_stage"):
+            raise ValueError("boom")
+
+    assert STAGE_LATENCY.labels("background", "test_stage").snapshot()["count"] == before + 2
+    assert STAGE_ERRORS.labels("background", "test_stage").value >= 1
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime
+
+from models import Prediction
+from services.metrics_buffer import PredictionWriteBuffer
+
+
+def _row(i):
+    return {"outfit": "shirt", "confidence": 0.5, "weather_data": None,
+            "created_at": datetime.utcnow().isoformat()}
+
+
+def _buffer(Session, **kwargs):
+    return Session, PredictionWriteBuffer(session_factory=Session, **kwargs)
+
+
+def test_rows_are_flushed_in_batches(session_factory):
+    Session, buffer = _buffer(session_factory, flush_size=100, flush_interval=60, max_queue=1000)
+    for i in range(250):
+        buffer.add(_row(i))
+
+    assert asyncio.run(buffer.flush()) == 250
+    stats = buffer.stats()
+    assert stats["flushed"] == 250 and stats["flushes"] == 3 and stats["queued"] == 0
+
+    db = Session()
+    assert db.query(Prediction).filter(Prediction.is_guest.is_(True)).count() == 250
+    db.close()
+
+
+def test_full_queue_drops_and_stop_drains(session_factory):
+    Session, buffer = _buffer(session_factory, flush_size=10, flush_interval=60, max_queue=5)
+
+    async def run():
+        buffer.start()
+        for i in range(8):
+            buffer.add(_row(i))
+        await buffer.stop()
+
+    asyncio.run(run())
+    stats = buffer.stats()
+    assert stats["dropped"] == 3
+    assert stats["flushed"] == 5 and stats["queued"] == 0
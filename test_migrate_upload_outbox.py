@@ -0,0 +1,54 @@
+import re
+import sqlite3
+
+from sqlalchemy import create_engine, event, text
+
+import migrate_add_upload_outbox
+
+# outfits as created before the upload outbox: image_url NOT NULL, no image_status
+OLD_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR, password VARCHAR);
+CREATE TABLE outfits (
+    id INTEGER PRIMARY KEY, image_url VARCHAR NOT NULL, public_id VARCHAR, category VARCHAR,
+    color VARCHAR, occasion VARCHAR, last_worn_date DATE, confidence FLOAT, notes VARCHAR,
+    created_at DATETIME, updated_at DATETIME, owner_id INTEGER REFERENCES users(id), phash INTEGER
+);
+CREATE INDEX ix_outfits_id ON outfits (id);
+CREATE INDEX ix_outfits_owner_created ON outfits (owner_id, created_at);
+CREATE TABLE predictions (
+    id INTEGER PRIMARY KEY, user_id INTEGER REFERENCES users(id),
+    outfit_id INTEGER REFERENCES outfits(id), predicted_category VARCHAR
+);
+INSERT INTO users (email, password) VALUES ('a@x.com', 'pw');
+INSERT INTO outfits (image_url, category, owner_id, phash) VALUES ('http://img/1', 'shirt', 1, 42);
+INSERT INTO predictions (user_id, outfit_id, predicted_category) VALUES (1, 1, 'shirt');
+"""
+
+
+def test_outfits_rebuild_keeps_foreign_keys(tmp_path, monkeypatch):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(OLD_SCHEMA)
+
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _foreign_keys(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    monkeypatch.setattr(migrate_add_upload_outbox, "engine", engine)
+    migrate_add_upload_outbox.migrate()
+    migrate_add_upload_outbox.migrate()  # Re-running is a no-op
+
+    with engine.connect() as conn:
+        schema = dict(conn.execute(text("SELECT name, sql FROM sqlite_master WHERE sql IS NOT NULL")).fetchall())
+        assert not [name for name, sql in schema.items() if re.search(r"REFERENCES\s+\"?\w+_(old|new)\b", sql)]
+        assert conn.execute(text("PRAGMA foreign_key_check")).fetchall() == []
+        assert {"ix_outfits_id", "ix_outfits_owner_created", "ix_outfits_owner_category_created"} <= set(schema)
+
+        row = conn.execute(text("SELECT image_url, image_status, phash FROM outfits WHERE id = 1")).one()
+        assert tuple(row) == ("http://img/1", "ready", 42)
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        conn.execute(text("INSERT INTO predictions (user_id, outfit_id, image_status) VALUES (1, 1, 'ready')"))
+        conn.execute(text("INSERT INTO wear_events (user_id, outfit_id, worn_on) VALUES (1, 1, '2026-03-01')"))
+        conn.commit()
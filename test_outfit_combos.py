@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from services.outfit_combos import generate_combinations, slot_for_category
+
+
+def _item(id, category, last_worn_date=None, occasion=None, color=None):
+    return SimpleNamespace(id=id, category=category, color=color, occasion=occasion,
+                           confidence=0.8, last_worn_date=last_worn_date)
+
+
+WARDROBE = [
+    _item(1, "tshirt"), _item(2, "shirt", occasion="formal"),
+    _item(3, "jeans"), _item(4, "shorts"),
+    _item(5, "dress"),
+    _item(6, "sandals"), _item(7, "boots"),
+    _item(8, "jacket"), _item(9, "bag"),
+]
+
+
+def test_complete_outfits():
+    combos = generate_combinations(WARDROBE, top_k=3)
+    assert combos, "Should build at least one outfit"
+    for combo in combos:
+        slots = [slot_for_category(i.category) for i in combo["items"]]
+        assert "footwear" in slots
+        assert ("top" in slots and "bottom" in slots) or "one_piece" in slots
+        # No weather given -> no outerwear
+        assert "outerwear" not in slots
+    scores = [c["score"] for c in combos]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_cold_weather_adds_outerwear():
+    weather = {"temp": 8, "rain": 0, "min_temp": 4, "max_temp": 10, "rain_prob": 0}
+    combos = generate_combinations(WARDROBE, weather=weather)
+    assert combos
+    for combo in combos:
+        categories = [i.category for i in combo["items"]]
+        assert "jacket" in categories
+
+
+def test_cold_weather_without_outerwear_rejects_light_clothes():
+    weather = {"temp": 3, "rain": 0, "min_temp": 1, "max_temp": 5, "rain_prob": 0}
+    wardrobe = [i for i in WARDROBE if slot_for_category(i.category) != "outerwear"]
+    # Nothing to layer on top: cold-only rejections are not softened
+    assert generate_combinations(wardrobe, weather=weather) == []
+
+    combos = generate_combinations(WARDROBE, weather=weather)
+    assert combos and all("jacket" in [i.category for i in c["items"]] for c in combos)
+
+
+def test_recently_worn_items_are_skipped():
+    today = date.today()
+    wardrobe = [i for i in WARDROBE if i.category != "dress"]
+    wardrobe = [_item(i.id, i.category, today if i.category == "tshirt" else None) for i in wardrobe]
+    combos = generate_combinations(wardrobe, avoid_before=today - timedelta(days=7), top_k=10)
+    assert combos
+    assert all(i.category != "tshirt" for c in combos for i in c["items"])
+
+
+def test_no_footwear_means_no_outfit():
+    wardrobe = [i for i in WARDROBE if slot_for_category(i.category) != "footwear"]
+    assert generate_combinations(wardrobe) == []
+
+
+if __name__ == "__main__":
+    test_complete_outfits()
+    test_cold_weather_adds_outerwear()
+    test_cold_weather_without_outerwear_rejects_light_clothes()
+    test_recently_worn_items_are_skipped()
+    test_no_footwear_means_no_outfit()
+    print("Outfit combination tests passed! ✅")
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from models import Outfit
+from services.wardrobe_listing import list_outfits
+from services.wardrobe_stats import compute_stats
+
+
+def _plans(engine, db, run):
+    """Run queries through run(db) and return EXPLAIN QUERY PLAN rows per SELECT"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "outfits" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    run(db)
+    event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        return [
+            (statement, [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)])
+            for statement, parameters in captured
+        ]
+
+
+def test_wardrobe_queries_use_indexes(db_engine, db_session):
+    cutoff = date.today() - timedelta(days=30)
+
+    def run(db):
+        list_outfits(db, 1)
+        list_outfits(db, 1, [Outfit.category == "shirt"])
+        list_outfits(db, 1, [Outfit.occasion == "casual"])
+        list_outfits(db, 1, [Outfit.last_worn_date == date.today()])
+        list_outfits(db, 1, [(Outfit.last_worn_date < cutoff) | (Outfit.last_worn_date.is_(None))])
+        compute_stats(db, 1)
+        (db.query(Outfit).filter(Outfit.owner_id == 1, Outfit.category == "shirt")
+         .order_by(Outfit.last_worn_date.asc().nullsfirst()).limit(10).all())
+
+    plans = _plans(db_engine, db_session, run)
+    assert len(plans) == 7
+    for statement, details in plans:
+        assert not any(d.startswith("SCAN outfits") and "INDEX" not in d for d in details), (statement, details)
+        assert any("outfits USING" in d and "INDEX" in d for d in details), (statement, details)
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+
+import auth
+
+
+def test_hashing_runs_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 4)
+    loop_thread = threading.get_ident()
+    seen = []
+    real_verify = auth.verify_password
+
+    def verify(plain, hashed):
+        seen.append(threading.get_ident())
+        return real_verify(plain, hashed)
+
+    monkeypatch.setattr(auth, "verify_password", verify)
+
+    async def run():
+        hashed = await auth.hash_password_async("secret")
+        return hashed, await auth.verify_password_async("secret", hashed), \
+            await auth.verify_password_async("wrong", hashed)
+
+    hashed, ok, bad = asyncio.run(run())
+    assert ok and not bad
+    assert seen and loop_thread not in seen
+    assert hashed.startswith("$2b$04$")
+
+
+def test_needs_rehash_compares_cost(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 5)
+    assert auth.needs_rehash(auth.hash_password("pw", rounds=4))
+    assert not auth.needs_rehash(auth.hash_password("pw"))
+    assert not auth.needs_rehash("not-a-bcrypt-hash")
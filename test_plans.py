@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+
+from models import User, Outfit
+from services import plans, weather as weather_svc
+from services.wardrobe_state import mark_wardrobe_changed
+
+
+def _add_wardrobe(db, user):
+    for category in ["tshirt", "jeans", "sandals", "bag"]:
+        db.add(Outfit(image_url=f"http://img/{category}", category=category, owner_id=user.id))
+
+
+def test_precompute_dedupes_forecasts(db_session, monkeypatch):
+    calls = []
+
+    def fake_forecast(day, city=None, lat=None, lon=None):
+        calls.append((city, lat, lon))
+        return 22, 0, {"min_temp": 18, "max_temp": 26, "daily_rain_prob": 0, "description": "clear"}
+
+    monkeypatch.setattr(weather_svc, "get_daily_forecast", fake_forecast)
+    db = db_session
+    users = [
+        User(email="a@x.com", password="pw", home_city="Pune"),
+        User(email="b@x.com", password="pw", home_city=" pune "),
+        User(email="c@x.com", password="pw", home_lat=12.97, home_lon=77.59),
+        User(email="d@x.com", password="pw"),  # no location -> skipped
+    ]
+    db.add_all(users)
+    db.commit()
+    for user in users:
+        _add_wardrobe(db, user)
+    db.commit()
+
+    tomorrow = date.today() + timedelta(days=1)
+    summary = plans.precompute_plans(db, plan_date=tomorrow)
+    assert summary["users"] == 3
+    assert summary["forecasts_fetched"] == 2
+    assert len(calls) == 2
+
+    plan = plans.get_plan(db, users[0], today=tomorrow)
+    assert plan["combinations"], "Plan should contain combinations"
+    assert plans.get_plan(db, users[3], today=tomorrow) is None
+
+
+def test_plan_rebuilt_after_wardrobe_change(db_session, monkeypatch):
+    db = db_session
+    user = User(email="a@x.com", password="pw", home_city="Pune")
+    db.add(user)
+    db.commit()
+    _add_wardrobe(db, user)
+    db.commit()
+
+    weather = {"temp": 22, "rain": 0, "min_temp": 18, "max_temp": 26, "rain_prob": 0}
+    plans.build_plan(db, user.id, date.today(), weather)
+    db.commit()
+    first = plans.get_plan(db, user)
+
+    # Remove all footwear -> rebuilt plan must be empty
+    db.query(Outfit).filter(Outfit.category == "sandals").delete()
+    mark_wardrobe_changed(db, user.id)
+    db.commit()
+    db.refresh(user)
+
+    second = plans.get_plan(db, user)
+    assert first["combinations"]
+    assert second["combinations"] == []
+    assert second["weather"] == weather
+
+
+def test_plan_items_are_served_like_live_suggestions(db_session):
+    db = db_session
+    user = User(email="a@x.com", password="pw", home_city="Pune")
+    db.add(user)
+    db.commit()
+    _add_wardrobe(db, user)
+    db.commit()
+    plans.build_plan(db, user.id, date.today(), None)
+    db.commit()
+
+    # An image backfilled by the upload outbox does not mark the wardrobe changed
+    bag = db.query(Outfit).filter(Outfit.category == "bag").one()
+    bag.image_url, bag.image_status = "http://img/bag-uploaded", "ready"
+    db.commit()
+
+    combo = plans.get_plan(db, user)["combinations"][0]
+    assert combo["items"] == [db.get(Outfit, item["id"]).to_dict() for item in combo["items"]]
+    assert "http://img/bag-uploaded" in [item["image_url"] for item in combo["items"]]
+
+
+def test_location_change_discards_plan(db_session):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from auth import get_current_user
+    from database import get_db
+    from models import OutfitPlan
+    from routes.auth import router
+
+    db = db_session
+    user = User(email="a@x.com", password="pw", home_city="Pune")
+    db.add(user)
+    db.commit()
+    _add_wardrobe(db, user)
+    plans.build_plan(db, user.id, date.today(), {"temp": 22, "rain": 0, "min_temp": 18, "max_temp": 26})
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: user
+    response = TestClient(app).put("/auth/location", json={"city": "Oslo"})
+    assert response.status_code == 200 and response.json()["user"]["home_city"] == "Oslo"
+    assert db.get(OutfitPlan, user.id) is None
+    assert plans.get_plan(db, user) is None
@@ -0,0 +1,36 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from cores.profiling import ProfilingMiddleware
+
+
+def _client(tmp_path, **kwargs):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {"id": sum(range(1000)) + item_id}
+
+    app.add_middleware(ProfilingMiddleware, profile_dir=tmp_path, **kwargs)
+    return TestClient(app)
+
+
+def test_token_header_profiles_request(tmp_path):
+    client = _client(tmp_path, sample_rate=0, token="secret", paths=[])
+    assert client.get("/items/1").status_code == 200
+    assert list(tmp_path.iterdir()) == []
+
+    assert client.get("/items/1", headers={"X-Profile-Token": "wrong"}).status_code == 200
+    assert list(tmp_path.iterdir()) == []
+
+    assert client.get("/items/1", headers={"X-Profile-Token": "secret"}).status_code == 200
+    files = list(tmp_path.iterdir())
+    assert len(files) == 1
+    assert "_items-item_id_200_" in files[0].name and files[0].suffix == ".prof"
+
+
+def test_sampling_respects_paths(tmp_path):
+    client = _client(tmp_path, sample_rate=1.0, token="", paths=["/items/2"])
+    client.get("/items/1")
+    client.get("/items/2")
+    assert len(list(tmp_path.iterdir())) == 1
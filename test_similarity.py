@@ -0,0 +1,42 @@
+import glob
+
+import numpy as np
+from PIL import Image
+
+from ml.extract_features import extract_features
+from models import Outfit, User
+from services import similarity
+from services.wardrobe_state import mark_wardrobe_changed
+
+
+def test_nearest_matches_brute_force_cosine(db_session):
+    db = db_session
+    user = User(email="a@x.com", password="x")
+    db.add(user)
+    db.flush()
+
+    paths = sorted(glob.glob("reference_images/*/*"))[:15]
+    vectors = [extract_features(Image.open(p)) for p in paths]
+    outfits = [Outfit(owner_id=user.id, image_url=p, category="x", features=similarity.pack(v))
+               for p, v in zip(paths, vectors)]
+    db.add_all(outfits)
+    db.commit()
+    db.refresh(user)
+
+    query = vectors[3]
+    matches = similarity.nearest(db, user, query, limit=4, exclude_id=outfits[3].id)
+
+    stored = np.stack([similarity.unpack(o.features) for o in outfits])
+    cosine = stored @ query / (np.linalg.norm(stored, axis=1) * np.linalg.norm(query))
+    cosine[3] = -np.inf
+    expected = [outfits[i].id for i in np.argsort(-cosine)[:4]]
+    assert [outfit_id for outfit_id, _ in matches] == expected
+
+    # The cached matrix is rebuilt once the wardrobe changes
+    extra = Outfit(owner_id=user.id, image_url="dup", category="x", features=similarity.pack(query))
+    db.add(extra)
+    mark_wardrobe_changed(db, user.id)
+    db.commit()
+    db.refresh(user)
+    best_id, best_score = similarity.nearest(db, user, query, limit=1, exclude_id=outfits[3].id)[0]
+    assert best_id == extra.id and best_score > 0.999
@@ -0,0 +1,60 @@
+import asyncio
+import os
+
+from models import User, Outfit, Prediction, UploadJob
+from services.upload_outbox import UploadOutbox, LocalUploader, spool_image, create_job
+
+
+def _add_user(db):
+    user = User(email="a@x.com", password="pw")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_pending_upload_is_backfilled(tmp_path, session_factory, db_session):
+    Session, db, user = session_factory, db_session, _add_user(db_session)
+    spool_path = spool_image(b"fake image bytes", spool_dir=tmp_path / "spool")
+    job = create_job(db, user.id, spool_path)
+    db.add(Prediction(user_id=user.id, predicted_category="shirt", image_status="pending", upload_id=job.id))
+    db.add(Outfit(category="shirt", owner_id=user.id, image_status="pending", upload_id=job.id))
+    db.commit()
+
+    outbox = UploadOutbox(uploader=LocalUploader(tmp_path / "cloud"), session_factory=Session)
+    assert asyncio.run(outbox.run_once()) == 1
+
+    db.expire_all()
+    job = db.get(UploadJob, job.id)
+    assert job.status == "done"
+    assert not os.path.exists(spool_path), "Spooled file should be removed after upload"
+    for row in (db.query(Prediction).one(), db.query(Outfit).one()):
+        assert row.image_status == "ready"
+        assert row.image_url == job.image_url
+        assert row.public_id == job.public_id
+    assert (tmp_path / "cloud" / job.public_id).read_bytes() == b"fake image bytes"
+
+
+def test_failed_upload_retries_then_gives_up(tmp_path, session_factory, db_session):
+    Session, db, user = session_factory, db_session, _add_user(db_session)
+    spool_path = spool_image(b"x", spool_dir=tmp_path / "spool")
+    job = create_job(db, user.id, spool_path)
+    db.add(Outfit(category="shirt", owner_id=user.id, image_status="pending", upload_id=job.id))
+    db.commit()
+
+    def broken_uploader(file, folder="wardrobe"):
+        raise Exception("Cloudinary unavailable")
+
+    outbox = UploadOutbox(uploader=broken_uploader, session_factory=Session,
+                          max_attempts=2, retry_base_seconds=0)
+    asyncio.run(outbox.run_once())
+    db.expire_all()
+    assert db.get(UploadJob, job.id).status == "pending"
+    assert db.get(UploadJob, job.id).attempts == 1
+    assert os.path.exists(spool_path), "A job that will be retried keeps its spooled file"
+
+    asyncio.run(outbox.run_once())
+    db.expire_all()
+    assert db.get(UploadJob, job.id).status == "failed"
+    assert db.query(Outfit).one().image_status == "failed"
+    assert db.get(UploadJob, job.id).spool_path is None
+    assert not os.path.exists(spool_path), "A permanently failed job should not leave its spooled file behind"
@@ -0,0 +1,39 @@
+from datetime import date, timedelta
+
+from models import Outfit, User
+from services import wardrobe_stats
+from services.wardrobe_state import mark_wardrobe_changed
+
+
+def test_stats_single_query_and_cache(db_session_with_statements):
+    db, statements = db_session_with_statements
+    today = date(2026, 3, 10)
+    user = User(email="a@x.com", password="x")
+    db.add(user)
+    db.flush()
+    worn = [None, today - timedelta(days=2), today - timedelta(days=30)]
+    for i in range(9):
+        db.add(Outfit(owner_id=user.id, image_url="u", category=f"cat{i % 3}", last_worn_date=worn[i % 3]))
+    db.commit()
+    db.refresh(user)
+
+    statements.clear()
+    stats = wardrobe_stats.get_stats(db, user, today)
+    assert len(statements) == 1
+    assert stats == {
+        "total_outfits": 9,
+        "categories": {"cat0": 3, "cat1": 3, "cat2": 3},
+        "never_worn": 3,
+        "recently_worn_7_days": 3
+    }
+
+    # Cached until the wardrobe changes
+    statements.clear()
+    assert wardrobe_stats.get_stats(db, user, today) == stats
+    assert statements == []
+
+    db.add(Outfit(owner_id=user.id, image_url="u", category="cat9"))
+    mark_wardrobe_changed(db, user.id)
+    db.commit()
+    db.refresh(user)
+    assert wardrobe_stats.get_stats(db, user, today)["categories"]["cat9"] == 1
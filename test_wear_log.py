@@ -0,0 +1,97 @@
+import threading
+from datetime import date, timedelta
+
+from sqlalchemy.dialects import mysql, postgresql
+
+from models import Outfit, OutfitWearStats, User, WearEvent
+from services import wear_log
+
+
+def _window_counts(db, outfit_id, today):
+    days = [e.worn_on for e in db.query(WearEvent).filter(WearEvent.outfit_id == outfit_id)]
+    return (
+        len(days),
+        sum(1 for d in days if d > today - timedelta(days=30)),
+        sum(1 for d in days if d > today - timedelta(days=90)),
+    )
+
+
+def test_rollups_match_event_history_as_days_pass(db_session):
+    db = db_session
+    user = User(email="a@x.com", password="x")
+    db.add(user)
+    db.flush()
+    outfits = [Outfit(owner_id=user.id, image_url="u", category=c) for c in ("shirt", "jeans", "dress")]
+    db.add_all(outfits)
+    db.commit()
+
+    start = date(2026, 1, 1)
+    for day in range(0, 200, 3):
+        today = start + timedelta(days=day)
+        wear_log.record_wear(db, outfits[day % 2], today)
+        db.commit()
+
+        if day % 30 == 0:
+            for row in wear_log.rotation(db, user.id, today)["outfits"]:
+                expected = _window_counts(db, row["id"], today)
+                assert (row["wear_count"], row["worn_30d"], row["worn_90d"]) == expected
+
+    later = start + timedelta(days=260)
+    top = wear_log.most_worn(db, user.id, window="90d", today=later)
+    expected = sorted(
+        ((o.id, _window_counts(db, o.id, later)[2]) for o in outfits),
+        key=lambda pair: -pair[1]
+    )
+    assert [(r["id"], r["worn_90d"]) for r in top] == [pair for pair in expected if pair[1]]
+
+    rotation = wear_log.rotation(db, user.id, later)
+    assert rotation["never_worn"] == 1 and rotation["total_outfits"] == 3
+
+
+def test_concurrent_first_wears_share_one_rollup(session_factory):
+    db = session_factory()
+    user = User(email="a@x.com", password="x")
+    db.add(user)
+    db.flush()
+    outfit = Outfit(owner_id=user.id, image_url="u", category="shirt")
+    db.add(outfit)
+    db.commit()
+    outfit_id = outfit.id
+    db.close()
+
+    workers = 6
+    barrier = threading.Barrier(workers)
+    errors = []
+
+    def wear():
+        # No autoflush: every session reads the (missing) rollup before any of them writes
+        session = session_factory(autoflush=False)
+        try:
+            target = session.get(Outfit, outfit_id)
+            barrier.wait()
+            wear_log.record_wear(session, target, date(2026, 1, 1))
+            session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=wear) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    db = session_factory()
+    stats = db.get(OutfitWearStats, outfit_id)
+    assert (stats.wear_count, stats.worn_30d, stats.worn_90d) == (workers, workers, workers)
+    db.close()
+
+
+def test_upsert_is_built_per_dialect():
+    pg = str(wear_log.UPSERT_WEAR["postgresql"].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (outfit_id) DO UPDATE SET wear_count = (outfit_wear_stats.wear_count + %(wear_count_1)s::INTEGER)" in pg
+    assert "greatest(" in pg
+    my = str(wear_log.UPSERT_WEAR["mysql"].compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE wear_count = (outfit_wear_stats.wear_count + %s)" in my